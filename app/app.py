@@ -17,18 +17,51 @@ if not CFG_PATH.exists():
 
 # Main app
 import yaml, streamlit as st
-from retrieval.retriever import search, format_citations
-from models.llm_client import generate
+from retrieval.retriever import search, cache_stats, stage_stats, embed_query, index_version
+from retrieval.warmup import WarmUp
+from retrieval.response_cache import get_response_cache, chunk_key
+from retrieval.context import SYSTEM_COMPLIANCE, build_rag_prompt
+from models.llm_client import generate_stream, get_client
 from news.gdelt_search import search_company_news
+from news.risk import score_articles
+from telemetry.tracing import trace, span
 
 
 CFG = yaml.safe_load(open(CFG_PATH, "r"))
 
+# Sidebar search scopes -> retriever metadata filters
+SEARCH_SCOPES = {
+    "All documents": None,
+    "Internal policies": {"folder": "policies"},
+    "All laws": {"folder": "laws"},
+    "Brazilian law": {"doc_prefix": "LAW-BR"},
+    "US law": {"doc_prefix": "LAW-US"},
+    "UK law": {"doc_prefix": "LAW-UK"},
+}
+
 # Streamlit page config
 st.set_page_config(page_title="AI Compliance Assistant", page_icon="✅", layout="wide")
 st.title("AI Compliance Assistant (Portfolio Prototype)")
 
 
+@st.cache_resource
+def get_warmup():
+    # Once per server process: load index + embedding model in the background
+    return WarmUp().start()
+
+warmup = get_warmup()
+
+
+def render_warmup_status():
+    status = warmup.status()
+    if status["error"]:
+        st.warning(f"Retrieval not loaded: {status['error']}")
+    elif status["ready"]:
+        st.caption(f"Retrieval ready (warm-up {status['elapsed_s']:.1f}s)")
+    else:
+        st.progress(status["progress"], text=f"Warming up retrieval: {status['stage'] or 'starting'}…")
+
+
 with st.sidebar:
 
     # General settings info
@@ -37,9 +70,28 @@ with st.sidebar:
     # Display LLM and retrieval config
     st.caption("LLM (Ollama)")
     st.text(f"Model: {CFG['llm']['model']}")
+    llm_m = get_client().metrics()
+    if llm_m["requests"]:
+        st.text(f"Requests: {llm_m['requests']} (in flight {llm_m['in_flight']}) · p50 {llm_m['latency_p50_s'] or 0:.1f}s")
     st.caption("Retrieval")
+    # Poll the warm-up thread until it finishes (then render once per rerun)
+    st.fragment(render_warmup_status, run_every=None if warmup.ready else 1.0)()
     st.text(f"Embeddings: {CFG['retrieval']['embedding_model']}")
     st.text(f"Top-K: {CFG['retrieval']['top_k']}")
+
+    # Query/result cache hit rates (updated on each rerun)
+    with st.expander("Retrieval cache"):
+        stats = cache_stats()
+        for label, key in [("Query vectors", "query_vectors"), ("Results", "results")]:
+            c = stats[key]
+            st.text(f"{label}: {c['hit_rate']:.0%} hit ({c['hits']}/{c['hits'] + c['misses']})")
+        if stats["embeddings"]:
+            st.text(f"Embedding cache: {stats['embeddings']['hit_rate']:.0%} hit")
+        stages = stage_stats()
+        if stages["searches"]:
+            st.text(f"Retrieve: {stages['retrieve_mean_s'] * 1000:.0f} ms avg")
+        if stages["reranked"] or stages["rerank_fallbacks"]:
+            st.text(f"Rerank: {stages['rerank_mean_s'] * 1000:.0f} ms avg · {stages['rerank_fallbacks']} over budget")
     st.divider()
 
     # Chat mode selection
@@ -50,6 +102,14 @@ with st.sidebar:
         help="Compliance: uses RAG to analyze internal policies and laws. General: general chat, no RAG."
     )
 
+    # Restrict retrieval to a subset of the corpus (applied inside the index)
+    scope = st.selectbox(
+        "Search scope",
+        list(SEARCH_SCOPES),
+        index=0,
+        help="Limit Compliance answers to internal policies or to one jurisdiction's laws."
+    )
+
     # Toggle for showing citations as a separate section
     show_citations_section = st.checkbox(
         "Show separate 'Citations' section",
@@ -76,6 +136,12 @@ with st.sidebar:
                 st.caption(f"{e}")
                 news = []
 
+        # Kept across reruns so the risk button below can use them
+        st.session_state.news = [dict(a, company=company) for a in news]
+        st.session_state.news_fetched = True
+
+    news = st.session_state.get("news", [])
+    if st.session_state.get("news_fetched"):
 
         # Display search results or handle empty/limited responses
         if news:
@@ -85,20 +151,16 @@ with st.sidebar:
             for a in news:
                 st.markdown(f"- [{a['title']}]({a['url']}) — *{a['domain']}*, {a.get('seendate','')}")
 
-            # Optional: run LLM-based reputational risk analysis
+            # Optional: LLM-based reputational risk scores (batched, cached per article)
             if st.button("Analyze risk on listed articles"):
-                bullet_list = "\n".join([f"- {a['title']} ({a['domain']}) — {a['url']}" for a in news])
-                prompt = (
-                "You are a compliance analyst. Given the following headlines and links, identify potential "
-                "reputational risks (e.g., corruption, sanctions, product safety, labor, data breach). "
-                "Return a short bullet list of risks with a 0-100 risk score and the cited link per bullet.\n\n"
-                f"HEADLINES:\n{bullet_list}"
-            )
-
-                # Use local LLM to summarize reputational risks
-                risk = generate(prompt, temperature=0.1, system="Be concise and structured.")
+                with st.spinner("Scoring headlines..."):
+                    scored, stats = score_articles(news)
                 st.markdown("### Risk Analysis")
-                st.write(risk)
+                for a in scored:
+                    st.markdown(f"- **{a['score']}** · {a['category'] or 'n/a'} — [{a['title']}]({a['url']})"
+                                + (f" — {a['reason']}" if a['reason'] else ""))
+                st.caption(f"{stats['sent']} new / {stats['cached']} already scored · "
+                           f"{stats['batches']} LLM calls · {stats['seconds']}s")
         else:
 
             # Handles GDELT rate limits or no-news scenarios
@@ -130,15 +192,7 @@ user_q = st.chat_input(placeholder)
 # ---------------------------------------------------------------------------
 
 
-SYSTEM_COMPLIANCE = (
-    "You are the company's compliance assistant. "
-    "Rules:\n"
-    "1) Prefer to answer based on the retrieved policy/law excerpts provided (CONTEXT). "
-    "2) If the policy is silent, say so and suggest contacting Compliance. "
-    "3) Do NOT add a separate 'Citations' section unless explicitly requested. "
-    "4) When you rely on a rule, cite it inline in parentheses like (POL-ABAC-002, Art. 12). "
-    "5) Keep quotes short when clarifying thresholds/prohibitions."
-)
+# SYSTEM_COMPLIANCE lives in retrieval.context (shared with the HTTP service)
 SYSTEM_GENERAL = (
     "You are a helpful and friendly general-purpose assistant. "
     "Be concise, accurate, and practical. Avoid fabrications."
@@ -159,6 +213,20 @@ def answer_capabilities_if_asked(q: str) -> str | None:
         )
     return None
 
+# ---------------------------------------------------------------------------
+# Helper: stream an LLM answer into the current chat message
+# ---------------------------------------------------------------------------
+
+def stream_answer(prompt: str, temperature: float, system: str) -> str:
+    stats = {}
+    answer = st.write_stream(
+        generate_stream(prompt, temperature=temperature, system=system, stats=stats)
+    )
+    # Time-to-first-token is what the user perceives as latency
+    if "ttft_s" in stats:
+        st.caption(f"First token in {stats['ttft_s']:.2f}s · total {stats['total_s']:.1f}s")
+    return answer
+
 
 
 # Handle user query
@@ -170,69 +238,76 @@ if user_q:
 
     # Generate assistant response
     with st.chat_message("assistant"):
-        try:
-            if mode == "Compliance Assistant":
-                # --- RAG Mode: search policy index for relevant snippets ---
-                with st.spinner("Retrieving relevant clauses..."):
-                    hits = search(user_q)
-
-                # If no relevant hits, fallback to capability answer or general LLM response
-                if not hits:
-                    cap = answer_capabilities_if_asked(user_q)
-                    fallback = cap or (
-                        "I couldn't find a relevant policy excerpt. "
-                        "If this is a general question, I can still help without formal citations."
-                    )
-                    answer = generate(
-                        fallback + f"\n\nUser question: {user_q}",
-                        temperature=0.3,
-                        system=SYSTEM_GENERAL
-                    )
+        with trace('chat_turn', mode=mode):
+            try:
+                if mode == "Compliance Assistant":
+                    # --- RAG Mode: search policy index for relevant snippets ---
+                    with st.spinner("Retrieving relevant clauses..."):
+                        hits = search(user_q, filters=SEARCH_SCOPES[scope])
+
+                    # If no relevant hits, fallback to capability answer or general LLM response
+                    if not hits:
+                        cap = answer_capabilities_if_asked(user_q)
+                        fallback = cap or (
+                            "I couldn't find a relevant policy excerpt. "
+                            "If this is a general question, I can still help without formal citations."
+                        )
+                        answer = stream_answer(
+                            fallback + f"\n\nUser question: {user_q}",
+                            temperature=0.3,
+                            system=SYSTEM_GENERAL
+                        )
+                    else:
+
+                        with span('prompt.build', chunks=len(hits)) as s_prompt:
+                            # Merge/dedupe retrieved snippets into a token-bounded context and
+                            # compose the LLM prompt; cits cover the chunks that made it in
+                            prompt, packed, cits = build_rag_prompt(user_q, hits)
+                            s_prompt.set(chars=len(prompt), context_tokens=packed["tokens"],
+                                         saved_tokens=packed["saved_tokens"])
+
+                        # Reuse a recent answer for a near-identical question over the same chunks
+                        resp_cache = get_response_cache()
+                        cached = None
+                        if resp_cache is not None:
+                            qvec = embed_query(user_q)
+                            rkey = chunk_key(hits, variant=SYSTEM_COMPLIANCE)
+                            cached = resp_cache.lookup(rkey, qvec, index_version())
+
+                        if cached is not None:
+                            answer = cached
+                            st.markdown(answer)
+                            st.caption("Answered from cache")
+                        else:
+                            # Generate the compliance-oriented answer (streamed as it is produced)
+                            answer = stream_answer(prompt, temperature=0.2, system=SYSTEM_COMPLIANCE)
+                            if resp_cache is not None and answer:
+                                resp_cache.store(rkey, qvec, answer, index_version())
+
+                        inline_block = "\n".join([f"- {c['source']}" + (f" — Art. {c['article']}" if c['article'] else "") for c in cits])
+
+                        # Optional debug info (shows retrieved chunks)
+                        if debug_retrieval:
+                            st.markdown("##### Retrieved Sources (debug)")
+                            st.code(inline_block)
+                            st.caption(f"Context {packed['tokens']} tokens in {packed['blocks']} blocks "
+                                       f"({packed['saved_tokens']} saved, {packed['dropped']} chunks dropped)")
+                        # Optional explicit citations section (if checkbox enabled)
+                        if show_citations_section and cits:
+                            citations = "\n\n**Citations**\n" + inline_block
+                            st.markdown(citations)
+                            answer += citations
+
                 else:
+                    # --- General Chat Mode (no RAG) ---
+                    cap = answer_capabilities_if_asked(user_q)
+                    preface = (cap + "\n\n") if cap else ""
+                    answer = stream_answer(preface + user_q, temperature=0.5, system=SYSTEM_GENERAL)
 
-                    # Build context from retrieved snippets
-                    context = "\n\n---\n\n".join([h["text"] for h in hits])
-
-                    # Format retrieved metadata for reference
-                    cits = format_citations(hits)
-                    cite_hint = "; ".join(
-                        [f"{c['source']}" + (f" Art. {c['article']}" if c['article'] else "") for c in cits]
-                    )
-
-                    # Compose the LLM prompt with context and user question
-                    prompt = (
-                        f"CONTEXT (policy/law excerpts):\n{context}\n\n"
-                        f"Question: {user_q}\n\n"
-                        "Answer in a warm, professional tone. "
-                        "If you assert a rule, cite it inline like (FILE, Art. X). "
-                        "Do not add a separate 'Citations' section unless asked.\n\n"
-                        f"Source hint: {cite_hint}"
-                    )
-
-                    # Generate the compliance-oriented answer
-                    answer = generate(prompt, temperature=0.2, system=SYSTEM_COMPLIANCE)
-
-
-                    # Optional debug info (shows retrieved chunks)
-                    if debug_retrieval:
-                        st.markdown("##### Retrieved Sources (debug)")
-                        st.code("\n".join([f"- {c['source']}" + (f' — Art. {c['article']}' if c['article'] else '') for c in cits]))
-                    # Optional explicit citations section (if checkbox enabled)
-                    if show_citations_section and cits:
-                        inline_block = "\n".join([f"- {c['source']}" + (f' — Art. {c['article']}' if c['article'] else '') for c in cits])
-                        answer += "\n\n**Citations**\n" + inline_block
-
-            else:
-                # --- General Chat Mode (no RAG) ---
-                cap = answer_capabilities_if_asked(user_q)
-                preface = (cap + "\n\n") if cap else ""
-                answer = generate(preface + user_q, temperature=0.5, system=SYSTEM_GENERAL)
-
-            # Display the LLM’s response
-            st.markdown(answer)
-            st.session_state.messages.append({"role": "assistant", "content": answer})
-
-        # Catch-all error handler for Ollama/connection issues
-        except Exception as e:
-            st.error(str(e))
-            st.info("Tip: check if Ollama is running and if the model in configs/config.yaml matches one in 'ollama list'.")
+                # Keep the full response in the chat history
+                st.session_state.messages.append({"role": "assistant", "content": answer})
+
+            # Catch-all error handler for Ollama/connection issues
+            except Exception as e:
+                st.error(str(e))
+                st.info("Tip: check if Ollama is running and if the model in configs/config.yaml matches one in 'ollama list'.")
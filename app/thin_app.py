@@ -0,0 +1,138 @@
+import sys
+from pathlib import Path
+
+# Ensure ROOT is in sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Thin client: retrieval, generation and news run in the HTTP service
+# (python -m service.app); this script only renders. Nothing heavy is
+# imported, so reruns are cheap and many Streamlit sessions share the
+# service's single index + embedding model.
+import streamlit as st
+from service.client import ServiceClient, ServiceError, SERVICE_URL
+
+
+# Sidebar search scopes -> retriever metadata filters (same as app/app.py)
+SEARCH_SCOPES = {
+    "All documents": None,
+    "Internal policies": {"folder": "policies"},
+    "All laws": {"folder": "laws"},
+    "Brazilian law": {"doc_prefix": "LAW-BR"},
+    "US law": {"doc_prefix": "LAW-US"},
+    "UK law": {"doc_prefix": "LAW-UK"},
+}
+
+st.set_page_config(page_title="AI Compliance Assistant", page_icon="✅", layout="wide")
+st.title("AI Compliance Assistant (Portfolio Prototype)")
+
+
+@st.cache_resource
+def get_service():
+    return ServiceClient()
+
+service = get_service()
+
+
+with st.sidebar:
+    st.header("Settings")
+    st.caption("Service")
+    st.text(SERVICE_URL)
+    try:
+        health = service.health()
+        warmup = health["warmup"] or {}
+        st.text("Retrieval ready" if warmup.get("ready") else f"Warming up: {warmup.get('stage') or 'starting'}")
+        st.text(f"Searches: {health['batcher']['requests']} · mean batch {health['batcher']['mean_batch']}")
+    except Exception as e:
+        st.warning("Service not reachable.")
+        st.caption(f"{e}")
+
+    scope = st.selectbox("Search scope", list(SEARCH_SCOPES), index=0)
+    show_citations_section = st.checkbox("Show separate 'Citations' section", value=False)
+    st.divider()
+
+    # ---- News search panel (served by /news) ----
+    st.caption("News (GDELT)")
+    company = st.text_input("Company to monitor", value="Acme Brewing SA")
+    timespan = st.selectbox("Timespan", ["7d","14d","30d","90d"], index=2)
+    analyze = st.checkbox("Analyze risk", value=False)
+
+    if st.button("Fetch News"):
+        with st.spinner("Searching GDELT..."):
+            try:
+                st.session_state.news = service.news(company, timespan=timespan, score=analyze)
+            except Exception as e:
+                st.error("News search failed.")
+                st.caption(f"{e}")
+                st.session_state.news = {"articles": []}
+
+    result = st.session_state.get("news")
+    if result is not None:
+        if result.get("scored"):
+            st.markdown("### Risk Analysis")
+            for a in result["scored"]:
+                st.markdown(f"- **{a['score']}** · {a['category'] or 'n/a'} — [{a['title']}]({a['url']})")
+        elif result["articles"]:
+            st.success(f"Found {len(result['articles'])} articles")
+            for a in result["articles"]:
+                st.markdown(f"- [{a['title']}]({a['url']}) — *{a['domain']}*, {a.get('seendate','')}")
+        else:
+            st.warning("No articles returned. This can happen if GDELT rate-limits (HTTP 429) or if there are no recent results.")
+
+
+# Main chat interface
+st.subheader("Chat")
+
+if "messages" not in st.session_state:
+    st.session_state.messages = []
+
+for m in st.session_state.messages:
+    with st.chat_message(m["role"]):
+        st.markdown(m["content"])
+
+user_q = st.chat_input("Ask about gifts/conflicts/privacy/suppliers...")
+
+if user_q:
+    with st.chat_message("user"):
+        st.markdown(user_q)
+    st.session_state.messages.append({"role": "user", "content": user_q})
+
+    with st.chat_message("assistant"):
+        meta = {"citations": [], "done": {}}
+
+        def tokens():
+            # Sources/done events are kept aside; only text goes to the page
+            for event in service.answer(user_q, filters=SEARCH_SCOPES[scope]):
+                if event["type"] == "token":
+                    yield event["text"]
+                elif event["type"] == "sources":
+                    meta["citations"] = event["citations"]
+                else:
+                    meta["done"] = event
+
+        try:
+            answer = st.write_stream(tokens())
+            done = meta["done"]
+            if done.get("no_context"):
+                answer = ("I couldn't find a relevant policy excerpt. "
+                          "Try another search scope or rephrase the question.")
+                st.markdown(answer)
+            elif done.get("error"):
+                st.error(done["error"])
+            elif done.get("cached"):
+                st.caption("Answered from cache")
+            elif "ttft_s" in done:
+                st.caption(f"First token in {done['ttft_s']:.2f}s · total {done['total_s']:.1f}s")
+
+            if show_citations_section and meta["citations"]:
+                citations = "\n\n**Citations**\n" + "\n".join(
+                    [f"- {c['source']}" + (f" — Art. {c['article']}" if c['article'] else "") for c in meta["citations"]])
+                st.markdown(citations)
+                answer = (answer or "") + citations
+            st.session_state.messages.append({"role": "assistant", "content": answer or ""})
+        except ServiceError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(str(e))
+            st.info(f"Tip: check that the service is running (python -m service.app) at {SERVICE_URL}.")
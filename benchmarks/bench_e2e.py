@@ -0,0 +1,325 @@
+# bench_e2e.py — end-to-end performance suite with local Ollama/GDELT stand-ins
+#
+# Usage:
+#   python -m benchmarks.bench_e2e [--scales 1000 10000 100000 1000000]
+#       [--encoder hash|model] [--ttft-ms 100] [--token-ms 5] [--tokens 64]
+#       [--json out.json] [--baseline benchmarks/baselines/e2e.json]
+#       [--save-baseline] [--fail-on-regression]
+#
+# For every scale a synthetic corpus is generated from the sentences of
+# data/ (one `## Section` + `Art.` clause per chunk, alternating policies/
+# and laws/ folders), ingested with ingestion.ingest into a temporary
+# directory and served by retrieval.retriever. Measured per scale:
+#   ingest_chunks_per_s              split + embed + FAISS/BM25/metadata write
+#   search_p50/p95/p99_ms, search_qps single cold queries (caches cleared)
+#   batch_qps                        search_many over all queries
+#   answer_ttft_p50/p95_ms           question -> retrieval -> prompt -> first
+#   answer_total_p50/p95_ms          streamed token of the fake Ollama, and
+#                                    full answer
+#   news_p50/p95_ms                  fake GDELT fetch (no cache / rate limit)
+#                                    + risk-analysis generate
+#
+# `--encoder hash` (default) embeds with benchmarks.stubs.HashEncoder so the
+# 1M-chunk run takes minutes; `--encoder model` uses the configured
+# SentenceTransformer (the embedding cache is bypassed either way). Results
+# are compared metric by metric with the baseline of the same scale and
+# encoder; a change worse than --tolerance is reported as a regression.
+
+import os
+import re
+import glob
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+
+from ingestion import ingest
+from retrieval import retriever
+from retrieval.query_cache import TTLCache
+from retrieval.context import SYSTEM_COMPLIANCE, build_rag_prompt
+from models.embedding import get_embedding_model
+from models.llm_client import OllamaClient
+from news import gdelt_search
+from news.rate_limit import TokenBucket
+from benchmarks.bench_splitters import DEFAULT_QUESTIONS
+from benchmarks.stubs import HashEncoder, serve, ollama_handler, gdelt_handler
+
+BASELINE_PATH = 'benchmarks/baselines/e2e.json'
+# Metrics where larger is better; every other *_ms metric is a latency
+HIGHER_IS_BETTER = ('ingest_chunks_per_s', 'search_qps', 'batch_qps')
+_SENTENCE_RE = re.compile(r'(?<=[.;:!?])\s+')
+
+
+def source_sentences(paths):
+
+    """
+    Plain sentences (markdown markers stripped) from the real corpus.
+    """
+
+    sentences = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = re.sub(r'[#>*]|Art\.\s*\d+\S*\s*—?', ' ', line)
+                line = ' '.join(line.split())
+                sentences.extend(s for s in _SENTENCE_RE.split(line) if len(s) > 30)
+    return sentences
+
+def make_corpus(root: str, n_chunks: int, sections_per_file: int = 100, seed: int = 0):
+
+    """
+    Write synthetic markdown files under root/{policies,laws} holding
+    exactly `n_chunks` sections (each one chunk with the structured
+    splitter). Returns the number of files.
+    """
+
+    rng = random.Random(seed)
+    sentences = source_sentences(sorted(glob.glob('data/*/*.md')))
+    for folder in ('policies', 'laws'):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    n_files = -(-n_chunks // sections_per_file)
+    for f in range(n_files):
+        folder, prefix = ('policies', 'POL-SYN') if f % 2 == 0 else ('laws', 'LAW-SYN')
+        doc_id = f'{prefix}-{f:06d}'
+        count = min(sections_per_file, n_chunks - f * sections_per_file)
+        lines = []
+        for s in range(count):
+            body = ' '.join(rng.sample(sentences, 2))
+            lines.append(f'## Section {s + 1} — {doc_id}\n'
+                         f'Art. {s + 1} — {body} Ref {doc_id}-{s + 1}.\n')
+        with open(os.path.join(root, folder, f'{doc_id}.md'), 'w', encoding='utf-8') as fh:
+            fh.write('\n'.join(lines))
+    return n_files
+
+def sample_queries(n: int, seed: int = 1):
+
+    """
+    The labelled questions of bench_splitters plus sentence-fragment queries.
+    """
+
+    rng = random.Random(seed)
+    sentences = source_sentences(sorted(glob.glob('data/*/*.md')))
+    queries = [q for q, _, _ in DEFAULT_QUESTIONS]
+    while len(queries) < n:
+        words = rng.choice(sentences).split()
+        start = rng.randrange(max(1, len(words) - 6))
+        queries.append(' '.join(words[start:start + rng.randint(3, 8)]))
+    return queries[:n]
+
+@contextmanager
+def pointed_at(workdir: str, encoder, workers: int = 0):
+
+    """
+    Point ingestion and the retriever at `workdir` with `encoder`; restores
+    the configured paths and drops loaded indexes on exit.
+    """
+
+    patches = [
+        (ingest, 'DOC_GLOBS', [os.path.join(workdir, 'corpus', '*', '*.md')]),
+        (ingest, 'SNAPSHOT_ROOT', os.path.join(workdir, 'snapshots')),
+        (ingest, 'LEGACY_PATHS', None),
+        (ingest, 'WORKERS', workers),
+        (ingest, 'get_embedding_model', lambda name, **kw: encoder),
+        (ingest, 'with_embedding_cache', lambda model, name, **kw: model),
+        (retriever, 'SNAPSHOT_ROOT', os.path.join(workdir, 'snapshots')),
+        (retriever, 'LEGACY_PATHS', None),
+        (retriever, 'get_embedding_model', lambda name, **kw: encoder),
+        (retriever, 'with_embedding_cache', lambda model, name, **kw: model),
+    ]
+    saved = [(mod, name, getattr(mod, name)) for mod, name, _ in patches]
+
+    def reset():
+        for name in ('_state', '_model'):
+            setattr(retriever, name, None)
+        retriever._vec_cache = TTLCache(retriever.QUERY_CACHE_ENTRIES, retriever.QUERY_CACHE_TTL_S)
+        retriever._hits_cache = TTLCache(retriever.QUERY_CACHE_ENTRIES, retriever.QUERY_CACHE_TTL_S)
+
+    for mod, name, value in patches:
+        setattr(mod, name, value)
+    reset()
+    try:
+        yield
+    finally:
+        for mod, name, value in saved:
+            setattr(mod, name, value)
+        reset()
+
+def _pct(values, p):
+    return round(float(np.percentile(values, p)), 2)
+
+def bench_ingest(workdir: str, n_chunks: int, sections_per_file: int):
+    make_corpus(os.path.join(workdir, 'corpus'), n_chunks, sections_per_file)
+    start = time.perf_counter()
+    ingest.build_index()
+    elapsed = time.perf_counter() - start
+    return {'chunks': n_chunks, 'ingest_s': round(elapsed, 2),
+            'ingest_chunks_per_s': round(n_chunks / elapsed, 1)}
+
+def bench_search(queries, k: int, mode: str = None):
+    retriever.search(queries[0], k=k, mode=mode)   # load index and metadata
+    latencies = []
+    for q in queries:
+        retriever._vec_cache.clear()
+        retriever._hits_cache.clear()
+        t0 = time.perf_counter()
+        retriever.search(q, k=k, mode=mode)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+
+    retriever._vec_cache.clear()
+    retriever._hits_cache.clear()
+    t0 = time.perf_counter()
+    retriever.search_many(queries, k=k, mode=mode)
+    batch_s = time.perf_counter() - t0
+    return {
+        'search_p50_ms': _pct(latencies, 50),
+        'search_p95_ms': _pct(latencies, 95),
+        'search_p99_ms': _pct(latencies, 99),
+        'search_qps': round(1e3 / float(np.mean(latencies)), 1),
+        'batch_qps': round(len(queries) / batch_s, 1),
+    }
+
+def bench_answers(client: OllamaClient, questions, k: int):
+    ttft, total = [], []
+    for q in questions:
+        retriever._vec_cache.clear()
+        retriever._hits_cache.clear()
+        t0 = time.perf_counter()
+        hits = retriever.search(q, k=k)
+        first = None
+        prompt, _, _ = build_rag_prompt(q, hits)
+        for _ in client.generate_stream(prompt, temperature=0.2, system=SYSTEM_COMPLIANCE):
+            if first is None:
+                first = time.perf_counter() - t0
+        ttft.append(first * 1e3)
+        total.append((time.perf_counter() - t0) * 1e3)
+    return {
+        'answer_ttft_p50_ms': _pct(ttft, 50),
+        'answer_ttft_p95_ms': _pct(ttft, 95),
+        'answer_total_p50_ms': _pct(total, 50),
+        'answer_total_p95_ms': _pct(total, 95),
+    }
+
+def bench_news(client: OllamaClient, companies):
+    # The stub is not rate limited and every fetch should reach it
+    unlimited = TokenBucket(1e6, 1e6)
+    latencies = []
+    for company in companies:
+        t0 = time.perf_counter()
+        news = gdelt_search.fetch_articles(gdelt_search.company_query(company), max_articles=10,
+                                           timespan='30d', limiter=unlimited)
+        headlines = '\n'.join(f"- {a['title']} ({a['domain']}) — {a['url']}" for a in news)
+        client.generate(f'Identify reputational risks.\n\nHEADLINES:\n{headlines}', temperature=0.1)
+        latencies.append((time.perf_counter() - t0) * 1e3)
+    return {'news_p50_ms': _pct(latencies, 50), 'news_p95_ms': _pct(latencies, 95)}
+
+def run_scale(n_chunks: int, encoder, client: OllamaClient, args):
+
+    """
+    Ingest, search and answer benchmarks for one corpus size.
+    """
+
+    workdir = tempfile.mkdtemp(prefix=f'bench_e2e_{n_chunks}_')
+    try:
+        with pointed_at(workdir, encoder, workers=args.workers):
+            row = {'scale': n_chunks, 'encoder': args.encoder}
+            row.update(bench_ingest(workdir, n_chunks, args.sections_per_file))
+            queries = sample_queries(args.queries)
+            row.update(bench_search(queries, args.k))
+            row.update(bench_answers(client, queries[:args.answers], args.k))
+            row.update(bench_news(client, [f'Company {i}' for i in range(args.news)]))
+            return row
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(results, baseline, tolerance: float = 0.25):
+
+    """
+    Metric-by-metric comparison with baseline rows of the same scale/encoder.
+
+    Returns:
+        List[dict]: scale, metric, baseline, current, change (relative,
+        positive = better) and regression (change < -tolerance).
+    """
+
+    base = {(r['scale'], r['encoder']): r for r in baseline}
+    rows = []
+    for r in results:
+        ref = base.get((r['scale'], r['encoder']))
+        if ref is None:
+            continue
+        for metric, value in r.items():
+            if not (metric.endswith('_ms') or metric in HIGHER_IS_BETTER) or not ref.get(metric):
+                continue
+            change = value / ref[metric] - 1 if metric in HIGHER_IS_BETTER else ref[metric] / value - 1
+            rows.append({'scale': r['scale'], 'metric': metric, 'baseline': ref[metric],
+                         'current': value, 'change': round(change, 3),
+                         'regression': change < -tolerance})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end ingestion, search and answer benchmarks.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--encoder', choices=['hash', 'model'], default='hash')
+    parser.add_argument('--k', type=int, default=retriever.TOP_K)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--answers', type=int, default=20)
+    parser.add_argument('--news', type=int, default=10)
+    parser.add_argument('--sections-per-file', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--ttft-ms', type=float, default=100)
+    parser.add_argument('--token-ms', type=float, default=5)
+    parser.add_argument('--tokens', type=int, default=64)
+    parser.add_argument('--gdelt-ms', type=float, default=50)
+    parser.add_argument('--json', help='also write results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--save-baseline', action='store_true', help='overwrite --baseline with these results')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    encoder = HashEncoder() if args.encoder == 'hash' else get_embedding_model(ingest.EMB_MODEL)
+    ollama = ollama_handler(args.ttft_ms / 1000, args.token_ms / 1000, args.tokens)
+    with serve(ollama) as ollama_url, serve(gdelt_handler(args.gdelt_ms / 1000)) as gdelt_url:
+        gdelt_search.GDELT_ENDPOINT = gdelt_url + '/api/v2/doc/doc'
+        client = OllamaClient(host=ollama_url)
+        results = [run_scale(n, encoder, client, args) for n in args.scales]
+        client.close()
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>20}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>20}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline saved -> {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        rows = compare(results, json.load(f), args.tolerance)
+    if not rows:
+        print(f'No baseline rows for these scales/encoder in {args.baseline}')
+        return
+    print(f'\nvs {args.baseline} (tolerance {args.tolerance:.0%})')
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        print(f"{r['scale']:>9}  {r['metric']:<22} {r['baseline']!s:>10} -> {r['current']!s:<10} "
+              f"{r['change']:+.1%}{flag}")
+    if args.fail_on_regression and any(r['regression'] for r in rows):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# bench_embedding_backends.py — throughput, memory and parity per embedding backend
+#
+# Usage:
+#   python -m benchmarks.bench_embedding_backends [--backends torch torch_int8 onnx] [--model PATH]
+#
+# Each backend runs in its own interpreter so resident memory is not shared.
+# Reported per backend:
+#   load_s        model load (+ one-time ONNX export on first run)
+#   rss_mb        resident set size after loading and encoding
+#   q_per_s       single-query encodes per second (the chat pattern)
+#   batch_per_s   texts per second when encoding chunks in batches of 64
+#   min_cos / mean_cos   cosine vs the fp32 torch vectors of the same texts
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+from benchmarks.bench_splitters import DEFAULT_QUESTIONS
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _texts():
+    from ingestion.ingest import load_documents, SPLITTER
+    from ingestion.splitters import split_document
+    queries = [q for q, _, _ in DEFAULT_QUESTIONS]
+    chunks = [c['text'] for d in load_documents() for c in split_document(d['text'], SPLITTER)]
+    return queries, chunks
+
+def child(backend, model, onnx_dir, out):
+    from models.embedding import get_embedding_model
+    queries, chunks = _texts()
+
+    t0 = time.perf_counter()
+    enc = get_embedding_model(model, backend=backend, onnx_dir=onnx_dir)
+    load_s = time.perf_counter() - t0
+    enc.encode(queries[:1], normalize_embeddings=True)
+
+    rounds = 20
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries:
+            enc.encode([q], normalize_embeddings=True)
+    q_per_s = rounds * len(queries) / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    vecs = enc.encode(queries + chunks, batch_size=64, normalize_embeddings=True)
+    batch_per_s = len(queries + chunks) / (time.perf_counter() - t0)
+
+    np.save(out, np.asarray(vecs, dtype='float32'))
+    print(json.dumps({'backend': backend, 'load_s': round(load_s, 2), 'rss_mb': round(_rss_mb(), 1),
+                      'q_per_s': round(q_per_s, 1), 'batch_per_s': round(batch_per_s, 1)}))
+
+def main():
+    from retrieval.retriever import EMB_MODEL, ONNX_DIR
+    parser = argparse.ArgumentParser(description='Compare embedding backends on CPU.')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch_int8', 'onnx'])
+    parser.add_argument('--model', default=EMB_MODEL)
+    parser.add_argument('--onnx-dir', default=ONNX_DIR)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.model, args.onnx_dir, args.out)
+
+    backends = ['torch'] + [b for b in args.backends if b != 'torch']
+    results, vecs = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out = os.path.join(tmp, f'{backend}.npy')
+            proc = subprocess.run([sys.executable, '-m', 'benchmarks.bench_embedding_backends',
+                                   '--child', backend, '--model', args.model,
+                                   '--onnx-dir', args.onnx_dir, '--out', out],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f'{backend}: failed\n{proc.stderr.strip().splitlines()[-1]}', file=sys.stderr)
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            vecs[backend] = np.load(out)
+            if 'torch' in vecs:
+                cos = (vecs['torch'] * vecs[backend]).sum(axis=1)
+                row.update(min_cos=round(float(cos.min()), 5), mean_cos=round(float(cos.mean()), 5))
+            results.append(row)
+
+    if not results:
+        sys.exit('no backend could be benchmarked')
+    cols = list(results[0])
+    print('  '.join(f'{c:>12}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r.get(c, "")!s:>12}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
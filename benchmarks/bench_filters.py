@@ -0,0 +1,141 @@
+# bench_filters.py — latency of metadata-filtered vs unfiltered search
+#
+# Usage:
+#   python -m benchmarks.bench_filters --n 100000 --queries 300 --k 4 [--types flat hnsw]
+#
+# Synthetic vectors are spread over fake policy/law documents (50% POL-*,
+# 10% LAW-BR-*, ...) with article numbers, stored in a MetaStore. For each
+# index type and filter the table shows:
+#   selectivity      share of rows the filter keeps
+#   p50_ms / p99_ms  single-query search latency, as the retriever runs it:
+#                    exact scoring of the subset when at most
+#                    retrieval.filter_exact_max rows match, else a flat
+#                    sub-index for folder / doc_prefix scopes of a flat index
+#                    (retrieval.filter_partitions), else the FAISS ID selector
+#   path             which of exact / partition / selector ran
+#   hits             mean hits returned (k whenever enough rows match)
+#   post_hits        mean hits left when the unfiltered top-k is filtered
+#                    afterwards instead (what the selector avoids)
+#   select_ms        one-off cost of building the id set and subset or
+#                    sub-index (cached per index version in the retriever)
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import faiss
+import numpy as np
+
+from retrieval.index_types import (INDEX_CFG, INDEX_TYPES, build_faiss_index, partition_index, search_params,
+                                   subset_vectors)
+from retrieval.retriever import FILTER_EXACT_MAX, FILTER_PARTITIONS, PARTITION_KEYS, _exact_search
+from retrieval.metastore import MetaStore, write_store
+from benchmarks.bench_index_types import synthetic_vectors
+
+# (folder, prefix, share of rows)
+DOC_GROUPS = [
+    ('policies', 'POL-', 0.50),
+    ('laws', 'LAW-BR-', 0.10),
+    ('laws', 'LAW-US-', 0.20),
+    ('laws', 'LAW-UK-', 0.20),
+]
+
+FILTERS = [
+    ('none', None),
+    ('folder=policies', {'folder': 'policies'}),
+    ('prefix=LAW-BR', {'doc_prefix': 'LAW-BR'}),
+    ('prefix=LAW-BR,art=5', {'doc_prefix': 'LAW-BR', 'article': '5'}),
+]
+
+
+def synthetic_store(path: str, n: int, seed: int = 0, docs_per_group: int = 20):
+    rng = np.random.default_rng(seed)
+    group = rng.choice(len(DOC_GROUPS), size=n, p=[g[2] for g in DOC_GROUPS])
+    doc = rng.integers(0, docs_per_group, n)
+    article = rng.integers(1, 41, n)
+    write_store(path, (
+        {'id': i, 'doc_path': f'data/{DOC_GROUPS[g][0]}/{DOC_GROUPS[g][1]}{d:03d}.md',
+         'chunk_id': i, 'text': '', 'article': str(a)}
+        for i, (g, d, a) in enumerate(zip(group, doc, article))
+    ))
+    return MetaStore(path)
+
+def bench_one(index, store, queries, k, name, filters):
+    params, allowed, sub, part, select_ms = None, None, None, None, 0.0
+    if filters:
+        t0 = time.perf_counter()
+        allowed = store.select_ids(**filters)
+        sel = faiss.IDSelectorBatch(allowed)
+        if len(allowed) <= FILTER_EXACT_MAX:
+            sub = subset_vectors(index, allowed)
+        elif FILTER_PARTITIONS and set(filters) <= set(PARTITION_KEYS):
+            part = partition_index(index, allowed)
+        select_ms = (time.perf_counter() - t0) * 1000
+
+    lat, hits, post_hits = [], [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        if sub is not None:
+            _, idx = _exact_search(q[None, :], sub, allowed, k)
+        elif part is not None:
+            _, idx = part.search(q[None, :], k)
+        else:
+            if filters:
+                params = search_params(index, sel)
+            _, idx = index.search(q[None, :], k, params=params)
+        lat.append(time.perf_counter() - t0)
+        hits.append(int((idx[0] != -1).sum()))
+        if filters:
+            _, plain = index.search(q[None, :], k)
+            post_hits.append(int(np.isin(plain[0], allowed).sum()))
+
+    lat_ms = np.array(lat) * 1000
+    return {
+        'filter': name,
+        'selectivity': round(len(allowed) / len(store), 4) if filters else 1.0,
+        'path': 'exact' if sub is not None else 'partition' if part is not None else
+                'selector' if filters else '-',
+        'p50_ms': round(float(np.percentile(lat_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(lat_ms, 99)), 3),
+        'hits': round(float(np.mean(hits)), 2),
+        'post_hits': round(float(np.mean(post_hits)), 2) if filters else k,
+        'select_ms': round(select_ms, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metadata-filtered FAISS search.')
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--types', nargs='+', default=['flat', INDEX_CFG.get('type', 'flat')],
+                        choices=INDEX_TYPES)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    mat = synthetic_vectors(args.n, args.dim)
+    queries = synthetic_vectors(args.queries, args.dim, seed=1)
+    tmp = tempfile.mkdtemp()
+    try:
+        store = synthetic_store(os.path.join(tmp, 'meta'), args.n)
+        results = []
+        for kind in dict.fromkeys(args.types):
+            index = build_faiss_index(mat, np.arange(args.n, dtype='int64'), dict(INDEX_CFG, type=kind))
+            for name, filters in FILTERS:
+                results.append({'type': kind, **bench_one(index, store, queries, args.k, name, filters)})
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>20}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>20}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
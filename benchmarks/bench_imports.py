@@ -0,0 +1,71 @@
+# bench_imports.py — import-time profile of the modules the app loads
+#
+# Usage:
+#   python -m benchmarks.bench_imports [--json out.json]
+#
+# Each module is imported in a fresh interpreter with `-X importtime`.
+# Reported per module: cumulative import time, whether torch /
+# sentence-transformers / faiss were pulled in, and its slowest direct
+# dependencies. The last row imports
+# sentence-transformers on its own: the cost every app start paid before
+# the embedding model import became lazy (it now moves to the warm-up thread).
+
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+MODULES = [
+    'news.gdelt_search',
+    'models.llm_client',
+    'retrieval.response_cache',
+    'retrieval.retriever',
+    'retrieval.warmup',
+]
+HEAVY = ('torch', 'sentence_transformers', 'faiss')
+
+_LINE_RE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile(module: str):
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY!r} if m in sys.modules))'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True)
+    total_us, deps = 0, []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        depth = (len(m.group(3)) - 1) // 2
+        if depth == 0:
+            total_us += int(m.group(2))
+        elif depth == 1:
+            deps.append((int(m.group(2)), m.group(4)))
+    deps.sort(reverse=True)
+    loaded = proc.stdout.strip().split(',') if proc.stdout.strip() else []
+    return {
+        'module': module,
+        'import_ms': round(total_us / 1000, 1),
+        **{h: h in loaded for h in HEAVY},
+        'slowest': ', '.join(f'{name} {us / 1000:.0f}ms' for us, name in deps[:3]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time profile of app modules.')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    results = [profile(m) for m in MODULES + ['sentence_transformers']]
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>24}' for c in cols[:-1]) + '  slowest')
+    for r in results:
+        print('  '.join(f'{r[c]!s:>24}' for c in cols[:-1]) + f"  {r['slowest']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# bench_index_types.py — recall / latency / memory of each FAISS index type
+#
+# Usage:
+#   python -m benchmarks.bench_index_types --n 100000 --queries 500 --k 10
+#   python -m benchmarks.bench_index_types --from-index retrieval/vectordb/snapshots/<version>/faiss_index
+#
+# Recall@k is measured against the exact Flat index on the same vectors.
+# Settings for each type come from `retrieval.index` in config.yaml, with the
+# `type` overridden per run.
+
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+
+from retrieval.index_types import INDEX_CFG, INDEX_TYPES, build_faiss_index
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0, clusters: int = 256):
+
+    """
+    Clustered, L2-normalized vectors (closer to real embeddings than pure noise).
+    """
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype('float32')
+    mat = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype('float32')
+    faiss.normalize_L2(mat)
+    return mat
+
+def vectors_from_index(path: str):
+    index = faiss.read_index(path)
+    if isinstance(index, faiss.IndexIDMap2):
+        ids = faiss.vector_to_array(index.id_map)
+        return np.vstack([index.reconstruct(int(i)) for i in ids])
+    return index.reconstruct_n(0, index.ntotal)
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+def bench_one(kind: str, mat, queries, truth, k: int):
+    cfg = dict(INDEX_CFG, type=kind)
+    t0 = time.perf_counter()
+    index = build_faiss_index(mat, np.arange(len(mat), dtype='int64'), cfg)
+    build_s = time.perf_counter() - t0
+
+    # Single-query latency, the pattern the chat app produces
+    lat = []
+    found = np.empty((len(queries), k), dtype='int64')
+    for i, q in enumerate(queries):
+        t0 = time.perf_counter()
+        _, idx = index.search(q[None, :], k)
+        lat.append(time.perf_counter() - t0)
+        found[i] = idx[0]
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    lat_ms = np.array(lat) * 1000
+    return {
+        'type': kind,
+        'build_s': round(build_s, 3),
+        f'recall@{k}': round(float(recall), 4),
+        'p50_ms': round(float(np.percentile(lat_ms, 50)), 4),
+        'p99_ms': round(float(np.percentile(lat_ms, 99)), 4),
+        'index_mb': round(index_bytes(index) / 2**20, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall/latency/memory per FAISS index type.')
+    parser.add_argument('--n', type=int, default=50_000, help='synthetic corpus size')
+    parser.add_argument('--dim', type=int, default=384, help='synthetic embedding dim (MiniLM = 384)')
+    parser.add_argument('--from-index', help='benchmark on vectors of an existing faiss_index')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--types', nargs='+', default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    mat = vectors_from_index(args.from_index) if args.from_index else synthetic_vectors(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = mat[rng.integers(0, len(mat), args.queries)] + 0.05 * rng.standard_normal(
+        (args.queries, mat.shape[1])).astype('float32')
+    faiss.normalize_L2(queries)
+    k = min(args.k, len(mat))
+
+    flat = faiss.IndexFlatIP(mat.shape[1])
+    flat.add(mat)
+    _, truth = flat.search(queries, k)
+
+    results = [bench_one(kind, mat, queries, truth, k) for kind in args.types]
+
+    cols = list(results[0])
+    print(f'n={len(mat)} dim={mat.shape[1]} queries={len(queries)}')
+    print('  '.join(f'{c:>12}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>12}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'n': len(mat), 'dim': int(mat.shape[1]), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# bench_lexical.py — BM25 inverted index build time and query latency
+#
+# Usage:
+#   python -m benchmarks.bench_lexical [--n 100000] [--vocab 20000] [--queries 1000]
+#       [--max-depth 512]
+#
+# Synthetic chunks draw words from a Zipf-like vocabulary (so a few terms
+# have very long posting lists, as in real text). Reported: build seconds,
+# on-disk size and p50/p99 query latency for 1- and 3-term queries, the
+# same for exhaustive scoring (whole posting lists, term lookup not
+# timed), the share of queries
+# whose top-k stopped at --max-depth (approx_pct) and, over those, the
+# lowest ratio of top-k score sum to the exact one (min_score_ratio).
+
+import os
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+from retrieval.lexical import LexicalIndex, write_lexical, tokenize
+
+
+def _dir_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the BM25 inverted index.')
+    parser.add_argument('--n', type=int, default=100_000, help='chunks')
+    parser.add_argument('--vocab', type=int, default=20_000)
+    parser.add_argument('--words', type=int, default=120, help='words per chunk')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--max-depth', type=int, default=512)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocab = np.array([f't{i}' for i in range(args.vocab)])
+    draw = lambda size: np.minimum(rng.zipf(1.3, size) - 1, args.vocab - 1)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'lexical')
+        start = time.perf_counter()
+        write_lexical(path, ({'id': i, 'text': ' '.join(vocab[draw(args.words)])} for i in range(args.n)))
+        build_s = time.perf_counter() - start
+        index = LexicalIndex(path, max_depth=args.max_depth)
+
+        results = []
+        for terms in (1, 3):
+            queries = [' '.join(vocab[draw(terms)]) for _ in range(args.queries)]
+            lat, full_lat, ratios = [], [], []
+            for q in queries:
+                t0 = time.perf_counter()
+                scores, _ = index.search(q, args.k)
+                lat.append(time.perf_counter() - t0)
+                ids = {index.term_id(t) for t in tokenize(q)} - {None}
+                t0 = time.perf_counter()
+                exact = index._search_exhaustive(ids, args.k, None)[0] if ids else scores
+                full_lat.append(time.perf_counter() - t0)
+                if exact.sum() > 0 and scores.sum() < exact.sum() * (1 - 1e-6):
+                    ratios.append(float(scores.sum() / exact.sum()))
+            ms = lambda values, q: round(float(np.percentile(values, q)) * 1e3, 3)
+            results.append({
+                'query_terms': terms,
+                'p50_ms': ms(lat, 50),
+                'p99_ms': ms(lat, 99),
+                'full_p50_ms': ms(full_lat, 50),
+                'full_p99_ms': ms(full_lat, 99),
+                'approx_pct': round(100 * len(ratios) / len(queries), 1),
+                'min_score_ratio': round(min(ratios, default=1.0), 3),
+                'build_s': round(build_s, 1),
+                'disk_mb': round(_dir_mb(path), 1),
+            })
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>12}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>12}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+# bench_memory.py — memory per retriever process with 1, 4 and 8 workers
+#
+# Usage:
+#   python -m benchmarks.bench_memory [--workers 1 4 8] [--chunks 100000]
+#       [--encoder hash|model] [--modes private mmap mmap+server] [--json out.json]
+#       [--traces spans.jsonl]
+#
+# A synthetic corpus (bench_e2e.make_corpus) is ingested once, with the
+# vectors.npy sidecar needed for memory-mapped flat serving. For every mode
+# and worker count, N worker processes load the index and run the same
+# hybrid searches (so every page of vectors and postings is touched), then
+# wait while their memory is read from /proc/<pid>/smaps_rollup:
+#   rss_mb   resident set per worker (shared file pages count in full)
+#   pss_mb   proportional share: shared pages divided among the processes
+#   uss_mb   private pages only — what one more worker costs
+#   total_mb sum of PSS over workers (+ the embedding server), i.e. the
+#            host memory the whole group needs
+# Modes:
+#   private      faiss.read_index + model per process (the default setup)
+#   mmap         retrieval.shared_memory.mmap: index mapped read-only
+#   mmap+server  mmap, and query vectors from one models.embedding_server
+#
+# `--encoder hash` (default) stands in benchmarks.stubs.HashEncoder, so only
+# index memory differs between modes; `--encoder model` loads the
+# configured SentenceTransformer, where the server mode also saves one
+# model + torch per worker. Without /proc (non-Linux) only the peak RSS
+# each worker reports itself is shown. Child processes do not write
+# telemetry spans unless --traces names a file for them.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+
+from ingestion import ingest
+from retrieval import retriever
+from telemetry import tracing
+from models.embedding import get_embedding_model
+from benchmarks.bench_e2e import make_corpus, pointed_at, sample_queries
+from benchmarks.stubs import HashEncoder
+
+MODES = ('private', 'mmap', 'mmap+server')
+
+
+def _encoder(name: str):
+    return HashEncoder() if name == 'hash' else get_embedding_model(ingest.EMB_MODEL)
+
+def read_memory(pid: int):
+
+    """
+    {'rss_mb', 'pss_mb', 'uss_mb'} of a running process from
+    /proc/<pid>/smaps_rollup, or None where it is not available.
+    """
+
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.endswith('kB\n')}
+    except OSError:
+        return None
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss_mb': fields.get('Rss', 0) / 1024, 'pss_mb': fields.get('Pss', 0) / 1024,
+            'uss_mb': private / 1024}
+
+def _spawn(*args, traces: str = None):
+    return subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_memory', *args,
+                             *(['--traces', traces] if traces else [])],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+def _configure_tracing(args):
+    # Children trace only into an explicit file, never the configured logs/
+    if args.traces:
+        tracing.configure(path=args.traces, enabled=True)
+    else:
+        tracing.configure(enabled=False)
+
+def _wait_ready(proc):
+    line = proc.stdout.readline()
+    if not line:
+        raise RuntimeError(f'bench_memory child {proc.pid} exited with {proc.wait()}')
+    return json.loads(line)
+
+def _stop(procs):
+    for proc in procs:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+    for proc in procs:
+        proc.wait(timeout=60)
+
+def run_mode(workdir: str, mode: str, n_workers: int, args):
+
+    """
+    Start `n_workers` workers in `mode`, measure them once all are ready.
+    """
+
+    procs, server, address = [], None, None
+    try:
+        if mode == 'mmap+server':
+            address = os.path.join(workdir, 'embed.sock')
+            server = _spawn('--serve', address, '--encoder', args.encoder, traces=args.traces)
+            _wait_ready(server)
+        for _ in range(n_workers):
+            procs.append(_spawn('--worker', workdir, '--mode', mode, '--encoder', args.encoder,
+                                '--queries', str(args.queries), *(['--server', address] if address else []),
+                                traces=args.traces))
+        reports = [_wait_ready(p) for p in procs]
+
+        mem = [read_memory(p.pid) for p in procs]
+        server_mem = read_memory(server.pid) if server is not None else None
+        row = {'mode': mode, 'workers': n_workers,
+               'search_ms': round(sum(r['search_ms'] for r in reports) / len(reports), 2)}
+        if all(mem):
+            for key in ('rss_mb', 'pss_mb', 'uss_mb'):
+                row[key] = round(sum(m[key] for m in mem) / len(mem), 1)
+            row['server_pss_mb'] = round(server_mem['pss_mb'], 1) if server_mem else 0.0
+            row['total_mb'] = round(sum(m['pss_mb'] for m in mem) + row['server_pss_mb'], 1)
+        else:
+            row['peak_rss_mb'] = round(sum(r['peak_rss_mb'] for r in reports) / len(reports), 1)
+        return row
+    finally:
+        _stop(procs + ([server] if server is not None else []))
+
+def run(workdir: str, args):
+
+    """
+    Ingest the corpus into `workdir`, then measure every mode / worker count.
+    """
+
+    with pointed_at(workdir, _encoder(args.encoder)):
+        make_corpus(os.path.join(workdir, 'corpus'), args.chunks)
+        saved = ingest.MMAP_INDEX
+        ingest.MMAP_INDEX = True
+        try:
+            ingest.build_index()
+        finally:
+            ingest.MMAP_INDEX = saved
+    return [run_mode(workdir, mode, n, args) for mode in args.modes for n in args.workers]
+
+def worker(args):
+
+    """
+    Child process: load the index in `args.mode`, search, report, then wait
+    for stdin to close (the parent measures memory in between).
+    """
+
+    retriever.SNAPSHOT_ROOT = os.path.join(args.worker, 'snapshots')
+    retriever.LEGACY_PATHS = None
+    retriever.MMAP_INDEX = args.mode != 'private'
+    retriever.EMBEDDING_SERVER = args.server
+    if args.encoder == 'hash':
+        retriever.get_embedding_model = lambda name, **kw: HashEncoder()
+    retriever.with_embedding_cache = lambda model, name, **kw: model
+
+    queries = sample_queries(args.queries)
+    retriever.warm_up()
+    start = time.perf_counter()
+    retriever.search_many(queries, k=retriever.TOP_K, mode='hybrid')
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'search_ms': elapsed * 1000 / len(queries), 'peak_rss_mb': peak_kb / 1024}), flush=True)
+    sys.stdin.read()
+
+def serve(args):
+
+    """
+    Child process: embedding server for the mmap+server mode.
+    """
+
+    from models.embedding_server import make_server
+
+    server = make_server(_encoder(args.encoder), args.serve)
+    print(json.dumps({'address': args.serve}), flush=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sys.stdin.read()
+    server.shutdown()
+    server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory per retriever worker process.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--chunks', type=int, default=100_000)
+    parser.add_argument('--encoder', choices=['hash', 'model'], default='hash')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--json', help='also write results to this file')
+    parser.add_argument('--traces', help='telemetry spans of the child processes (default: not written)')
+    # Child process roles (internal)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker or args.serve:
+        _configure_tracing(args)
+        return worker(args) if args.worker else serve(args)
+
+    workdir = tempfile.mkdtemp(prefix='bench_memory_')
+    try:
+        results = run(workdir, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    cols = list(dict.fromkeys(c for r in results for c in r))
+    print('  '.join(f'{c:>14}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r.get(c, "")!s:>14}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# bench_rerank.py — does the cross-encoder stage pay for itself?
+#
+# Usage:
+#   python -m benchmarks.bench_rerank [--k 4] [--wide-k 10] [--candidates 50]
+#
+# Runs the labelled questions of bench_splitters against the built index
+# (python -m ingestion.ingest first) in three configurations:
+#   first-stage@k       plain search, k hits
+#   first-stage@wide_k  plain search with a larger k (recall via longer prompts)
+#   rerank@k            `candidates` first-stage hits rescored, best k kept
+# and reports hit@k, mean prompt tokens of the retrieved context and mean
+# retrieve / rerank latency per question.
+
+import json
+import argparse
+import numpy as np
+
+from retrieval import retriever
+from benchmarks.bench_splitters import _load_questions, _holds_clause
+from ingestion.splitters import make_token_counter
+
+
+def bench(name, questions, k, rerank, count_tokens):
+    found, tokens, retrieve_ms, rerank_ms, fallbacks = 0, [], [], [], 0
+    for question, doc_id, article in questions:
+        timings = {}
+        # Bypass the result cache so every configuration is timed cold
+        retriever._hits_cache.clear()
+        hits = retriever.search(question, k=k, rerank=rerank, timings=timings)
+        found += any(_holds_clause(h, doc_id, article) for h in hits)
+        tokens.append(sum(count_tokens(h['text']) for h in hits))
+        retrieve_ms.append(timings['retrieve_s'] * 1e3)
+        rerank_ms.append(timings['rerank_s'] * 1e3)
+        fallbacks += timings['rerank_fallbacks']
+    return {
+        'config': name,
+        'hit': round(found / len(questions), 3),
+        'prompt_tokens': round(float(np.mean(tokens)), 1),
+        'retrieve_ms': round(float(np.mean(retrieve_ms)), 2),
+        'rerank_ms': round(float(np.mean(rerank_ms)), 2),
+        'fallbacks': fallbacks,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare first-stage retrieval with cross-encoder reranking.')
+    parser.add_argument('--k', type=int, default=retriever.TOP_K)
+    parser.add_argument('--wide-k', type=int, default=10)
+    parser.add_argument('--candidates', type=int, default=retriever.RERANK_CANDIDATES)
+    parser.add_argument('--budget-ms', type=float, default=retriever.RERANK_BUDGET_S * 1000)
+    parser.add_argument('--questions', help='JSONL with question, doc, article fields')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    retriever.RERANK_CANDIDATES = args.candidates
+    retriever.RERANK_BUDGET_S = args.budget_ms / 1000
+    questions = _load_questions(args.questions)
+    retriever.search(questions[0][0], rerank=True)   # load index, embedder, cross-encoder
+    count_tokens = make_token_counter(retriever._model)
+
+    results = [
+        bench(f'first-stage@{args.k}', questions, args.k, False, count_tokens),
+        bench(f'first-stage@{args.wide_k}', questions, args.wide_k, False, count_tokens),
+        bench(f'rerank{args.candidates}@{args.k}', questions, args.k, True, count_tokens),
+    ]
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>16}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>16}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# bench_splitters.py — character splitter vs structure-aware splitter on data/
+#
+# Usage:
+#   python -m benchmarks.bench_splitters [--k 4] [--questions qa.jsonl]
+#
+# For each strategy the corpus is split, embedded (through the embedding
+# cache) and searched with a small labelled question set. Reported per
+# strategy:
+#   chunks            number of chunks produced
+#   avg_chunk_tokens  mean tokens per chunk (embedding tokenizer)
+#   avg_prompt_tokens mean tokens of the top-k context sent to the LLM
+#   hit@k             share of questions whose expected clause is retrieved
+#   avg_rank          mean rank of the first chunk holding the clause
+#                     (i.e. hits needed to cover it; misses count as k+1)
+
+import re
+import json
+import argparse
+import faiss
+import numpy as np
+
+from ingestion.ingest import load_documents, embed_chunks, EMB_MODEL, SPLITTER
+from ingestion.splitters import split_document, make_token_counter
+from models.embedding import get_embedding_model, with_embedding_cache
+
+# (question, document id, article number)
+DEFAULT_QUESTIONS = [
+    ('Can I accept a gift card from a supplier?', 'POL-ABAC-002', '12'),
+    ('What is the maximum value of a gift I may keep?', 'POL-ABAC-002', '12'),
+    ('Can procurement staff accept hospitality during a tender?', 'POL-ABAC-002', '13'),
+    ('Do political donations need approval?', 'POL-ABAC-002', '14'),
+    ('How do I disclose a conflict of interest?', 'POL-COC-001', '3'),
+    ('Are facilitation payments allowed?', 'POL-COC-001', '6'),
+    ('Can I report a concern anonymously?', 'POL-SUP-004', '31'),
+    ('Will I be protected from retaliation if I report?', 'POL-SUP-004', '32'),
+]
+
+
+def _load_questions(path):
+    if not path:
+        return DEFAULT_QUESTIONS
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(r['question'], r['doc'], str(r['article'])) for r in map(json.loads, f) if r]
+
+def _holds_clause(chunk, doc_id, article):
+    return doc_id in chunk['doc_path'] and re.search(rf'Art\.\s*{article}\b', chunk['text'])
+
+def bench(name, settings, docs, model, count_tokens, questions, k):
+    chunks = []
+    for doc in docs:
+        for c in split_document(doc['text'], settings, count_tokens=count_tokens):
+            chunks.append({'doc_path': doc['path'], **c})
+    mat = embed_chunks(model, [c['text'] for c in chunks])
+    index = faiss.IndexFlatIP(mat.shape[1])
+    index.add(mat)
+
+    qmat = np.asarray(model.encode([q for q, _, _ in questions], normalize_embeddings=True), dtype='float32')
+    _, idxs = index.search(qmat, k)
+
+    prompt_tokens, ranks, found = [], [], 0
+    for (_, doc_id, article), row in zip(questions, idxs):
+        hits = [chunks[i] for i in row if i != -1]
+        prompt_tokens.append(sum(count_tokens(h['text']) for h in hits))
+        rank = next((r + 1 for r, h in enumerate(hits) if _holds_clause(h, doc_id, article)), k + 1)
+        found += rank <= k
+        ranks.append(rank)
+
+    return {
+        'splitter': name,
+        'chunks': len(chunks),
+        'avg_chunk_tokens': round(float(np.mean([count_tokens(c['text']) for c in chunks])), 1),
+        'avg_prompt_tokens': round(float(np.mean(prompt_tokens)), 1),
+        f'hit@{k}': round(found / len(questions), 3),
+        'avg_rank': round(float(np.mean(ranks)), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare chunking strategies on data/.')
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--questions', help='JSONL with question, doc, article fields')
+    parser.add_argument('--max-tokens', type=int, default=int(SPLITTER.get('max_tokens', 200)))
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    model = with_embedding_cache(get_embedding_model(EMB_MODEL), EMB_MODEL)
+    count_tokens = make_token_counter(model)
+    docs = load_documents()
+    questions = _load_questions(args.questions)
+
+    strategies = [
+        ('chars-1200/150', {'mode': 'chars', 'max_chars': 1200, 'overlap': 150}),
+        (f'structured-{args.max_tokens}', {'mode': 'structured', 'max_tokens': args.max_tokens}),
+    ]
+    results = [bench(name, cfg, docs, model, count_tokens, questions, args.k) for name, cfg in strategies]
+
+    cols = list(results[0])
+    print('  '.join(f'{c:>18}' for c in cols))
+    for r in results:
+        print('  '.join(f'{r[c]!s:>18}' for c in cols))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# stubs.py — local stand-ins for Ollama, GDELT and the embedding model
+#
+#   OllamaStub   POST /api/generate like Ollama: JSON, or chunked NDJSON when
+#                streaming, with a configurable time to first token, per-token
+#                delay and answer length; final object carries
+#                prompt_eval_count / eval_count / eval_duration; `respond`
+#                turns the prompt into the answer text (e.g. risk_reply)
+#   GdeltStub    GET /api/v2/doc/doc?mode=ArtList&format=json with a fixed
+#                latency and an optional share of HTTP 429 replies
+#                (with Retry-After); queries seen are recorded
+#   HashEncoder  deterministic bag-of-words feature hashing with the
+#                SentenceTransformer `encode` signature, so ingestion and
+#                search can be benchmarked at 1M chunks without a model
+#
+#   with serve(ollama_handler(ttft_s=0.2, token_s=0.01)) as url: ...
+
+import re
+import json
+import time
+import zlib
+import random
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, ctype, data, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class OllamaStub(_Handler):
+
+    """
+    Fake Ollama `/api/generate`. Class attributes (set via ollama_handler):
+        ttft_s:  delay before the first token (prompt evaluation).
+        token_s: delay between tokens (decode speed).
+        tokens:  answer length in tokens.
+        respond: optional callable prompt -> answer text (replaces the
+                 `tokens` filler words).
+    """
+
+    ttft_s = 0.1
+    token_s = 0.005
+    tokens = 64
+    respond = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        respond = type(self).respond
+        if respond is not None:
+            words = re.findall(r'\S+\s*', respond(body['prompt']))
+        else:
+            words = [f'w{i} ' for i in range(self.tokens)]
+        done = {
+            'done': True,
+            'prompt_eval_count': len(body['prompt'].split()),
+            'eval_count': len(words),
+            'eval_duration': int(self.token_s * len(words) * 1e9),
+        }
+        if not body.get('stream', True):
+            time.sleep(self.ttft_s + self.token_s * len(words))
+            return self._send(200, 'application/json', json.dumps({'response': ''.join(words), **done}).encode())
+
+        # Like Ollama: chunked transfer encoding, one NDJSON object per chunk
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        time.sleep(self.ttft_s)
+        for i, w in enumerate(words):
+            if i:
+                time.sleep(self.token_s)
+            self._chunk(json.dumps({'response': w, 'done': False}).encode() + b'\n')
+        self._chunk(json.dumps({'response': '', **done}).encode() + b'\n')
+        self._chunk(b'')
+
+    def _chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+
+class GdeltStub(_Handler):
+
+    """
+    Fake GDELT DOC 2.0 ArtList endpoint. Class attributes:
+        latency_s:     delay per request.
+        rate_limit:    share of requests answered with HTTP 429.
+        retry_after_s: Retry-After sent with a 429.
+        unavailable:   share of requests answered with HTTP 503.
+        queries:       `query` parameter of every request received.
+    """
+
+    latency_s = 0.05
+    rate_limit = 0.0
+    retry_after_s = 1
+    unavailable = 0.0
+    queries = []
+    _rng = random.Random(0)
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        type(self).queries.append(params.get('query', [''])[0])
+        time.sleep(self.latency_s)
+        if self._rng.random() < self.rate_limit:
+            return self._send(429, 'text/plain', b'Please limit requests',
+                              {'Retry-After': str(self.retry_after_s)})
+        if self._rng.random() < self.unavailable:
+            return self._send(503, 'text/plain', b'Service Unavailable')
+        company = params.get('query', ['""'])[0].strip('"')
+        n = int(params.get('maxrecords', ['10'])[0])
+        articles = [{
+            'title': f'{company} headline {i}: regulator opens review of supplier payments',
+            'url': f'https://news.example/{zlib.crc32(company.encode()):x}/{i}',
+            'domain': 'news.example',
+            'language': 'English',
+            'seendate': '20240101T000000Z',
+        } for i in range(n)]
+        self._send(200, 'application/json', json.dumps({'articles': articles}).encode())
+
+
+_RISKY = ('fraud', 'brib', 'corrupt', 'sanction', 'breach', 'lawsuit', 'investigat', 'review', 'fine')
+
+def risk_reply(prompt: str) -> str:
+
+    """
+    JSON-mode answer to a news.risk prompt: one score per numbered
+    headline, 80 when it contains a risk keyword and 10 otherwise.
+    """
+
+    scores = []
+    for num, title in re.findall(r'^(\d+)\. (.*)$', prompt, re.M):
+        risky = any(word in title.lower() for word in _RISKY)
+        scores.append({'id': int(num), 'score': 80 if risky else 10,
+                       'category': 'regulatory' if risky else 'none', 'reason': 'stub'})
+    return json.dumps({'scores': scores})
+
+def ollama_handler(ttft_s: float = 0.1, token_s: float = 0.005, tokens: int = 64, respond=None):
+    return type('Ollama', (OllamaStub,), {'ttft_s': ttft_s, 'token_s': token_s, 'tokens': tokens,
+                                          'respond': staticmethod(respond) if respond else None})
+
+def gdelt_handler(latency_s: float = 0.05, rate_limit: float = 0.0, retry_after_s: float = 1,
+                  unavailable: float = 0.0, seed: int = 0):
+    return type('Gdelt', (GdeltStub,), {'latency_s': latency_s, 'rate_limit': rate_limit,
+                                        'retry_after_s': retry_after_s, 'unavailable': unavailable,
+                                        'queries': [],
+                                        '_rng': random.Random(seed)})
+
+@contextmanager
+def serve(handler):
+
+    """
+    Run `handler` on an ephemeral localhost port; yields the base URL.
+    """
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class HashEncoder:
+
+    """
+    Normalizable bag-of-words vectors: each lowercased word adds +-1 to a
+    crc32-chosen dimension. Texts sharing words get similar vectors, so
+    retrieval still returns topical hits, at a few microseconds per text.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        mat = np.zeros((len(texts), self.dim), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                h = zlib.crc32(word.encode('utf-8'))
+                mat[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        if normalize_embeddings:
+            mat /= np.clip(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12, None)
+        return mat[0] if single else mat
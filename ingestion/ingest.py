@@ -1,11 +1,20 @@
 # ingest.py — document ingestion and FAISS index builder
+#
+# Every build (full or incremental) is written into a new snapshot directory
+# and published atomically when complete (retrieval.snapshots); running
+# retrievers pick it up without a restart.
 
-import os, json, glob
+import os, json, glob, argparse
 from tqdm import tqdm
 import numpy as np
 import faiss
-from models.embedding import get_embedding_model
-from ingestion.splitters import split_text
+from models.embedding import get_embedding_model, with_embedding_cache
+from models.embedding_cache import cache_stats
+from ingestion.pipeline import iter_split_documents, read_document
+from retrieval.metastore import MetaStore, MetaStoreWriter
+from retrieval.index_types import IndexBuilder, index_signature, supports_remove, write_flat_vectors
+from retrieval.lexical import LexicalIndexWriter
+from retrieval import snapshots
 import yaml
 
 # ---------------------------------------------------------------------------
@@ -14,80 +23,386 @@ import yaml
 
 CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
 
-INDEX_PATH = CFG['retrieval']['index_path']
-META_PATH  = CFG['retrieval']['metadata_path']
 EMB_MODEL  = CFG['retrieval']['embedding_model']
+EMBED_BATCH_SIZE     = int(CFG['retrieval'].get('embed_batch_size', 64))
+EMBED_SORT_BY_LENGTH = bool(CFG['retrieval'].get('embed_sort_by_length', True))
 
+# Chunking strategy (structure-aware by default, see ingestion.splitters)
+SPLITTER = CFG['retrieval'].get('splitter') or {'mode': 'chars', 'max_chars': 1200, 'overlap': 150}
 
-# File patterns for ingestion (policies and laws)
-DOC_GLOBS = ['data/policies/*.md', 'data/laws/*.md']
+# BM25 inverted index built alongside FAISS (see retrieval.lexical)
+_LEX_CFG = CFG['retrieval'].get('lexical', {}) or {}
 
+# Index, metadata, BM25 and the per-file manifest of a build share one
+# snapshot directory; the pre-snapshot flat layout is only read (migration)
+SNAPSHOT_ROOT  = snapshots.SNAPSHOT_ROOT
+KEEP_SNAPSHOTS = snapshots.KEEP
+LEGACY_PATHS   = snapshots.LEGACY_PATHS
+
+# Memory-mapped serving: flat indexes also get a vectors.npy sidecar
+MMAP_INDEX = bool((CFG['retrieval'].get('shared_memory', {}) or {}).get('mmap', False))
+
+
+# File patterns and parallelism for ingestion (policies and laws by default)
+_INGEST_CFG = CFG.get('ingestion', {}) or {}
+DOC_GLOBS   = _INGEST_CFG.get('doc_globs', ['data/policies/*.md', 'data/laws/*.md'])
+WORKERS     = int(_INGEST_CFG.get('workers', 0))
+CHUNK_BATCH = int(_INGEST_CFG.get('chunk_batch', 1024))
+
+
+def list_document_paths():
+
+    """
+    Return the sorted, de-duplicated list of files matching DOC_GLOBS.
+    """
+
+    paths = []
+    for pattern in DOC_GLOBS:
+        paths.extend(glob.glob(pattern))
+    return sorted(set(paths))
 
 def load_documents():
 
     """
     Read all markdown files matching DOC_GLOBS and return as dict list.
+    Holds the whole corpus in memory; build_index streams instead.
 
     Returns:
-        List[dict]: [{'path': str, 'text': str}, ...]
+        List[dict]: [{'path': str, 'text': str, 'sha256': str}, ...]
     """
 
-    docs = []
-    for pattern in DOC_GLOBS:
-        for path in glob.glob(pattern):
-            with open(path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            docs.append({'path': path, 'text': text})
-    return docs
+    return [read_document(path) for path in list_document_paths()]
 
-def build_index():
+def embed_chunks(model, texts, batch_size: int = EMBED_BATCH_SIZE,
+                 sort_by_length: bool = EMBED_SORT_BY_LENGTH, progress: bool = True):
 
     """
-    Split, embed, and index all loaded documents into FAISS for semantic retrieval.
+    Encode a list of chunk texts in batches and return a float32 matrix.
+
+    Args:
+        model:          embedding model exposing `encode(list, ...)`.
+        texts:          chunk strings to embed.
+        batch_size:     number of chunks per forward pass (default from config).
+        sort_by_length: encode chunks ordered by length so each batch pads to
+                        similar sizes; rows are restored to input order.
+        progress:       show a tqdm bar over batches.
+
+    Returns:
+        np.ndarray: (len(texts), dim) float32 matrix, row i = texts[i].
+    """
+
+    batch_size = max(1, int(batch_size))
+    order = list(range(len(texts)))
+    if sort_by_length:
+        order.sort(key=lambda i: len(texts[i]))
+
+    mat = None
+    for start in tqdm(range(0, len(order), batch_size), desc='Embedding', disable=not progress):
+        rows = order[start:start + batch_size]
+        vecs = model.encode([texts[i] for i in rows],
+                            batch_size=len(rows),
+                            normalize_embeddings=True)
+        vecs = np.asarray(vecs, dtype='float32')
+        if mat is None:
+            mat = np.empty((len(texts), vecs.shape[1]), dtype='float32')
+        mat[rows] = vecs
+    return mat
+
+def _index_documents(paths, model, builder, writers, files, next_id: int,
+                     batch_size: int, sort_by_length: bool, workers: int = WORKERS):
 
-    Process:
-        1. Split each document into overlapping chunks.
-        2. Convert each chunk to a vector embedding.
-        3. Build an inner-product FAISS index.
-        4. Save both index and metadata to disk.
     """
+    Stream `paths` through read/split (process pool), embedding and indexing.
+
+    Chunks are embedded and handed to `builder`/`writers` every CHUNK_BATCH
+    chunks, so memory is bounded by the batch, not the corpus. Manifest
+    entries for each processed file are recorded in `files`.
 
-    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
-    model = get_embedding_model(EMB_MODEL)
+    Returns:
+        int: next free vector id.
+    """
 
-    vectors = []
-    metadatas = []
+    tokenizer = getattr(model, 'tokenizer', None)
+    texts, pending = [], []
 
-    # Iterate over each document and embed its chunks
-    for doc in tqdm(load_documents(), desc='Splitting & embedding'):
-        chunks = split_text(doc['text'], max_chars=1200, overlap=150)
-        for i, chunk in enumerate(chunks):
-            vec = model.encode(chunk, normalize_embeddings=True)
-            vectors.append(vec)
-            metadatas.append({
+    def flush():
+        if not texts:
+            return
+        mat = embed_chunks(model, texts, batch_size=batch_size,
+                           sort_by_length=sort_by_length, progress=False)
+        builder.add(mat, [m['id'] for m in pending])
+        for writer in writers:
+            writer.extend(pending)
+        texts.clear()
+        pending.clear()
+
+    docs = iter_split_documents(paths, SPLITTER, tokenizer=tokenizer, workers=workers)
+    for doc in tqdm(docs, total=len(paths), desc='Splitting & embedding'):
+        ids = []
+        for i, chunk in enumerate(doc['chunks']):
+            texts.append(chunk['text'])
+            pending.append({
+                'id': next_id,
                 'doc_path': doc['path'],
                 'chunk_id': i,
-                'text': chunk
+                'text': chunk['text'],
+                'section': chunk['section'],
+                'article': chunk['article'],
             })
+            ids.append(next_id)
+            next_id += 1
+        files[doc['path']] = _manifest_entry(doc, ids)
+        if len(texts) >= CHUNK_BATCH:
+            flush()
+    flush()
+    return next_id
+
+def _manifest_entry(doc, ids):
+    st = os.stat(doc['path'])
+    return {
+        'sha256': doc['sha256'],
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'ids': ids,
+    }
+
+def current_paths():
+
+    """
+    Paths of the live index ({'index', 'meta', 'lexical', 'manifest'}): the
+    published snapshot, else the legacy flat layout; None if neither exists.
+    """
+
+    return snapshots.resolve(SNAPSHOT_ROOT, LEGACY_PATHS)[1]
+
+def load_manifest(path: str = None):
+
+    """
+    Load the ingestion manifest (default: the live index's), or None if
+    missing/unreadable.
+    """
+
+    if path is None:
+        paths = current_paths()
+        if paths is None:
+            return None
+        path = paths['manifest']
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_manifest(manifest, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
 
-    if not vectors:
+def _open_writers(paths):
+    # Chunk metadata and the BM25 index are written from the same records
+    return (MetaStoreWriter(paths['meta']),
+            LexicalIndexWriter(paths['lexical'], k1=_LEX_CFG.get('k1', 1.2), b=_LEX_CFG.get('b', 0.75),
+                               max_df=_LEX_CFG.get('max_df', 0.5)))
+
+def _save(index, writers, manifest, version: str, paths):
+
+    """
+    Complete the snapshot `version`, publish it and drop old snapshots.
+    """
+
+    faiss.write_index(index, paths['index'])
+    if MMAP_INDEX:
+        write_flat_vectors(index, paths['index'])
+    for writer in writers:
+        writer.close()
+    _save_manifest(manifest, paths['manifest'])
+    snapshots.publish(version, SNAPSHOT_ROOT)
+    removed = snapshots.collect_garbage(SNAPSHOT_ROOT, KEEP_SNAPSHOTS)
+    print(f'Published snapshot {version}' + (f' (removed {len(removed)} old)' if removed else ''))
+
+def _abort(writers, version: str):
+    for writer in writers:
+        writer.abort()
+    snapshots.discard(version, SNAPSHOT_ROOT)
+
+def _can_update_incrementally(manifest, paths):
+    return (
+        manifest is not None
+        and paths is not None
+        and manifest.get('embedding_model') == EMB_MODEL
+        and manifest.get('index') == index_signature()
+        and manifest.get('splitter') == SPLITTER
+        and os.path.exists(paths['index'])
+        and os.path.isdir(paths['meta'])
+    )
+
+def build_index(batch_size: int = EMBED_BATCH_SIZE,
+                sort_by_length: bool = EMBED_SORT_BY_LENGTH,
+                incremental: bool = False, workers: int = WORKERS):
+
+    """
+    Split, embed, and index all loaded documents into FAISS for semantic retrieval.
+
+    Process:
+        1. Read and split documents in a process pool (retrieval.splitter).
+        2. Embed chunks in bounded batches as they arrive (see embed_chunks).
+        3. Stream them into an inner-product FAISS index of the configured
+           type (retrieval.index) keyed by stable chunk ids, and into the
+           BM25 inverted index (retrieval.lexical) under the same ids.
+        4. Save both indexes, metadata and the per-file manifest into a new
+           snapshot directory and publish it (retrieval.snapshots).
+
+    Args:
+        incremental: reuse the existing index and only re-embed new/changed
+                     files (see update_index). Falls back to a full build when
+                     no compatible index/manifest exists.
+        workers:     read/split processes (0/1 = in-process).
+    """
+
+    if incremental:
+        manifest = load_manifest()
+        if _can_update_incrementally(manifest, current_paths()):
+            return update_index(manifest, batch_size=batch_size,
+                                sort_by_length=sort_by_length, workers=workers)
+        print('No compatible index/manifest found; running full build.')
+
+    model = with_embedding_cache(get_embedding_model(EMB_MODEL), EMB_MODEL)
+
+    version, directory = snapshots.create(SNAPSHOT_ROOT)
+    paths = snapshots.snapshot_paths(directory)
+    builder = IndexBuilder()
+    writers = _open_writers(paths)
+    files = {}
+    try:
+        next_id = _index_documents(list_document_paths(), model, builder, writers, files, 0,
+                                   batch_size, sort_by_length, workers)
+    except BaseException:
+        _abort(writers, version)
+        raise
+
+    # Inner Product index (IP ≈ cosine when normalized), wrapped in an
+    # IDMap so chunks of a single file can later be removed/replaced
+    index = builder.finish()
+    if index is None:
+        _abort(writers, version)
         raise RuntimeError('No documents found to index.')
 
-    # Stack all vectors into a single matrix (float32 required by FAISS)
-    mat = np.vstack(vectors).astype('float32')
+    manifest = {
+        'embedding_model': EMB_MODEL,
+        'index': index_signature(),
+        'splitter': SPLITTER,
+        'next_id': next_id,
+        'files': files,
+    }
+    _save(index, writers, manifest, version, paths)
+
+    print(f'Indexed {index.ntotal} chunks -> {paths["index"]}')
+    print(f'Metadata saved -> {paths["meta"]}')
+    print(f'Embedding cache: {cache_stats()}')
+
+def update_index(manifest, batch_size: int = EMBED_BATCH_SIZE,
+                 sort_by_length: bool = EMBED_SORT_BY_LENGTH, workers: int = WORKERS):
+
+    """
+    Incrementally refresh the index using the content-hash manifest.
+
+    - Files whose size/mtime match the manifest are skipped without reading.
+    - Files whose sha256 changed (or new files) are re-split and re-embedded.
+    - Vectors of changed and deleted files are removed by id.
+    - IVF indexes keep their trained centroids; HNSW cannot remove vectors,
+      so any change/deletion there triggers a full (cache-assisted) rebuild.
+    - The result is a new snapshot; the live one is only read.
+
+    Notes:
+        Only splitting and embedding scale with the changed files. I/O is
+        still proportional to the corpus: the live FAISS index is read and
+        written out whole, and every kept metadata record is streamed into
+        the new MetaStore and BM25 index (whose weights depend on corpus-wide
+        statistics anyway), because published snapshots are never modified.
+
+    Returns:
+        dict: counts of added, changed, deleted and unchanged files.
+    """
+
+    live = current_paths()
+    index = faiss.read_index(live['index'])
+    if not isinstance(index, faiss.IndexIDMap2):
+        print('Existing index has no id map; running full build.')
+        return build_index(batch_size=batch_size, sort_by_length=sort_by_length, workers=workers)
+
+    files = manifest['files']
+    paths = list_document_paths()
+
+    changed, stale_ids = [], []
+    stats = {'added': 0, 'changed': 0, 'deleted': 0, 'unchanged': 0}
+    for path in paths:
+        entry = files.get(path)
+        st = os.stat(path)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            stats['unchanged'] += 1
+            continue
+        doc = read_document(path)
+        if entry and entry['sha256'] == doc['sha256']:
+            # Touched but identical: only refresh the stat fingerprint
+            files[path] = _manifest_entry(doc, entry['ids'])
+            stats['unchanged'] += 1
+            continue
+        if entry:
+            stale_ids.extend(entry['ids'])
+            stats['changed'] += 1
+        else:
+            stats['added'] += 1
+        changed.append(path)
+
+    for path in set(files) - set(paths):
+        stale_ids.extend(files.pop(path)['ids'])
+        stats['deleted'] += 1
+
+    if not changed and not stale_ids:
+        # Only stat fingerprints changed: nothing to publish. Published
+        # snapshots are immutable, so the refreshed fingerprints are not
+        # written back; touched files are re-hashed until the next build.
+        print(f'Index up to date ({stats["unchanged"]} files unchanged).')
+        return stats
+
+    if stale_ids and not supports_remove():
+        print('Index type cannot remove vectors; running full build.')
+        return build_index(batch_size=batch_size, sort_by_length=sort_by_length, workers=workers)
+
+    # Kept rows are streamed from the current store into the new one
+    stale = set(stale_ids)
+    version, directory = snapshots.create(SNAPSHOT_ROOT)
+    paths = snapshots.snapshot_paths(directory)
+    writers = _open_writers(paths)
+    try:
+        for m in MetaStore(live['meta']).records():
+            if m['id'] not in stale:
+                for writer in writers:
+                    writer.append(m)
+        if stale_ids:
+            index.remove_ids(np.array(stale_ids, dtype='int64'))
 
-    # Create a simple Inner Product index (IP ≈ cosine when normalized)
-    index = faiss.IndexFlatIP(mat.shape[1])
-    index.add(mat)
-    faiss.write_index(index, INDEX_PATH)
-    with open(META_PATH, 'w', encoding='utf-8') as f:
-        json.dump(metadatas, f, ensure_ascii=False, indent=2)
+        if changed:
+            model = with_embedding_cache(get_embedding_model(EMB_MODEL), EMB_MODEL)
+            manifest['next_id'] = _index_documents(
+                changed, model, IndexBuilder(index=index), writers, files, manifest['next_id'],
+                batch_size, sort_by_length, workers)
+    except BaseException:
+        _abort(writers, version)
+        raise
 
-    print(f'Indexed {len(metadatas)} chunks -> {INDEX_PATH}')
-    print(f'Metadata saved -> {META_PATH}')
+    _save(index, writers, manifest, version, paths)
+    print(f"Incremental update: {stats} -> {index.ntotal} chunks in {paths['index']}")
+    print(f'Embedding cache: {cache_stats()}')
+    return stats
 
 # ---------------------------------------------------------------------------
 # CLI entrypoint — allows running `python -m ingestion.ingest`
 # ---------------------------------------------------------------------------
 if __name__ == '__main__':
-    build_index()
+    parser = argparse.ArgumentParser(description='Build the FAISS index from DOC_GLOBS.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-embed new/changed files (uses manifest.json)')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help='read/split processes (0 = in-process)')
+    args = parser.parse_args()
+    build_index(incremental=args.incremental, workers=args.workers)
@@ -0,0 +1,103 @@
+# pipeline.py — streaming, parallel read + split stage of ingestion
+#
+# Documents are read and split in a process pool and yielded one by one in
+# input order. At most `max_pending` documents are in flight, so a slow
+# consumer (the embedder) applies backpressure and memory stays bounded by
+# the batch sizes rather than by the corpus size.
+#
+# Kept free of faiss/torch imports: with the 'spawn' start method each worker
+# only imports this module and the splitters.
+
+import os
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ingestion.splitters import split_document, tokenizer_counter, approx_tokens
+
+
+def read_document(path: str):
+
+    """
+    Read one document and fingerprint its raw bytes.
+
+    Returns:
+        dict: {'path': str, 'text': str, 'sha256': str}
+    """
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return {
+        'path': path,
+        'text': raw.decode('utf-8'),
+        'sha256': hashlib.sha256(raw).hexdigest(),
+    }
+
+# Per-process splitter state (set directly, or by the pool initializer)
+_settings = None
+_count_tokens = approx_tokens
+
+def _init_worker(settings, tokenizer):
+    global _settings, _count_tokens
+    _settings = settings
+    _count_tokens = tokenizer_counter(tokenizer) if tokenizer is not None else approx_tokens
+
+def read_and_split(path: str):
+
+    """
+    Read and split one file with the worker's settings.
+
+    Returns:
+        dict: {'path', 'sha256', 'chunks': [{'text', 'section', 'article'}, ...]}
+    """
+
+    doc = read_document(path)
+    return {
+        'path': path,
+        'sha256': doc['sha256'],
+        'chunks': split_document(doc['text'], _settings, count_tokens=_count_tokens),
+    }
+
+def iter_split_documents(paths, settings: dict, tokenizer=None, workers: int = 0,
+                         max_pending: int = None):
+
+    """
+    Yield read_and_split() results for `paths`, in order.
+
+    Args:
+        paths:       file paths to process.
+        settings:    splitter settings (retrieval.splitter).
+        tokenizer:   HF tokenizer used to measure token budgets (picklable);
+                     None falls back to approx_tokens.
+        workers:     processes in the pool; 0/1 runs in-process.
+        max_pending: documents submitted ahead of the consumer
+                     (default 4 per worker).
+    """
+
+    paths = list(paths)
+    if workers <= 1 or len(paths) <= 1:
+        _init_worker(settings, tokenizer)
+        for path in paths:
+            yield read_and_split(path)
+        return
+
+    max_pending = max_pending or workers * 4
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(settings, tokenizer)) as pool:
+        pending = deque()
+        todo = iter(paths)
+        for path in todo:
+            pending.append(pool.submit(read_and_split, path))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(read_and_split, nxt))
+            yield result
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
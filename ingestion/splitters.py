@@ -1,4 +1,5 @@
-from typing import List
+import re
+from typing import Callable, List
 
 def split_text(text: str, max_chars: int = 1200, overlap: int = 150) -> List[str]:
 
@@ -33,3 +34,166 @@ def split_text(text: str, max_chars: int = 1200, overlap: int = 150) -> List[str
         chunks.append(chunk)
         start += max_chars
     return chunks
+
+
+# ---------------------------------------------------------------------------
+# Structure-aware splitting (Markdown headings + "Art. N" clauses)
+# ---------------------------------------------------------------------------
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*\S)\s*$')
+_ARTICLE_RE = re.compile(r'^\s*(?:#{1,6}\s*|>\s*)?Art\.\s*(\d+)')
+_SENTENCE_RE = re.compile(r'(?<=[.;:!?])\s+')
+
+
+def approx_tokens(text: str) -> int:
+
+    """
+    Cheap token estimate (~1.3 word-pieces per word) when no tokenizer is available.
+    """
+
+    return int(len(text.split()) * 1.3) + 1
+
+def tokenizer_counter(tokenizer) -> Callable[[str], int]:
+
+    """
+    Token counter backed by a Hugging Face tokenizer (no special tokens).
+    """
+
+    return lambda text: len(tokenizer(text, add_special_tokens=False)['input_ids'])
+
+def make_token_counter(model=None) -> Callable[[str], int]:
+
+    """
+    Return a function counting tokens with the embedding model's tokenizer
+    (so budgets match what the model actually sees), or approx_tokens.
+    """
+
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is None:
+        return approx_tokens
+    return tokenizer_counter(tokenizer)
+
+def _blocks(text: str):
+
+    """
+    Yield (section, article, text) blocks: a new block starts at every
+    Markdown heading or `Art. N` line; section is the latest non-article heading.
+    """
+
+    section, article, lines = None, None, []
+    for line in text.splitlines():
+        art = _ARTICLE_RE.match(line)
+        head = _HEADING_RE.match(line)
+        if art or head:
+            if any(l.strip() for l in lines):
+                yield section, article, '\n'.join(lines).strip()
+            lines = []
+            if art:
+                article = art.group(1)
+            else:
+                section, article = head.group(2), None
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        yield section, article, '\n'.join(lines).strip()
+
+def _split_oversized(text: str, max_tokens: int, count_tokens) -> List[str]:
+
+    """
+    Break one block that exceeds the budget at paragraph, then sentence,
+    then word boundaries.
+    """
+
+    pieces, current = [], ''
+    units = [u for p in text.split('\n\n') for u in _SENTENCE_RE.split(p) if u.strip()]
+    for unit in units:
+        if count_tokens(unit) > max_tokens:
+            words, unit_parts, buf = unit.split(), [], []
+            for w in words:
+                if buf and count_tokens(' '.join(buf + [w])) > max_tokens:
+                    unit_parts.append(' '.join(buf))
+                    buf = []
+                buf.append(w)
+            if buf:
+                unit_parts.append(' '.join(buf))
+        else:
+            unit_parts = [unit]
+        for part in unit_parts:
+            candidate = f'{current} {part}'.strip()
+            if current and count_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_structured(text: str, max_tokens: int = 200,
+                     count_tokens: Callable[[str], int] = approx_tokens) -> List[dict]:
+
+    """
+    Split Markdown policy/law text along its structure under a token budget.
+
+    Args:
+        text:         full document text.
+        max_tokens:   budget per chunk, measured with `count_tokens`
+                      (keep at or below the embedding model's max sequence).
+        count_tokens: token counter, e.g. make_token_counter(model).
+
+    Returns:
+        List[dict]: [{'text': str, 'section': str|None, 'article': str|None}, ...]
+                    where article is the clause number, or a comma-separated
+                    list when several short clauses share one chunk.
+
+    Notes:
+        - Chunks never cut through an `Art.` clause unless the clause alone
+          exceeds the budget; consecutive clauses of the same section are
+          packed together while they fit.
+        - No overlap is added: clause boundaries already preserve context.
+    """
+
+    chunks = []
+    cur = None  # {'text', 'section', 'articles'}
+
+    def flush():
+        if cur and cur['text'].strip():
+            chunks.append({
+                'text': cur['text'],
+                'section': cur['section'],
+                'article': ','.join(cur['articles']) or None,
+            })
+
+    for section, article, block in _blocks(text):
+        parts = [block] if count_tokens(block) <= max_tokens else \
+            _split_oversized(block, max_tokens, count_tokens)
+        for part in parts:
+            joined = f"{cur['text']}\n\n{part}" if cur else part
+            if cur and cur['section'] == section and count_tokens(joined) <= max_tokens:
+                cur['text'] = joined
+            else:
+                flush()
+                cur = {'text': part, 'section': section, 'articles': []}
+            if article and article not in cur['articles']:
+                cur['articles'].append(article)
+    flush()
+    return chunks
+
+def split_document(text: str, settings: dict, count_tokens: Callable[[str], int] = approx_tokens) -> List[dict]:
+
+    """
+    Split with the configured strategy (`retrieval.splitter` in config.yaml).
+
+    Args:
+        settings: {'mode': 'structured'|'chars', 'max_tokens', 'max_chars', 'overlap'}.
+
+    Returns:
+        List[dict]: same shape as split_structured(); character mode leaves
+                    section/article empty.
+    """
+
+    if settings.get('mode', 'structured') == 'chars':
+        return [{'text': c, 'section': None, 'article': None}
+                for c in split_text(text, max_chars=int(settings.get('max_chars', 1200)),
+                                    overlap=int(settings.get('overlap', 150)))]
+    return split_structured(text, max_tokens=int(settings.get('max_tokens', 200)),
+                            count_tokens=count_tokens)
@@ -1,20 +1,53 @@
-from sentence_transformers import SentenceTransformer
+from models.embedding_cache import CachedEmbeddingModel, get_default_cache
 
 
-def get_embedding_model(model_name: str = 'sentence-transformers/all-MiniLM-L6-v2'):
+def get_embedding_model(model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                        backend: str = 'torch', onnx_dir: str = 'retrieval/vectordb/onnx'):
 
     """
     Load and return a sentence-transformers embedding model.
 
     Args:
         model_name: name or path of the pretrained model (default = MiniLM-L6-v2).
+        backend:    'torch' (fp32), 'torch_int8' (dynamically quantized) or
+                    'onnx' (onnxruntime); see models.embedding_backends.
+        onnx_dir:   where exported ONNX models are kept (backend='onnx').
 
     Returns:
-        SentenceTransformer: model instance ready to encode text into embeddings.
+        SentenceTransformer (or an object with the same `encode`) ready to
+        encode text into embeddings.
 
     Notes:
         - Used by ingestion (to embed documents) and by retrieval (to embed queries).
         - MiniLM-L6-v2 is small and efficient for local FAISS-based search.
+        - sentence-transformers (and torch) are imported here, not at module
+          import, so importing the retriever stays cheap until a model is needed.
     """
 
+    if backend != 'torch':
+        from models.embedding_backends import load_backend
+        return load_backend(model_name, backend, onnx_dir)
+    from sentence_transformers import SentenceTransformer
     return SentenceTransformer(model_name)
+
+
+def with_embedding_cache(model, model_name: str, backend: str = 'torch'):
+
+    """
+    Wrap `model` with the on-disk embedding cache configured in config.yaml.
+
+    Args:
+        model:      object exposing `encode` (e.g. from get_embedding_model).
+        model_name: name used as part of the cache key.
+        backend:    non-fp32 backends get their own cache entries, so
+                    approximate vectors never stand in for reference ones.
+
+    Returns:
+        CachedEmbeddingModel, or `model` unchanged if the cache is disabled.
+    """
+
+    cache = get_default_cache()
+    if cache is None:
+        return model
+    key = model_name if backend == 'torch' else f'{model_name}@{backend}'
+    return CachedEmbeddingModel(model, key, cache)
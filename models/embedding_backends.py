@@ -0,0 +1,178 @@
+# embedding_backends.py — alternative CPU backends for the embedding model
+#
+#   torch       SentenceTransformer in fp32 (reference)
+#   torch_int8  same model with its nn.Linear layers dynamically quantized
+#               to int8 (weights int8, activations quantized per batch)
+#   onnx        transformer exported once to ONNX and run with onnxruntime;
+#               tokenization via `tokenizers` and mean pooling in numpy, so
+#               query encoding needs neither torch nor transformers
+#
+# Vectors of every backend are meant to stay interchangeable with the fp32
+# index; check with `parity()` / benchmarks.bench_embedding_backends.
+
+import os
+import re
+import json
+import numpy as np
+
+BACKENDS = ('torch', 'torch_int8', 'onnx')
+
+
+def load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device='cpu')
+
+
+def quantize_int8(model):
+
+    """
+    Dynamically quantize the Linear layers of a SentenceTransformer in place
+    (torch.ao.quantization.quantize_dynamic) and return it.
+    """
+
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _onnx_path(onnx_dir: str, model_name: str) -> str:
+    return os.path.join(onnx_dir, re.sub(r'[^A-Za-z0-9_.-]+', '__', model_name))
+
+
+def export_onnx(model_name: str, out_dir: str, opset: int = 17):
+
+    """
+    Export the transformer of a SentenceTransformer to `out_dir`:
+    model.onnx (last_hidden_state), tokenizer.json and pooling.json.
+
+    Only mean-pooling models (e.g. all-MiniLM-L6-v2) are supported; pooling
+    and normalization are re-implemented in OnnxEncoder.
+    """
+
+    import torch
+    from sentence_transformers import models as st_models
+
+    st = load_sentence_transformer(model_name)
+    transformer = st[0]
+    pooling = next((m for m in st if isinstance(m, st_models.Pooling)), None)
+    if not isinstance(transformer, st_models.Transformer) or pooling is None \
+            or pooling.get_pooling_mode_str() != 'mean':
+        raise ValueError(f'{model_name}: ONNX backend supports Transformer + mean Pooling models only')
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(out_dir)   # writes tokenizer.json for fast tokenizers
+    if not os.path.exists(os.path.join(out_dir, 'tokenizer.json')):
+        raise ValueError(f'{model_name}: a fast tokenizer (tokenizer.json) is required')
+
+    sample = tokenizer(['export sample'], return_tensors='pt')
+    names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in sample]
+    axes = {n: {0: 'batch', 1: 'seq'} for n in names}
+    axes['last_hidden_state'] = {0: 'batch', 1: 'seq'}
+    model = transformer.auto_model.eval()
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(names, inputs))).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(_Wrapper(), tuple(sample[n] for n in names), os.path.join(out_dir, 'model.onnx'),
+                          input_names=names, output_names=['last_hidden_state'], dynamic_axes=axes,
+                          opset_version=opset, dynamo=False)
+    with open(os.path.join(out_dir, 'pooling.json'), 'w', encoding='utf-8') as f:
+        json.dump({'inputs': names, 'max_seq_length': int(st.max_seq_length)}, f)
+    return out_dir
+
+
+class OnnxEncoder:
+
+    """
+    SentenceTransformer-compatible `encode` backed by onnxruntime.
+
+    Args:
+        model_dir: directory written by export_onnx().
+        threads:   intra-op threads (0 = onnxruntime default).
+    """
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, 'pooling.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.inputs = meta['inputs']
+        self.max_seq_length = meta['max_seq_length']
+        self._tok = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self._tok.enable_truncation(self.max_seq_length)
+        self._tok.enable_padding()
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(os.path.join(model_dir, 'model.onnx'), opts,
+                                             providers=['CPUExecutionProvider'])
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self._tok.encode_batch(texts[i:i + batch_size])
+            mask = np.array([e.attention_mask for e in enc], dtype='int64')
+            feed = {
+                'input_ids': np.array([e.ids for e in enc], dtype='int64'),
+                'attention_mask': mask,
+                'token_type_ids': np.array([e.type_ids for e in enc], dtype='int64'),
+            }
+            hidden = self._session.run(None, {n: feed[n] for n in self.inputs})[0]
+            m = mask[:, :, None].astype('float32')
+            emb = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                emb /= np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out.append(emb.astype('float32'))
+        mat = np.vstack(out) if out else np.zeros((0, 0), dtype='float32')
+        return mat[0] if single else mat
+
+
+def load_backend(model_name: str, backend: str = 'torch', onnx_dir: str = 'retrieval/vectordb/onnx'):
+
+    """
+    Load `model_name` with the given backend (see module header).
+
+    The ONNX model is exported on first use into `onnx_dir/<model_name>` and
+    reused afterwards.
+    """
+
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown embedding backend {backend!r}; expected one of {BACKENDS}')
+    if backend == 'torch':
+        return load_sentence_transformer(model_name)
+    if backend == 'torch_int8':
+        return quantize_int8(load_sentence_transformer(model_name))
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError("embedding backend 'onnx' requires onnxruntime "
+                          "(and onnx for the one-time export): pip install onnxruntime onnx") from e
+    path = _onnx_path(onnx_dir, model_name)
+    if not os.path.exists(os.path.join(path, 'model.onnx')):
+        export_onnx(model_name, path)
+    return OnnxEncoder(path)
+
+
+def parity(reference, candidate, texts, batch_size: int = 32):
+
+    """
+    Cosine similarity between normalized embeddings of `texts` from two
+    encoders (e.g. fp32 torch vs int8 / ONNX).
+
+    Returns:
+        dict: min_cosine, mean_cosine.
+    """
+
+    a = np.asarray(reference.encode(texts, batch_size=batch_size, normalize_embeddings=True), dtype='float32')
+    b = np.asarray(candidate.encode(texts, batch_size=batch_size, normalize_embeddings=True), dtype='float32')
+    cos = (a * b).sum(axis=1)
+    return {'min_cosine': float(cos.min()), 'mean_cosine': float(cos.mean())}
@@ -0,0 +1,251 @@
+# embedding_cache.py — persistent on-disk cache of text embeddings
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+import yaml
+
+# ---------------------------------------------------------------------------
+# Load cache configuration from YAML
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_CACHE_CFG = CFG['retrieval'].get('embedding_cache', {}) or {}
+
+CACHE_ENABLED = bool(_CACHE_CFG.get('enabled', True))
+CACHE_PATH    = _CACHE_CFG.get('path', 'retrieval/vectordb/embedding_cache.sqlite')
+CACHE_MAX_MB  = float(_CACHE_CFG.get('max_mb', 512))
+
+# SQLite limits the number of host parameters per statement
+_LOOKUP_CHUNK = 500
+
+# LRU touches from lookups are kept in memory and written in one batch
+# before evicting, on close(), or when this many / this old
+_TOUCH_FLUSH_MAX = 1024
+_TOUCH_FLUSH_S   = 60.0
+
+
+def text_sha256(text: str) -> bytes:
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+
+    """
+    SQLite-backed map (model name, normalize flag, sha256(text)) -> float32 vector.
+
+    Notes:
+        - Vectors are stored as raw float32 bytes (no pickling).
+        - When the stored payload exceeds `max_bytes`, least recently used
+          entries are evicted down to ~90% of the budget. Lookups only
+          record last-used times in memory (written in batches), so cache
+          hits do no write I/O.
+        - Safe to share between threads (one connection guarded by a lock).
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._touched = {}          # (model, normalize, sha) -> last used, not yet written
+        self._flushed_at = time.monotonic()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            ' model TEXT NOT NULL, normalize INTEGER NOT NULL, text_sha BLOB NOT NULL,'
+            ' vec BLOB NOT NULL, nbytes INTEGER NOT NULL, last_used REAL NOT NULL,'
+            ' UNIQUE(model, normalize, text_sha))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings(last_used)')
+        self._conn.commit()
+        self._bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(nbytes), 0) FROM embeddings').fetchone()[0]
+
+    def get_many(self, model_name: str, normalize: bool, texts):
+
+        """
+        Look up vectors for `texts`; returns a list aligned with the input
+        where missing entries are None.
+        """
+
+        shas = [text_sha256(t) for t in texts]
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(shas), _LOOKUP_CHUNK):
+                part = list(set(shas[start:start + _LOOKUP_CHUNK]))
+                marks = ','.join('?' * len(part))
+                rows = self._conn.execute(
+                    f'SELECT text_sha, vec FROM embeddings WHERE model = ? AND normalize = ?'
+                    f' AND text_sha IN ({marks})',
+                    [model_name, int(normalize), *part],
+                ).fetchall()
+                found.update(rows)
+            for sha in found:
+                self._touched[(model_name, int(normalize), sha)] = now
+            if self._touched and (len(self._touched) >= _TOUCH_FLUSH_MAX
+                                  or time.monotonic() - self._flushed_at >= _TOUCH_FLUSH_S):
+                self._flush_touches()
+                self._conn.commit()
+
+            out = []
+            for sha in shas:
+                blob = found.get(sha)
+                if blob is None:
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    self.hits += 1
+                    out.append(np.frombuffer(blob, dtype='float32'))
+        return out
+
+    def put_many(self, model_name: str, normalize: bool, texts, vectors):
+
+        """
+        Store vectors for `texts` (row i of `vectors` = texts[i]) and evict
+        least recently used entries if the size budget is exceeded.
+        """
+
+        now = time.time()
+        rows = []
+        for text, vec in zip(texts, vectors):
+            blob = np.ascontiguousarray(vec, dtype='float32').tobytes()
+            rows.append((model_name, int(normalize), text_sha256(text), blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            self._flush_touches()
+            for row in rows:
+                cur = self._conn.execute(
+                    'INSERT OR IGNORE INTO embeddings (model, normalize, text_sha, vec, nbytes, last_used)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)', row)
+                if cur.rowcount > 0:
+                    self._bytes += row[4]
+            if self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._conn.commit()
+
+    def _flush_touches(self):
+        # Caller holds the lock and commits
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE embeddings SET last_used = ? WHERE model = ? AND normalize = ? AND text_sha = ?',
+                [(t, model, norm, sha) for (model, norm, sha), t in self._touched.items()],
+            )
+            self._touched = {}
+        self._flushed_at = time.monotonic()
+
+    def _evict(self, target_bytes: int):
+        to_free = self._bytes - target_bytes
+        victims = []
+        for rowid, nbytes in self._conn.execute(
+                'SELECT rowid, nbytes FROM embeddings ORDER BY last_used ASC'):
+            if to_free <= 0:
+                break
+            victims.append((rowid,))
+            to_free -= nbytes
+            self._bytes -= nbytes
+        self._conn.executemany('DELETE FROM embeddings WHERE rowid = ?', victims)
+        self.evictions += len(victims)
+
+    def stats(self):
+
+        """
+        Return hit/miss counters and current size of the cache.
+        """
+
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': self._bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class CachedEmbeddingModel:
+
+    """
+    Wrap an embedding model so `encode` consults an EmbeddingCache first.
+
+    Only texts missing from the cache are sent to the wrapped model (in one
+    call), and their vectors are written back. Other attributes (tokenizer,
+    max_seq_length, ...) are forwarded to the wrapped model.
+    """
+
+    def __init__(self, model, model_name: str, cache: EmbeddingCache):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        vecs = self.cache.get_many(self.model_name, normalize_embeddings, texts)
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            # Duplicated texts inside one call are only encoded once
+            uniq = list(dict.fromkeys(texts[i] for i in missing))
+            new = np.asarray(self.model.encode(uniq, batch_size=batch_size,
+                                               normalize_embeddings=normalize_embeddings,
+                                               **kwargs), dtype='float32')
+            self.cache.put_many(self.model_name, normalize_embeddings, uniq, new)
+            by_text = dict(zip(uniq, new))
+            for i in missing:
+                vecs[i] = by_text[texts[i]]
+
+        if not texts:
+            return np.zeros((0, 0), dtype='float32')
+        mat = np.vstack(vecs).astype('float32', copy=False)
+        return mat[0] if single else mat
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_default_cache():
+
+    """
+    Return the process-wide cache configured in config.yaml (None if disabled).
+    """
+
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(CACHE_PATH)
+        return _default_cache
+
+def cache_stats():
+
+    """
+    Hit/miss counters of the default cache (empty dict if disabled/unused).
+    """
+
+    return _default_cache.stats() if _default_cache is not None else {}
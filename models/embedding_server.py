@@ -0,0 +1,219 @@
+# embedding_server.py — one embedding model shared by worker processes over a local socket
+#
+# Every retriever process normally loads its own SentenceTransformer (plus
+# torch). With retrieval.shared_memory.embedding_server set, workers use a
+# RemoteEncoder instead and a single server process holds the model:
+#
+#   python -m models.embedding_server [--address /tmp/ai-compliance-embed.sock]
+#
+# Addresses are a Unix socket path, or host:port for TCP. Each message is
+# an 8-byte header (JSON length, payload length; big-endian uint32), the
+# JSON, then the payload:
+#   request   {"texts": [...], "batch_size": 64, "normalize": true}
+#   response  {"shape": [n, dim]} + n*dim float32 bytes, or {"error": "..."}
+# {"op": "dim"} returns {"dim": dim}. Connections are persistent; the
+# server runs one forward pass at a time (torch already uses every core).
+
+import os
+import json
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import numpy as np
+import yaml
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+EMB_MODEL   = CFG['retrieval']['embedding_model']
+EMB_BACKEND = CFG['retrieval'].get('embedding_backend', 'torch')
+ONNX_DIR    = CFG['retrieval'].get('onnx_dir', 'retrieval/vectordb/onnx')
+DEFAULT_ADDRESS = (CFG['retrieval'].get('shared_memory', {}) or {}).get('embedding_server') \
+    or '/tmp/ai-compliance-embed.sock'
+REQUEST_TIMEOUT_S = 60
+
+_HEADER = struct.Struct('>II')
+
+
+def _is_tcp(address: str) -> bool:
+    host, sep, port = address.rpartition(':')
+    return bool(sep) and port.isdigit() and not address.startswith('/')
+
+def _send(sock, header: dict, payload: bytes = b''):
+    body = json.dumps(header).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(body), len(payload)) + body + payload)
+
+def _recv_exact(sock, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError('embedding server connection closed')
+        buf += chunk
+    return bytes(buf)
+
+def _recv(sock):
+    head_len, payload_len = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, head_len))
+    return header, _recv_exact(sock, payload_len) if payload_len else b''
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request, _ = _recv(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if request.get('op') == 'dim':
+                    _send(self.request, {'dim': server.dim()})
+                    continue
+                with server.encode_lock:
+                    mat = np.asarray(server.model.encode(list(request['texts']),
+                                                         batch_size=int(request.get('batch_size', 32)),
+                                                         normalize_embeddings=bool(request.get('normalize'))),
+                                     dtype='float32')
+                    server.stats['requests'] += 1
+                    server.stats['texts'] += len(request['texts'])
+                mat = np.ascontiguousarray(mat.reshape(len(request['texts']), -1))
+                _send(self.request, {'shape': list(mat.shape)}, mat.tobytes())
+            except Exception as e:
+                _send(self.request, {'error': f'{type(e).__name__}: {e}'})
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(model, address: str = DEFAULT_ADDRESS):
+
+    """
+    Bind (without serving yet) an embedding server for `model`.
+
+    Args:
+        model:   object exposing `encode` (e.g. get_embedding_model()).
+        address: Unix socket path (a stale socket file is replaced) or host:port.
+
+    Returns:
+        socketserver server: call serve_forever() (e.g. in a thread) and
+        shutdown() + server_close() to stop it.
+    """
+
+    if _is_tcp(address):
+        host, _, port = address.rpartition(':')
+        server = _TCPServer((host, int(port)), _Handler)
+    else:
+        if os.path.exists(address):
+            os.unlink(address)
+        server = _UnixServer(address, _Handler)
+    server.model = model
+    server.encode_lock = threading.Lock()
+    server.stats = {'requests': 0, 'texts': 0}
+    server.dim = lambda: int(model.get_sentence_embedding_dimension())
+    return server
+
+
+class RemoteEncoder:
+
+    """
+    SentenceTransformer-compatible `encode` answered by an embedding server.
+
+    Thread-safe: each call borrows a pooled connection (a new one when all
+    are busy). Server-side errors are raised as RuntimeError; there is no
+    fallback to a local model.
+
+    Args:
+        address: as for make_server (default: retrieval.shared_memory.embedding_server).
+        timeout: seconds to wait for a reply.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = REQUEST_TIMEOUT_S):
+        self.address = address
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._dim = None
+
+    def _connect(self):
+        if _is_tcp(self.address):
+            host, _, port = self.address.rpartition(':')
+            sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        return sock
+
+    def _call(self, request: dict):
+        with self._lock:
+            sock = self._idle.pop() if self._idle else None
+        if sock is None:
+            sock = self._connect()
+        try:
+            _send(sock, request)
+            header, payload = _recv(sock)
+        except BaseException:
+            sock.close()
+            raise
+        with self._lock:
+            self._idle.append(sock)
+        if 'error' in header:
+            raise RuntimeError(f'embedding server: {header["error"]}')
+        return header, payload
+
+    def get_sentence_embedding_dimension(self):
+        if self._dim is None:
+            self._dim = int(self._call({'op': 'dim'})[0]['dim'])
+        return self._dim
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype='float32')
+        header, payload = self._call({'texts': texts, 'batch_size': batch_size,
+                                      'normalize': bool(normalize_embeddings)})
+        mat = np.frombuffer(payload, dtype='float32').reshape(header['shape'])
+        return mat[0] if single else mat
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+
+def main():
+    from models.embedding import get_embedding_model, with_embedding_cache
+
+    parser = argparse.ArgumentParser(description='Serve query embeddings to retriever processes.')
+    parser.add_argument('--address', default=DEFAULT_ADDRESS, help='Unix socket path or host:port')
+    parser.add_argument('--model', default=EMB_MODEL)
+    parser.add_argument('--backend', default=EMB_BACKEND)
+    args = parser.parse_args()
+
+    model = with_embedding_cache(get_embedding_model(args.model, backend=args.backend, onnx_dir=ONNX_DIR),
+                                 args.model, backend=args.backend)
+    model.encode(['warm-up'], normalize_embeddings=True)
+    server = make_server(model, args.address)
+    print(f'Embedding server ({args.model}, {args.backend}) listening on {args.address}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not _is_tcp(args.address) and os.path.exists(args.address):
+            os.unlink(args.address)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
 # llm_client.py — lightweight HTTP client for local Ollama LLM inference
 
+import json, time, asyncio, threading, weakref
+from collections import deque
 import requests, yaml
+from requests.adapters import HTTPAdapter
+from telemetry.tracing import span, record
 
 # ---------------------------------------------------------------------------
 # Load model configuration from YAML
@@ -9,8 +13,264 @@ import requests, yaml
 CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
 OLLAMA_HOST = CFG['llm']['host']
 OLLAMA_MODEL = CFG['llm']['model']
+KEEP_ALIVE = CFG['llm'].get('keep_alive', '30m')
+MAX_IN_FLIGHT = int(CFG['llm'].get('max_in_flight', 2))
+QUEUE_TIMEOUT_S = float(CFG['llm'].get('queue_timeout_s', 60))
+POOL_SIZE = int(CFG['llm'].get('pool_size', 8))
+REQUEST_TIMEOUT_S = 120
 
-def generate(prompt: str, temperature: float = 0.2, system: str = None) -> str:
+
+class QueueTimeout(TimeoutError):
+    """Raised when a request waited longer than queue_timeout_s for a slot."""
+
+
+def _token_stats(data: dict) -> dict:
+
+    """
+    Token counts and decode time from Ollama's final response object.
+    """
+
+    out = {'prompt_eval_count': data.get('prompt_eval_count'), 'eval_count': data.get('eval_count')}
+    if data.get('eval_duration') is not None:
+        out['eval_duration_s'] = data['eval_duration'] / 1e9
+    return out
+
+
+class OllamaClient:
+
+    """
+    Pooled Ollama client with admission control.
+
+    Args:
+        host, model:     Ollama server and model tag.
+        max_in_flight:   concurrent generations allowed; further callers wait.
+        queue_timeout_s: max wait for a free slot before QueueTimeout.
+        keep_alive:      Ollama `keep_alive` (e.g. '30m', -1) so the model
+                         stays resident between requests.
+        pool_size:       keep-alive HTTP connections kept in the session pool.
+
+    Notes:
+        - One requests.Session is shared, so calls reuse TCP connections.
+        - `agenerate` is the asyncio entry point: it queues on an
+          asyncio.Semaphore (per event loop) and only takes a worker thread
+          for the pooled sync call once admitted, so waiting requests do
+          not tie up the default executor.
+        - `metrics()` reports latency percentiles, queue wait and counters.
+    """
+
+    def __init__(self, host: str = None, model: str = None,
+                 max_in_flight: int = MAX_IN_FLIGHT, queue_timeout_s: float = QUEUE_TIMEOUT_S,
+                 keep_alive=KEEP_ALIVE, pool_size: int = POOL_SIZE,
+                 timeout: float = REQUEST_TIMEOUT_S):
+        self.host = host or OLLAMA_HOST
+        self.model = model or OLLAMA_MODEL
+        self.keep_alive = keep_alive
+        self.queue_timeout_s = queue_timeout_s
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._loop_slots = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._waits = deque(maxlen=1000)
+        self._counts = {'requests': 0, 'errors': 0, 'rejected': 0, 'in_flight': 0}
+
+    # -- admission control ---------------------------------------------------
+
+    def _reject(self):
+        with self._lock:
+            self._counts['rejected'] += 1
+        return QueueTimeout(f'No free LLM slot after {self.queue_timeout_s:.0f}s')
+
+    def _acquire(self, timeout: float = None, waited: float = 0.0):
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout_s if timeout is None else timeout):
+            raise self._reject()
+        with self._lock:
+            self._waits.append(waited + time.perf_counter() - t0)
+            self._counts['in_flight'] += 1
+            self._counts['requests'] += 1
+        return time.perf_counter()
+
+    def _release(self, started: float, ok: bool):
+        with self._lock:
+            self._counts['in_flight'] -= 1
+            if ok:
+                self._latencies.append(time.perf_counter() - started)
+            else:
+                self._counts['errors'] += 1
+        self._slots.release()
+
+    def _payload(self, prompt: str, temperature: float, system: str, stream: bool,
+                 format: str = None) -> dict:
+
+        """
+        Build the JSON body for Ollama's `/api/generate`.
+        """
+
+        # Prepare request payload for Ollama API
+        payload = {
+            'model': self.model,
+            'prompt': prompt,
+            'options': {'temperature': temperature},
+            'stream': stream,
+            'keep_alive': self.keep_alive,
+        }
+
+        # Add system message if provided
+        if system:
+            payload['system'] = system
+        # 'json' makes Ollama constrain the output to a JSON value
+        if format:
+            payload['format'] = format
+        return payload
+
+    # -- entry points --------------------------------------------------------
+
+    def generate(self, prompt: str, temperature: float = 0.2, system: str = None,
+                 format: str = None) -> str:
+
+        """
+        Blocking, non-streaming generation (see module-level generate()).
+        """
+
+        return self._generate(prompt, temperature, system, format)
+
+    def _generate(self, prompt: str, temperature: float, system: str, format: str,
+                  timeout: float = None, waited: float = 0.0) -> str:
+        started = self._acquire(timeout, waited)
+        ok = False
+        try:
+            with span('llm.generate', model=self.model) as s:
+                r = self.session.post(f"{self.host}/api/generate",
+                                      json=self._payload(prompt, temperature, system, stream=False,
+                                                         format=format),
+                                      timeout=self.timeout)
+                r.raise_for_status()
+                data = r.json()
+                s.set(**_token_stats(data))
+            ok = True
+            return data.get('response', '')
+        finally:
+            self._release(started, ok)
+
+    def generate_stream(self, prompt: str, temperature: float = 0.2, system: str = None,
+                        stats: dict = None):
+
+        """
+        Streaming generation (see module-level generate_stream()).
+        The slot is held until the stream is exhausted or closed.
+        """
+
+        stats = {} if stats is None else stats
+        t0 = time.perf_counter()
+        started = self._acquire()
+        ok = False
+        try:
+            payload = self._payload(prompt, temperature, system, stream=True)
+            with self.session.post(f"{self.host}/api/generate", json=payload,
+                                   timeout=self.timeout, stream=True) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if 'error' in data:
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    token = data.get('response', '')
+                    if token:
+                        stats.setdefault('ttft_s', time.perf_counter() - t0)
+                        yield token
+                    if data.get('done'):
+                        stats.update(_token_stats(data))
+                        break
+            ok = True
+        finally:
+            stats['total_s'] = time.perf_counter() - t0
+            self._release(started, ok)
+            record('llm.ttft', stats.get('ttft_s'), model=self.model)
+            record('llm.total', stats['total_s'], model=self.model, ok=ok,
+                   **{key: stats[key] for key in ('prompt_eval_count', 'eval_count', 'eval_duration_s')
+                      if key in stats})
+
+    async def agenerate(self, prompt: str, temperature: float = 0.2, system: str = None,
+                        format: str = None) -> str:
+
+        """
+        Asyncio entry point: waits for a slot on the event loop, then runs
+        the pooled generate() in a worker thread. The thread still takes the
+        shared slot, so sync and async callers share one in-flight limit.
+        """
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._loop_slots.get(loop)
+            if slots is None:
+                slots = self._loop_slots[loop] = asyncio.Semaphore(self.max_in_flight)
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            raise self._reject() from None
+        try:
+            waited = time.perf_counter() - t0
+            return await asyncio.to_thread(self._generate, prompt, temperature, system, format,
+                                           max(0.0, self.queue_timeout_s - waited), waited)
+        finally:
+            slots.release()
+
+    def metrics(self) -> dict:
+
+        """
+        Snapshot of per-request latency (seconds) and queueing counters.
+        """
+
+        with self._lock:
+            lat = sorted(self._latencies)
+            waits = list(self._waits)
+            out = dict(self._counts)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p * len(lat)))] if lat else None
+
+        out.update({
+            'latency_p50_s': pct(0.50),
+            'latency_p95_s': pct(0.95),
+            'latency_max_s': lat[-1] if lat else None,
+            'queue_wait_mean_s': (sum(waits) / len(waits)) if waits else None,
+        })
+        return out
+
+    def close(self):
+        self.session.close()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide default client and function API
+# ---------------------------------------------------------------------------
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> OllamaClient:
+
+    """
+    Return the shared OllamaClient built from config.yaml (created lazily).
+    """
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
+
+def generate(prompt: str, temperature: float = 0.2, system: str = None, format: str = None) -> str:
 
     """
     Send a text prompt to the local Ollama API and return the model's response.
@@ -19,32 +279,42 @@ def generate(prompt: str, temperature: float = 0.2, system: str = None) -> str:
         prompt:      user or system prompt to generate text for.
         temperature: sampling temperature (0.0 = deterministic, >0 = more creative).
         system:      optional system instruction defining role/persona of the model.
+        format:      optional Ollama output format ('json' = JSON mode).
 
     Returns:
         str: generated text output from the model.
 
     Notes:
         - This function uses Ollama’s REST endpoint `/api/generate`.
-        - The request is synchronous and non-streaming (`stream=False`).
+        - The request is synchronous and non-streaming (`stream=False`);
+          see generate_stream() for incremental output.
         - Timeout set to 120s to handle larger prompts safely.
+        - Goes through the shared pooled client (get_client()).
     """
 
-    # Prepare request payload for Ollama API
-    payload = {
-        'model': OLLAMA_MODEL,
-        'prompt': prompt,
-        'options': {'temperature': temperature},
-        'stream': False
-    }
+    return get_client().generate(prompt, temperature=temperature, system=system, format=format)
 
-    # Add system message if provided
-    if system:
-        payload['system'] = system
+def generate_stream(prompt: str, temperature: float = 0.2, system: str = None, stats: dict = None):
 
-    # Make POST request to local Ollama server
-    r = requests.post(f"{OLLAMA_HOST}/api/generate", json=payload, timeout=120)
-    r.raise_for_status()
+    """
+    Stream the model's response token by token from Ollama.
+
+    Args:
+        prompt:      user or system prompt to generate text for.
+        temperature: sampling temperature.
+        system:      optional system instruction.
+        stats:       optional dict filled with timings once available:
+                     ttft_s (time to first token), total_s, and Ollama's
+                     prompt_eval_count / eval_count / eval_duration_s.
+
+    Yields:
+        str: text fragments in the order Ollama emits them.
+
+    Notes:
+        - Ollama streams NDJSON: one object per line with a `response`
+          fragment, the last one carrying `done: true` and token counters.
+        - The 120s timeout applies between received bytes, not to the
+          whole generation.
+    """
 
-    # Parse JSON response and extract model text
-    data = r.json()
-    return data.get('response', '')
+    return get_client().generate_stream(prompt, temperature=temperature, system=system, stats=stats)
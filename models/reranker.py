@@ -0,0 +1,54 @@
+import time
+import numpy as np
+
+
+def get_reranker(model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2'):
+
+    """
+    Load and return a sentence-transformers cross-encoder on CPU.
+
+    Args:
+        model_name: name or path of the pretrained cross-encoder
+                    (default = ms-marco MiniLM-L6, ~22M parameters).
+
+    Returns:
+        CrossEncoder: model exposing `predict([(query, passage), ...])`.
+
+    Notes:
+        - Imported lazily so the dependency is only touched when reranking
+          is enabled.
+    """
+
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device='cpu')
+
+
+def rerank(model, query: str, texts, batch_size: int = 16, budget_s: float = None):
+
+    """
+    Score (query, text) pairs in batches and return the best-first order.
+
+    Args:
+        model:      cross-encoder exposing `predict(pairs, batch_size=...)`.
+        query:      user question.
+        texts:      candidate passages, in first-stage order.
+        batch_size: pairs per forward pass.
+        budget_s:   time allowed; checked before each batch, so the overrun
+                    is at most one batch. None = unlimited.
+
+    Returns:
+        (order, scores): indices into `texts` sorted by descending score and
+        the raw scores, or None if the budget ran out first.
+    """
+
+    start = time.perf_counter()
+    scores = []
+    for i in range(0, len(texts), batch_size):
+        if budget_s is not None and time.perf_counter() - start > budget_s:
+            return None
+        pairs = [(query, t) for t in texts[i:i + batch_size]]
+        scores.extend(np.asarray(model.predict(pairs, batch_size=batch_size,
+                                               show_progress_bar=False), dtype='float32').ravel())
+    scores = np.asarray(scores, dtype='float32')
+    # Stable sort keeps first-stage order among equal scores
+    return np.argsort(-scores, kind='stable'), scores
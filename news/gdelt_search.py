@@ -1,27 +1,62 @@
-import time
+import threading
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError, RequestException
+from telemetry.tracing import span
+from news.rate_limit import TokenBucket
+from news.news_cache import get_news_cache
 
 CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
 MAX_ARTS = int(CFG['news'].get('max_articles', 10))
 TIMESPAN = CFG['news'].get('timespan', '30d')
+# GDELT pede no máximo ~1 requisição a cada 5 s; vale para todas as threads
+RATE_PER_S = float(CFG['news'].get('rate_per_s', 0.2))
+BURST      = float(CFG['news'].get('burst', 1))
+WORKERS    = int(CFG['news'].get('workers', 8))
 
 GDELT_ENDPOINT = 'https://api.gdeltproject.org/api/v2/doc/doc'
 HEADERS = {"User-Agent": "ai-compliance-agent/0.1 (+local)"}
 
-def _gdelt_get(params, retries=3, backoff=1.8):
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_maxsize=max(1, WORKERS)))
+_session.mount('http://', HTTPAdapter(pool_maxsize=max(1, WORKERS)))
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter() -> TokenBucket:
     """
-    GET com backoff exponencial para HTTP 429/5xx.
+    Token bucket global (rate_per_s / burst do config.yaml), criado sob demanda.
     """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(RATE_PER_S, BURST)
+        return _limiter
+
+def _retry_after(r):
+    try:
+        return float(r.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def _gdelt_get(params, retries=3, backoff=1.8, limiter=None):
+    """
+    GET limitado pelo token bucket global, com backoff exponencial para HTTP 429/5xx.
+    Um 429 ou 5xx pausa o bucket (Retry-After ou backoff), então todas as threads
+    esperam juntas em vez de repetir em sincronia.
+    """
+    limiter = limiter or get_limiter()
     last_exc = None
     for attempt in range(retries):
+        limiter.acquire()
         try:
-            r = requests.get(GDELT_ENDPOINT, params=params, headers=HEADERS, timeout=30)
+            r = _session.get(GDELT_ENDPOINT, params=params, headers=HEADERS, timeout=30)
             if r.status_code == 429:
 
-                sleep_s = (backoff ** attempt) + 0.5
-                time.sleep(sleep_s)
+                limiter.penalize(_retry_after(r) or (backoff ** attempt) + 0.5)
+                last_exc = HTTPError('429 Too Many Requests from GDELT', response=r)
                 continue
             r.raise_for_status()
             return r
@@ -29,42 +64,27 @@ def _gdelt_get(params, retries=3, backoff=1.8):
             last_exc = e
 
             if getattr(e.response, "status_code", None) and 500 <= e.response.status_code < 600:
-                time.sleep((backoff ** attempt) + 0.5)
+                limiter.penalize(_retry_after(e.response) or (backoff ** attempt) + 0.5)
                 continue
             break
 
     if last_exc:
         raise last_exc
 
-def search_company_news(company: str, max_articles: int = MAX_ARTS, timespan: str = TIMESPAN):
+def fetch_articles(query: str, max_articles: int = MAX_ARTS, timespan: str = TIMESPAN, limiter=None):
     """
-    Faz uma busca simples por manchetes recentes sobre 'company'.
-    Implementa backoff e retorna [] em erros tratáveis para o app mostrar mensagem amigável.
+    Busca bruta no modo ArtList (sem cache). Erros HTTP/rede são propagados.
     """
 
-    quoted = f"\"{company}\""
-
     params = {
-        "query": quoted,
+        "query": query,
         "mode": "ArtList",
         "format": "json",
         "maxrecords": max_articles,
         "timespan": timespan,
         "sort": "DateDesc",
     }
-
-    try:
-        r = _gdelt_get(params, retries=4, backoff=2.0)
-        js = r.json()
-    except HTTPError as e:
-
-        if e.response is not None and e.response.status_code == 429:
-            return []
-
-        raise
-    except RequestException:
-
-        return []
+    js = _gdelt_get(params, retries=4, backoff=2.0, limiter=limiter).json()
 
     arts = []
     for item in js.get('articles', []):
@@ -76,3 +96,44 @@ def search_company_news(company: str, max_articles: int = MAX_ARTS, timespan: st
             'seendate': item.get('seendate')
         })
     return arts
+
+def company_query(company: str) -> str:
+    """
+    Consulta GDELT para uma empresa: nome entre aspas, espaços normalizados.
+    """
+    return f"\"{' '.join(company.split())}\""
+
+def search_company_news(company: str, max_articles: int = MAX_ARTS, timespan: str = TIMESPAN,
+                        use_cache: bool = True):
+    """
+    Faz uma busca simples por manchetes recentes sobre 'company'.
+    Implementa backoff e retorna [] em erros tratáveis para o app mostrar mensagem amigável.
+    Respostas ficam no cache em disco (query, timespan) até expirar o TTL.
+    """
+
+    quoted = company_query(company)
+    cache = get_news_cache() if use_cache else None
+    if cache is not None:
+        arts = cache.get(quoted, timespan, max_articles)
+        if arts is not None:
+            return arts
+
+    with span('news.gdelt', company=company, max_articles=max_articles) as s:
+        try:
+            arts = fetch_articles(quoted, max_articles, timespan)
+        except HTTPError as e:
+
+            if e.response is not None and e.response.status_code == 429:
+                s.set(articles=0, rate_limited=True)
+                return []
+
+            raise
+        except RequestException as e:
+
+            s.set(articles=0, failed=type(e).__name__)
+            return []
+        s.set(articles=len(arts))
+
+    if cache is not None:
+        cache.set(quoted, timespan, max_articles, arts)
+    return arts
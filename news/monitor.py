@@ -0,0 +1,122 @@
+# monitor.py — concurrent news monitoring for many counterparties
+#
+# Usage:
+#   python -m news.monitor companies.txt [--timespan 30d] [--max-articles 10]
+#       [--workers 8] [--no-cache] [--out results.jsonl]
+#
+# companies.txt holds one company per line. Names are de-duplicated after
+# whitespace/case normalization, cached (query, timespan) results are
+# served from disk, and only the remaining queries are fetched by a thread
+# pool. Every request goes through the shared token bucket of
+# news.gdelt_search, so the whole batch honours GDELT's rate limit and
+# pauses together on HTTP 429.
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import HTTPError, RequestException
+
+from news.gdelt_search import (MAX_ARTS, TIMESPAN, WORKERS, company_query, fetch_articles,
+                               get_limiter)
+from news.news_cache import get_news_cache
+from telemetry.tracing import span
+
+
+def monitor_companies(companies, max_articles: int = MAX_ARTS, timespan: str = TIMESPAN,
+                      workers: int = WORKERS, use_cache: bool = True, limiter=None):
+
+    """
+    Fetch recent articles for many companies concurrently.
+
+    Args:
+        companies:    company names; duplicates (ignoring case/spacing) are
+                      fetched once.
+        max_articles: articles per company.
+        timespan:     GDELT timespan, e.g. '30d'.
+        workers:      threads issuing requests (the rate limit still
+                      applies across all of them).
+        use_cache:    read/write the on-disk news cache.
+        limiter:      TokenBucket to use (default: the shared GDELT bucket).
+
+    Returns:
+        (results, stats): results maps each input name to
+        {'articles': list, 'cached': bool, 'error': str|None}; stats counts
+        companies, unique queries, cache hits, fetched, errors and seconds.
+    """
+
+    companies = list(companies)
+    limiter = limiter or get_limiter()
+    cache = get_news_cache() if use_cache else None
+
+    # One query per normalized name
+    queries = {}
+    for name in companies:
+        queries.setdefault(company_query(name).lower(), company_query(name))
+
+    start = time.perf_counter()
+    found, todo = {}, []
+    for key, query in queries.items():
+        arts = cache.get(query, timespan, max_articles) if cache is not None else None
+        if arts is not None:
+            found[key] = {'articles': arts, 'cached': True, 'error': None}
+        else:
+            todo.append((key, query))
+
+    def fetch(query):
+        try:
+            arts = fetch_articles(query, max_articles, timespan, limiter=limiter)
+        except HTTPError as e:
+            status = getattr(e.response, 'status_code', None)
+            return {'articles': [], 'cached': False,
+                    'error': 'rate_limited' if status == 429 else f'HTTP {status}'}
+        except (RequestException, ValueError) as e:
+            return {'articles': [], 'cached': False, 'error': type(e).__name__}
+        if cache is not None:
+            cache.set(query, timespan, max_articles, arts)
+        return {'articles': arts, 'cached': False, 'error': None}
+
+    with span('news.monitor', companies=len(companies), queries=len(queries), fetched=len(todo)):
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as pool:
+                for (key, _), result in zip(todo, pool.map(fetch, [q for _, q in todo])):
+                    found[key] = result
+
+    results = {name: found[company_query(name).lower()] for name in companies}
+    stats = {
+        'companies': len(companies),
+        'queries': len(queries),
+        'cache_hits': len(queries) - len(todo),
+        'fetched': len(todo),
+        'errors': sum(1 for r in found.values() if r['error']),
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    return results, stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch GDELT news for many companies.')
+    parser.add_argument('companies', help='text file with one company per line')
+    parser.add_argument('--timespan', default=TIMESPAN)
+    parser.add_argument('--max-articles', type=int, default=MAX_ARTS)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--out', help='JSONL output (default: stdout)')
+    args = parser.parse_args()
+
+    with open(args.companies, 'r', encoding='utf-8') as f:
+        companies = [line.strip() for line in f if line.strip()]
+    results, stats = monitor_companies(companies, args.max_articles, args.timespan,
+                                       workers=args.workers, use_cache=not args.no_cache)
+
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    try:
+        for name, r in results.items():
+            out.write(json.dumps({'company': name, **r}, ensure_ascii=False) + '\n')
+    finally:
+        if args.out:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
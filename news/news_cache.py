@@ -0,0 +1,113 @@
+# news_cache.py — on-disk TTL cache of GDELT article lists
+#
+# Keyed by (query, timespan). A row also records how many articles were
+# requested, so a lookup for up to that many is served from the cache and
+# a larger request refetches.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import yaml
+
+# ---------------------------------------------------------------------------
+# Load cache configuration from YAML
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_NC_CFG = CFG['news'].get('cache', {}) or {}
+
+CACHE_ENABLED = bool(_NC_CFG.get('enabled', True))
+CACHE_PATH    = _NC_CFG.get('path', 'news/cache/gdelt.sqlite')
+CACHE_TTL_S   = float(_NC_CFG.get('ttl_s', 3600))
+
+
+class NewsCache:
+
+    """
+    SQLite-backed cache of article lists with TTL expiry.
+
+    Args:
+        path:  SQLite file.
+        ttl_s: seconds a fetched list stays valid.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl_s: float = CACHE_TTL_S):
+        self.ttl_s = float(ttl_s)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            ' query TEXT NOT NULL, timespan TEXT NOT NULL, max_articles INTEGER NOT NULL,'
+            ' articles TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (query, timespan))'
+        )
+        self._conn.commit()
+
+    def get(self, query: str, timespan: str, max_articles: int):
+
+        """
+        Cached article list (at most `max_articles`) or None if missing,
+        expired, or fetched with a smaller limit.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT max_articles, articles FROM articles'
+                ' WHERE query = ? AND timespan = ? AND created > ?',
+                (query, timespan, time.time() - self.ttl_s),
+            ).fetchone()
+            if row is None or row[0] < max_articles:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[1])[:max_articles]
+
+    def set(self, query: str, timespan: str, max_articles: int, articles):
+        data = json.dumps(articles, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('DELETE FROM articles WHERE created <= ?', (now - self.ttl_s,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO articles (query, timespan, max_articles, articles, created)'
+                ' VALUES (?, ?, ?, ?, ?)', (query, timespan, int(max_articles), data, now))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'entries': entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_news_cache():
+
+    """
+    Return the process-wide news cache from config.yaml (None if disabled).
+    """
+
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = NewsCache(CACHE_PATH)
+        return _default_cache
@@ -0,0 +1,69 @@
+# rate_limit.py — thread-safe token bucket shared by all GDELT requests
+
+import time
+import threading
+
+
+class TokenBucket:
+
+    """
+    Token bucket rate limiter with a global pause for server push-back.
+
+    Args:
+        rate_per_s: tokens added per second (sustained request rate).
+        burst:      bucket capacity (requests allowed back to back).
+
+    Notes:
+        - `acquire()` blocks the calling thread until a token is available.
+        - `penalize(s)` empties the bucket and pauses every caller for `s`
+          seconds, e.g. after HTTP 429 / Retry-After, so concurrent workers
+          back off together instead of each retrying on its own schedule.
+    """
+
+    def __init__(self, rate_per_s: float, burst: float = 1):
+        if rate_per_s <= 0:
+            raise ValueError('rate_per_s must be positive')
+        self.rate = float(rate_per_s)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = None) -> bool:
+
+        """
+        Take one token, waiting as needed. Returns False if `timeout`
+        seconds pass first.
+        """
+
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited_s += now - start
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if timeout is not None:
+                left = timeout - (time.monotonic() - start)
+                if left <= 0:
+                    return False
+                wait = min(wait, left)
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, now + float(seconds))
+            self.penalties += 1
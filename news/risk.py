@@ -0,0 +1,342 @@
+# risk.py — batch reputational-risk scoring of news articles
+#
+# Usage:
+#   python -m news.risk watchlist.txt [--timespan 30d] [--max-articles 25]
+#       [--batch-tokens 1200] [--workers 2] [--out scores.jsonl]
+#
+# Pipeline:
+#   1. articles are de-duplicated by normalized URL and normalized title
+#      (syndicated copies of one story usually share the title)
+#   2. articles already in the score store are not sent again
+#   3. the rest are packed into numbered headline lists under a token
+#      budget, and the batches are scored concurrently through OllamaClient
+#      (its max_in_flight admission control bounds the load on Ollama)
+#   4. per-article scores are written to the store as each batch finishes
+#
+# The model answers in Ollama JSON mode:
+#   {"scores": [{"id": 1, "score": 0-100, "category": "...", "reason": "..."}]}
+# Articles missing from a reply stay unscored and are retried next run.
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import yaml
+
+from ingestion.splitters import approx_tokens
+from models.llm_client import get_client
+from telemetry.tracing import span
+
+# ---------------------------------------------------------------------------
+# Load risk-scoring configuration from YAML
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_RISK_CFG = CFG['news'].get('risk', {}) or {}
+
+STORE_PATH   = _RISK_CFG.get('store_path', 'news/cache/risk.sqlite')
+BATCH_TOKENS = int(_RISK_CFG.get('batch_tokens', 1200))
+MAX_BATCH    = int(_RISK_CFG.get('max_batch', 25))
+WORKERS      = int(_RISK_CFG.get('workers', CFG['llm'].get('max_in_flight', 2)))
+
+SYSTEM_RISK = (
+    "You are a compliance analyst scoring news headlines for reputational risk "
+    "(corruption, sanctions, fraud, product safety, labor, data breach, environment). "
+    "Reply with JSON only."
+)
+PROMPT_HEADER = (
+    "Score each numbered headline from 0 (no risk) to 100 (severe risk) for the company named in it.\n"
+    'Return {"scores": [{"id": <number>, "score": <0-100>, "category": <short label>, '
+    '"reason": <one sentence>}]} with one entry per headline.\n\nHEADLINES:\n'
+)
+_PUNCT_RE = re.compile(r'[^\w\s]', re.UNICODE)
+# Query parameters that only track the click (utm_* is matched by prefix)
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl'}
+
+
+def normalize_url(url: str) -> str:
+
+    """
+    Scheme-, www- and fragment-free URL, host and path lowercased without
+    trailing slash. The query string is kept (it often identifies the
+    article) minus tracking parameters (utm_*, fbclid, ...).
+    """
+
+    parts = urlsplit((url or '').strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith('www.') else host
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS])
+    return f'{host}{parts.path.rstrip("/")}'.lower() + (f'?{query}' if query else '')
+
+def normalize_title(title: str) -> str:
+    return ' '.join(_PUNCT_RE.sub(' ', (title or '').casefold()).split())
+
+def article_key(article: dict) -> str:
+
+    """
+    Stable store key of an article: its normalized URL, else its title.
+    """
+
+    raw = normalize_url(article.get('url')) or normalize_title(article.get('title'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def dedupe_articles(articles):
+
+    """
+    Keep the first article per normalized URL and per normalized title.
+    """
+
+    seen_urls, seen_titles, out = set(), set(), []
+    for a in articles:
+        url, title = normalize_url(a.get('url')), normalize_title(a.get('title'))
+        if (url and url in seen_urls) or (title and title in seen_titles):
+            continue
+        seen_urls.add(url)
+        seen_titles.add(title)
+        out.append(a)
+    return out
+
+def _line(i: int, article: dict) -> str:
+    return f"{i}. {' '.join((article.get('title') or '').split())} ({article.get('domain') or ''})"
+
+def pack_batches(articles, max_tokens: int = BATCH_TOKENS, max_items: int = MAX_BATCH,
+                 count_tokens=approx_tokens):
+
+    """
+    Greedily group articles so each prompt's headline list stays within
+    `max_tokens` (prompt header excluded) and `max_items` headlines.
+
+    Returns:
+        List[List[dict]]: batches in input order; a single headline over
+        the budget still gets a batch of its own.
+    """
+
+    batches, current, used = [], [], 0
+    for a in articles:
+        cost = count_tokens(_line(len(current) + 1, a))
+        if current and (used + cost > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+            cost = count_tokens(_line(1, a))
+        current.append(a)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def build_prompt(batch) -> str:
+    return PROMPT_HEADER + '\n'.join(_line(i, a) for i, a in enumerate(batch, 1))
+
+def parse_scores(text: str, n: int):
+
+    """
+    Map headline number (1..n) -> {'score', 'category', 'reason'} from a
+    model reply; malformed entries are dropped.
+    """
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        match = re.search(r'\{.*\}|\[.*\]', text or '', re.S)
+        try:
+            data = json.loads(match.group(0)) if match else {}
+        except ValueError:
+            data = {}
+    items = data.get('scores', []) if isinstance(data, dict) else data
+    out = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            i, score = int(item['id']), float(item['score'])
+        except (TypeError, KeyError, ValueError):
+            continue
+        if 1 <= i <= n:
+            out[i] = {
+                'score': int(round(min(100.0, max(0.0, score)))),
+                'category': str(item.get('category') or ''),
+                'reason': str(item.get('reason') or ''),
+            }
+    return out
+
+
+class RiskStore:
+
+    """
+    SQLite store of per-article risk scores keyed by article_key().
+
+    Args:
+        path: SQLite file.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS scores ('
+            ' key TEXT PRIMARY KEY, url TEXT, title TEXT, company TEXT, score INTEGER NOT NULL,'
+            ' category TEXT, reason TEXT, model TEXT, created REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+
+        """
+        {key: row dict} for the keys already scored.
+        """
+
+        keys = list(keys)
+        out = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f'SELECT key, url, title, company, score, category, reason FROM scores'
+                    f' WHERE key IN ({",".join("?" * len(part))})', part).fetchall()
+                for key, url, title, company, score, category, reason in rows:
+                    out[key] = {'url': url, 'title': title, 'company': company, 'score': score,
+                                'category': category, 'reason': reason}
+        return out
+
+    def put_many(self, rows, model: str = None):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO scores (key, url, title, company, score, category, reason, model, created)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(r['key'], r.get('url'), r.get('title'), r.get('company'), r['score'],
+                  r.get('category'), r.get('reason'), model, now) for r in rows])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+def get_risk_store():
+
+    """
+    Return the process-wide risk score store (news.risk.store_path).
+    """
+
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = RiskStore(STORE_PATH)
+        return _default_store
+
+
+def score_articles(articles, client=None, store: RiskStore = None, max_tokens: int = BATCH_TOKENS,
+                   max_items: int = MAX_BATCH, workers: int = WORKERS):
+
+    """
+    Score articles for reputational risk, reusing stored scores.
+
+    Args:
+        articles:   dicts with title, url, domain (and optionally company),
+                    e.g. from news.gdelt_search / news.monitor.
+        client:     OllamaClient (default: the shared client).
+        store:      RiskStore (default: the shared store, get_risk_store()).
+        max_tokens: headline tokens per LLM call.
+        max_items:  headlines per LLM call.
+        workers:    batches in flight (the client's max_in_flight still caps
+                    concurrent generations).
+
+    Returns:
+        (scored, stats): scored is one dict per unique article (article
+        fields + key, score, category, reason, cached), highest score
+        first; articles the model did not score are left out. stats counts
+        articles, unique, cached, sent, scored, batches, failed_batches,
+        seconds and articles_per_s.
+    """
+
+    client = client or get_client()
+    store = store or get_risk_store()
+    start = time.perf_counter()
+
+    unique = dedupe_articles(articles)
+    keyed = [dict(a, key=article_key(a)) for a in unique]
+    known = store.get_many(a['key'] for a in keyed)
+    scored = [dict(a, **{f: known[a['key']][f] for f in ('score', 'category', 'reason')}, cached=True)
+              for a in keyed if a['key'] in known]
+    todo = [a for a in keyed if a['key'] not in known]
+    batches = pack_batches(todo, max_tokens, max_items)
+
+    def run(batch):
+        with span('news.risk_batch', articles=len(batch)):
+            reply = client.generate(build_prompt(batch), temperature=0.0, system=SYSTEM_RISK, format='json')
+        found = parse_scores(reply, len(batch))
+        rows = [dict(a, **found[i], cached=False) for i, a in enumerate(batch, 1) if i in found]
+        store.put_many(rows, model=client.model)
+        return rows
+
+    failed = 0
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+            for fut in as_completed([pool.submit(run, b) for b in batches]):
+                try:
+                    scored.extend(fut.result())
+                except Exception:
+                    # One failed call (timeout, Ollama error) only skips its batch
+                    failed += 1
+
+    scored.sort(key=lambda a: -a['score'])
+    elapsed = time.perf_counter() - start
+    stats = {
+        'articles': len(articles),
+        'unique': len(unique),
+        'cached': len(known),
+        'sent': len(todo),
+        'scored': sum(1 for a in scored if not a['cached']),
+        'batches': len(batches),
+        'failed_batches': failed,
+        'seconds': round(elapsed, 2),
+        'articles_per_s': round(len(unique) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    return scored, stats
+
+def main():
+    from news.monitor import monitor_companies
+
+    parser = argparse.ArgumentParser(description='Fetch news for a watchlist and score reputational risk.')
+    parser.add_argument('watchlist', help='text file with one company per line')
+    parser.add_argument('--timespan', default=CFG['news'].get('timespan', '30d'))
+    parser.add_argument('--max-articles', type=int, default=int(CFG['news'].get('max_articles', 10)))
+    parser.add_argument('--batch-tokens', type=int, default=BATCH_TOKENS)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--out', help='JSONL output (default: stdout)')
+    args = parser.parse_args()
+
+    with open(args.watchlist, 'r', encoding='utf-8') as f:
+        companies = [line.strip() for line in f if line.strip()]
+    results, fetch_stats = monitor_companies(companies, args.max_articles, args.timespan)
+    articles = [dict(a, company=name) for name, r in results.items() for a in r['articles']]
+
+    scored, stats = score_articles(articles, max_tokens=args.batch_tokens, workers=args.workers)
+
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    try:
+        for a in scored:
+            out.write(json.dumps(a, ensure_ascii=False) + '\n')
+    finally:
+        if args.out:
+            out.close()
+    print(f"fetch: {json.dumps(fetch_stats)}", file=sys.stderr)
+    print(f"score: {json.dumps(stats)}", file=sys.stderr)
+    print(f"{stats['unique']} articles in {stats['seconds']}s -> {stats['articles_per_s']} articles/s "
+          f"({stats['cached']} already scored, {stats['batches']} LLM calls)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
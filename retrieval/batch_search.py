@@ -0,0 +1,75 @@
+# batch_search.py — offline retrieval over a JSONL file of questions
+#
+# Usage:
+#   python -m retrieval.batch_search questions.jsonl [--out hits.jsonl] [--k 4]
+#
+# Each input line is a JSON object with a "question" (or "query") field and
+# an optional "id". One output line is written per input line, in order:
+#   {"id": ..., "question": ..., "hits": [{score, doc_path, chunk_id, text}, ...]}
+# Questions are processed in chunks, so results stream out while the file is
+# still being read and memory stays bounded for very large inputs.
+
+import sys
+import json
+import argparse
+from itertools import islice
+
+from retrieval.retriever import search_many, TOP_K
+
+
+def _read_questions(f):
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        question = row.get('question', row.get('query'))
+        if not isinstance(question, str):
+            raise ValueError(f'line {lineno}: expected a "question" string field')
+        yield row.get('id', lineno), question
+
+def run(src, dst, k: int = TOP_K, chunk_size: int = 256):
+
+    """
+    Stream questions from `src` (file object) to hit lists in `dst`.
+
+    Returns:
+        int: number of questions processed.
+    """
+
+    rows = _read_questions(src)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        results = search_many([q for _, q in chunk], k)
+        for (qid, question), hits in zip(chunk, results):
+            dst.write(json.dumps({'id': qid, 'question': question, 'hits': hits},
+                                 ensure_ascii=False) + '\n')
+        dst.flush()
+        total += len(chunk)
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch retrieval over a JSONL file of questions.')
+    parser.add_argument('questions', help="JSONL input ('-' for stdin)")
+    parser.add_argument('--out', default='-', help="JSONL output ('-' for stdout)")
+    parser.add_argument('--k', type=int, default=TOP_K, help='hits per question')
+    parser.add_argument('--chunk-size', type=int, default=256,
+                        help='questions encoded and searched together')
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.questions == '-' else open(args.questions, 'r', encoding='utf-8')
+    dst = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    try:
+        n = run(src, dst, k=args.k, chunk_size=args.chunk_size)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f'Processed {n} questions', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
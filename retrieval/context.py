@@ -0,0 +1,209 @@
+# context.py — assemble the RAG context from retrieved hits under a token budget
+#
+# search() hits -> pack_context() -> prompt:
+#   - exact and contained duplicates (same text under another id/doc) are
+#     dropped
+#   - consecutive chunks of one doc_path are merged into one block; the
+#     overlap the character splitter repeats at chunk boundaries is cut only
+#     when that splitter is configured with overlap (the structured splitter
+#     adds none) and the match is at least `min_overlap_chars` long, else
+#     chunks are joined with a newline
+#   - blocks are filled best-score-first until `max_tokens`; a hit that
+#     would overflow the budget is skipped (the best hit is truncated
+#     rather than dropped)
+#
+# The result reports raw vs packed tokens so savings can be tied to
+# prefill latency (`prompt.pack` span, see telemetry.tracing).
+# build_rag_prompt() is the compliance prompt shared by the Streamlit app,
+# the HTTP service and the benchmarks.
+
+import yaml
+
+from ingestion.splitters import approx_tokens
+from retrieval.retriever import format_citations
+from telemetry.tracing import span
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_CTX_CFG = CFG['retrieval'].get('context', {}) or {}
+
+CONTEXT_MAX_TOKENS = int(_CTX_CFG.get('max_tokens', 1500))
+MAX_OVERLAP_CHARS  = int(_CTX_CFG.get('max_overlap_chars', 400))
+MIN_OVERLAP_CHARS  = int(_CTX_CFG.get('min_overlap_chars', 30))
+# Overlap the configured splitter repeats between consecutive chunks
+_SPLIT_CFG = CFG['retrieval'].get('splitter', {}) or {}
+CHUNK_OVERLAP = int(_SPLIT_CFG.get('overlap', 150)) if _SPLIT_CFG.get('mode', 'structured') == 'chars' else 0
+SEPARATOR = '\n\n---\n\n'
+
+SYSTEM_COMPLIANCE = (
+    "You are the company's compliance assistant. "
+    "Rules:\n"
+    "1) Prefer to answer based on the retrieved policy/law excerpts provided (CONTEXT). "
+    "2) If the policy is silent, say so and suggest contacting Compliance. "
+    "3) Do NOT add a separate 'Citations' section unless explicitly requested. "
+    "4) When you rely on a rule, cite it inline in parentheses like (POL-ABAC-002, Art. 12). "
+    "5) Keep quotes short when clarifying thresholds/prohibitions."
+)
+
+
+def _norm(text: str) -> str:
+    return ' '.join(text.split())
+
+def overlap_len(a: str, b: str, max_chars: int = MAX_OVERLAP_CHARS, min_chars: int = MIN_OVERLAP_CHARS) -> int:
+
+    """
+    Length of the longest suffix of `a` that is also a prefix of `b`, or 0
+    when shorter than `min_chars` (short matches are coincidences such as
+    "Officer" + "rules", not repeated text).
+    """
+
+    for k in range(min(len(a), len(b), max_chars), max(1, min_chars) - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+def dedupe_hits(hits):
+
+    """
+    Drop hits whose (whitespace-normalized) text equals or is contained in
+    a better-scored hit's text. Hits are assumed best-first.
+    """
+
+    kept, texts = [], []
+    for h in hits:
+        t = _norm(h['text'])
+        if not t or any(t in other for other in texts):
+            continue
+        kept.append(h)
+        texts.append(t)
+    return kept
+
+def _blocks(selected, chunk_overlap: int = CHUNK_OVERLAP):
+
+    """
+    Merge runs of consecutive chunk_ids per doc_path into text blocks,
+    cutting up to `chunk_overlap` repeated chars at each boundary.
+    Returns blocks best-score-first: {'doc_path', 'hits', 'text', 'score'}.
+    """
+
+    by_doc = {}
+    for h in selected:
+        by_doc.setdefault(h['doc_path'], []).append(h)
+
+    blocks = []
+    for doc_path, group in by_doc.items():
+        group.sort(key=lambda h: h['chunk_id'])
+        run = [group[0]]
+        for h in group[1:]:
+            if h['chunk_id'] == run[-1]['chunk_id'] + 1:
+                run.append(h)
+            else:
+                blocks.append(run)
+                run = [h]
+        blocks.append(run)
+
+    out = []
+    for run in blocks:
+        text = run[0]['text']
+        for prev, h in zip(run, run[1:]):
+            cut = overlap_len(prev['text'], h['text'], max_chars=chunk_overlap,
+                              min_chars=min(MIN_OVERLAP_CHARS, chunk_overlap)) if chunk_overlap > 0 else 0
+            joined = h['text'][cut:]
+            text = text + joined if cut else f'{text}\n{joined}'
+        out.append({'doc_path': run[0]['doc_path'], 'hits': run, 'text': text.strip(),
+                    'score': max(h['score'] for h in run)})
+    out.sort(key=lambda b: -b['score'])
+    return out
+
+def _truncate(text: str, max_tokens: int, count_tokens) -> str:
+    words = text.split(' ')
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(' '.join(words[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return ' '.join(words[:lo])
+
+def pack_context(hits, max_tokens: int = CONTEXT_MAX_TOKENS, count_tokens=approx_tokens,
+                 separator: str = SEPARATOR, chunk_overlap: int = CHUNK_OVERLAP):
+
+    """
+    Build the prompt context from search() hits.
+
+    Args:
+        hits:         search() output (score, doc_path, chunk_id, text, ...),
+                      best first.
+        max_tokens:   budget for the context text (None = unlimited).
+        count_tokens: token counter, e.g. ingestion.splitters.make_token_counter.
+        separator:    placed between blocks.
+        chunk_overlap: chars the splitter repeats between consecutive chunks
+                      (retrieval.splitter.overlap in chars mode, else 0).
+
+    Returns:
+        dict:
+            text          packed context
+            hits          hits whose text is in the context (for citations),
+                          in block order
+            blocks        number of merged blocks
+            raw_tokens    tokens of the plain concatenation of all hits
+            tokens        tokens of `text`
+            saved_tokens  raw_tokens - tokens
+            dropped       hits left out (duplicates or over budget)
+    """
+
+    hits = sorted(hits, key=lambda h: -h['score'])
+    raw_tokens = count_tokens(separator.join(h['text'] for h in hits)) if hits else 0
+
+    with span('prompt.pack', hits=len(hits), max_tokens=max_tokens) as s:
+        unique = dedupe_hits(hits)
+        selected, blocks, text = [], [], ''
+        for h in unique:
+            trial = _blocks(selected + [h], chunk_overlap)
+            trial_text = separator.join(b['text'] for b in trial)
+            if max_tokens is None or count_tokens(trial_text) <= max_tokens:
+                selected.append(h)
+                blocks, text = trial, trial_text
+            elif not selected:
+                # Even the best hit alone is over budget: keep its head
+                cut = dict(h, text=_truncate(h['text'], max_tokens, count_tokens))
+                selected.append(cut)
+                blocks = _blocks(selected, chunk_overlap)
+                text = blocks[0]['text']
+
+        tokens = count_tokens(text) if text else 0
+        result = {
+            'text': text,
+            'hits': [h for b in blocks for h in b['hits']],
+            'blocks': len(blocks),
+            'raw_tokens': raw_tokens,
+            'tokens': tokens,
+            'saved_tokens': raw_tokens - tokens,
+            'dropped': len(hits) - len(selected),
+        }
+        s.set(blocks=result['blocks'], raw_tokens=raw_tokens, tokens=tokens,
+              saved_tokens=result['saved_tokens'], dropped=result['dropped'])
+    return result
+
+def build_rag_prompt(question: str, hits, max_tokens: int = CONTEXT_MAX_TOKENS):
+
+    """
+    Compliance prompt for `question` over packed `hits`.
+
+    Returns:
+        (prompt, packed, citations): packed is pack_context() output and
+        citations the format_citations() of the hits used in the context.
+    """
+
+    packed = pack_context(hits, max_tokens=max_tokens)
+    cits = format_citations(packed['hits'])
+    cite_hint = '; '.join(f"{c['source']}" + (f" Art. {c['article']}" if c['article'] else '') for c in cits)
+    prompt = (
+        f"CONTEXT (policy/law excerpts):\n{packed['text']}\n\n"
+        f"Question: {question}\n\n"
+        "Answer in a warm, professional tone. "
+        "If you assert a rule, cite it inline like (FILE, Art. X). "
+        "Do not add a separate 'Citations' section unless asked.\n\n"
+        f"Source hint: {cite_hint}"
+    )
+    return prompt, packed, cits
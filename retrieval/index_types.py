@@ -0,0 +1,391 @@
+# index_types.py — FAISS index factory (Flat / IVF-Flat / IVF-PQ / HNSW)
+
+import os
+from collections import namedtuple
+import faiss
+import numpy as np
+import yaml
+
+# ---------------------------------------------------------------------------
+# Load index configuration from YAML (retrieval.index)
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+INDEX_CFG = CFG['retrieval'].get('index', {}) or {}
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+# FAISS k-means warns below ~39 training points per centroid
+_MIN_POINTS_PER_CENTROID = 39
+
+# Sidecar files next to a flat index for memory-mapped serving (MappedFlatIndex)
+FLAT_VECTORS = 'vectors.npy'
+FLAT_IDS     = 'vector_ids.npy'
+
+
+def _settings(cfg=None):
+    cfg = dict(INDEX_CFG if cfg is None else cfg)
+    kind = str(cfg.get('type', 'flat')).lower()
+    if kind not in INDEX_TYPES:
+        raise ValueError(f'Unknown retrieval.index.type {kind!r}; expected one of {INDEX_TYPES}')
+    return {
+        'type': kind,
+        'nlist': int(cfg.get('nlist', 256)),
+        'nprobe': int(cfg.get('nprobe', 16)),
+        'pq_m': int(cfg.get('pq_m', 48)),
+        'pq_nbits': int(cfg.get('pq_nbits', 8)),
+        'hnsw_m': int(cfg.get('hnsw_m', 32)),
+        'ef_construction': int(cfg.get('ef_construction', 200)),
+        'ef_search': int(cfg.get('ef_search', 64)),
+        'train_size': int(cfg.get('train_size', 50_000)),
+    }
+
+def _largest_divisor(d: int, at_most: int) -> int:
+    for m in range(min(d, at_most), 0, -1):
+        if d % m == 0:
+            return m
+    return 1
+
+def create_index(dim: int, n_train: int, cfg=None):
+
+    """
+    Create an untrained inner-product index of the configured type.
+
+    Args:
+        dim:     embedding dimension.
+        n_train: number of vectors available for training; IVF/PQ parameters
+                 are clamped so small corpora still train correctly.
+        cfg:     dict like `retrieval.index` (defaults to config.yaml).
+
+    Returns:
+        faiss.Index: the inner index (not yet wrapped in an id map).
+    """
+
+    s = _settings(cfg)
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if s['type'] == 'flat':
+        return faiss.IndexFlatIP(dim)
+
+    if s['type'] == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, s['hnsw_m'], metric)
+        index.hnsw.efConstruction = s['ef_construction']
+        return index
+
+    nlist = max(1, min(s['nlist'], n_train // _MIN_POINTS_PER_CENTROID))
+    quantizer = faiss.IndexFlatIP(dim)
+    if s['type'] == 'ivf_flat':
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+
+    # IVF-PQ: sub-quantizers must divide dim; codebooks need >= 2**nbits points
+    pq_m = _largest_divisor(dim, s['pq_m'])
+    nbits = max(1, min(s['pq_nbits'], int(np.log2(max(2, n_train)))))
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, metric)
+
+def apply_search_params(index, cfg=None):
+
+    """
+    Set query-time knobs (IVF nprobe, HNSW efSearch) on a loaded index.
+    Works through IndexIDMap/IndexIDMap2 wrappers; no-op for flat indexes.
+    """
+
+    s = _settings(cfg)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(s['nprobe'], ivf.nlist)
+        return index
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = s['ef_search']
+    return index
+
+def make_selector(index, ids):
+
+    """
+    Selector accepting the sorted int64 `ids`, for search_params(): a FAISS
+    IDSelectorBatch, or a row mask for MappedFlatIndex.
+    """
+
+    if isinstance(index, MappedFlatIndex):
+        return index.row_mask(ids)
+    return faiss.IDSelectorBatch(ids)
+
+def search_params(index, sel):
+
+    """
+    SearchParameters restricting `index.search` to the ids accepted by `sel`
+    (see make_selector), carrying the index's current nprobe / efSearch so
+    filtered queries are tuned like unfiltered ones.
+
+    The filter is applied inside the scan (IVF lists / HNSW walk / flat
+    scan), so k hits are returned whenever k matching vectors exist.
+    """
+
+    if isinstance(index, MappedFlatIndex):
+        return MappedSearchParams(sel)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=sel, nprobe=ivf.nprobe)
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=sel)
+
+def subset_vectors(index, ids):
+
+    """
+    Stored vectors of `ids` (row i = ids[i]) for exact scoring of small
+    filtered subsets, or None when the index cannot reconstruct (IVF
+    without a direct map).
+    """
+
+    try:
+        return index.reconstruct_batch(np.asarray(ids, dtype='int64'))
+    except RuntimeError:
+        return None
+
+
+def partition_index(index, ids):
+
+    """
+    Flat index holding only the vectors of `ids`, so searches within a
+    fixed scope scan that subset instead of the whole index behind a
+    selector (same results). None unless `index` is an in-memory id-mapped
+    flat index: a copy of a memory-mapped index would no longer be shared.
+    """
+
+    if not hasattr(index, 'id_map') or not isinstance(faiss.downcast_index(index.index), faiss.IndexFlat):
+        return None
+    ids = np.asarray(ids, dtype='int64')
+    part = faiss.IndexIDMap2(faiss.IndexFlatIP(index.d))
+    part.add_with_ids(index.reconstruct_batch(ids), ids)
+    return part
+
+
+def flat_vectors_paths(index_path: str):
+
+    """
+    (vectors, ids) sidecar paths of the index written at `index_path`.
+    """
+
+    directory = os.path.dirname(index_path)
+    return os.path.join(directory, FLAT_VECTORS), os.path.join(directory, FLAT_IDS)
+
+def write_flat_vectors(index, index_path: str) -> bool:
+
+    """
+    Write the vectors of an id-mapped flat index as .npy files next to
+    `index_path` (rows sorted by id), so read_index(mmap=True) can map them.
+    Returns False (nothing written) for other index types.
+    """
+
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else None
+    if not isinstance(inner, faiss.IndexFlat):
+        return False
+    ids = faiss.vector_to_array(index.id_map).astype('int64')
+    order = np.argsort(ids, kind='stable')
+    vectors_path, ids_path = flat_vectors_paths(index_path)
+    np.save(vectors_path, inner.reconstruct_n(0, inner.ntotal)[order])
+    np.save(ids_path, ids[order])
+    return True
+
+def read_index(path: str, mmap: bool = False):
+
+    """
+    Load an index written by ingestion and apply the query-time settings.
+
+    Args:
+        path: file written with faiss.write_index.
+        mmap: open it read-only and memory-mapped, so processes serving the
+              same snapshot share its pages through the OS page cache.
+
+    Notes:
+        - FAISS maps the inverted lists of IVF indexes (the bulk of their
+          size); flat indexes are served from the vectors.npy sidecar
+          (write_flat_vectors) as a MappedFlatIndex when it exists.
+        - Flat indexes without the sidecar and HNSW graphs are read into
+          memory either way.
+    """
+
+    if not mmap:
+        return apply_search_params(faiss.read_index(path))
+    vectors_path, ids_path = flat_vectors_paths(path)
+    if os.path.exists(vectors_path) and os.path.exists(ids_path):
+        return MappedFlatIndex(np.load(vectors_path, mmap_mode='r'), np.load(ids_path, mmap_mode='r'))
+    return apply_search_params(faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY))
+
+
+# Filtered-search parameters of MappedFlatIndex (sel = boolean row mask)
+MappedSearchParams = namedtuple('MappedSearchParams', 'sel')
+
+
+class MappedFlatIndex:
+
+    """
+    Read-only exact inner-product search over memory-mapped vectors; a
+    stand-in for a loaded IndexIDMap2(IndexFlatIP) with the same search /
+    reconstruct_batch results.
+
+    FAISS copies flat indexes into each process even with IO_FLAG_MMAP;
+    numpy maps the .npy sidecar instead, so every worker scans the same
+    page-cache copy of the vectors.
+
+    Args:
+        vectors: (n, d) float32 array, rows sorted by id.
+        ids:     (n,) sorted int64 vector ids.
+    """
+
+    # Rows scored per matrix product (bounds the temporary score matrix)
+    BLOCK = 65536
+
+    def __init__(self, vectors, ids):
+        self.vectors = vectors
+        self.ids = ids
+        self.ntotal = int(len(ids))
+        self.d = int(vectors.shape[1]) if vectors.ndim == 2 else 0
+
+    def row_mask(self, ids):
+        return _rows_in(self.ids, np.asarray(ids, dtype='int64'))
+
+    def search(self, x, k: int, params=None):
+
+        """
+        FAISS-style (scores, ids), best first; padded with -inf / -1.
+        """
+
+        x = np.ascontiguousarray(x, dtype='float32')
+        mask = getattr(params, 'sel', None)
+        best_s = np.full((len(x), k), -np.inf, dtype='float32')
+        best_i = np.full((len(x), k), -1, dtype='int64')
+        for start in range(0, self.ntotal, self.BLOCK):
+            block = slice(start, start + self.BLOCK)
+            sims = x @ self.vectors[block].T
+            if mask is not None:
+                sims[:, ~mask[block]] = -np.inf
+            cand_s = np.concatenate([best_s, sims], axis=1)
+            cand_i = np.concatenate([best_i, np.broadcast_to(self.ids[block], sims.shape)], axis=1)
+            top = np.argpartition(-cand_s, k - 1, axis=1)[:, :k]
+            best_s = np.take_along_axis(cand_s, top, axis=1)
+            best_i = np.take_along_axis(cand_i, top, axis=1)
+        order = np.argsort(-best_s, axis=1, kind='stable')
+        best_s = np.take_along_axis(best_s, order, axis=1)
+        best_i = np.take_along_axis(best_i, order, axis=1)
+        best_i[best_s == -np.inf] = -1
+        return best_s, best_i
+
+    def reconstruct_batch(self, ids):
+        ids = np.asarray(ids, dtype='int64')
+        rows = np.minimum(np.searchsorted(self.ids, ids), max(self.ntotal - 1, 0))
+        if len(ids) and (not self.ntotal or (self.ids[rows] != ids).any()):
+            raise RuntimeError('id not found in index')
+        return np.array(self.vectors[rows], dtype='float32')
+
+
+def _rows_in(sorted_ids, ids):
+    mask = np.zeros(len(sorted_ids), dtype=bool)
+    if len(sorted_ids) and len(ids):
+        pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        mask[pos[sorted_ids[pos] == ids]] = True
+    return mask
+
+
+class IndexBuilder:
+
+    """
+    Incrementally build an id-mapped index from streamed (vectors, ids) batches.
+
+    Flat/HNSW indexes receive vectors immediately. IVF indexes buffer the
+    first `train_size` vectors, train on them, then add the buffer and pass
+    later batches straight through, so memory beyond the index itself is
+    bounded by the training sample.
+
+    Args:
+        cfg:   dict like `retrieval.index` (defaults to config.yaml).
+        index: existing trained IndexIDMap2 to extend (incremental updates).
+    """
+
+    def __init__(self, cfg=None, index=None):
+        self.cfg = cfg
+        self.train_size = _settings(cfg)['train_size']
+        self.index = index
+        self._buf, self._buf_ids, self._buffered = [], [], 0
+
+    def add(self, mat, ids):
+        mat = np.ascontiguousarray(mat, dtype='float32')
+        ids = np.asarray(ids, dtype='int64')
+        if not len(mat):
+            return
+        if self.index is None:
+            if _settings(self.cfg)['type'] in ('flat', 'hnsw'):
+                self.index = faiss.IndexIDMap2(create_index(mat.shape[1], 0, self.cfg))
+            else:
+                self._buf.append(mat)
+                self._buf_ids.append(ids)
+                self._buffered += len(mat)
+                if self._buffered >= self.train_size:
+                    self._train_and_flush()
+                return
+        self.index.add_with_ids(mat, ids)
+
+    def _train_and_flush(self):
+        sample = np.vstack(self._buf)
+        inner = create_index(sample.shape[1], len(sample), self.cfg)
+        inner.train(sample)
+        self.index = faiss.IndexIDMap2(inner)
+        self.index.add_with_ids(sample, np.concatenate(self._buf_ids))
+        self._buf, self._buf_ids, self._buffered = [], [], 0
+
+    def finish(self):
+
+        """
+        Train on whatever was buffered (small corpora) and return the index,
+        or None if nothing was added.
+        """
+
+        if self._buf:
+            self._train_and_flush()
+        if self.index is not None:
+            apply_search_params(self.index, self.cfg)
+        return self.index
+
+
+def build_faiss_index(mat, ids, cfg=None):
+
+    """
+    Train (if needed) and fill an id-mapped index of the configured type.
+
+    Args:
+        mat: (n, dim) float32 matrix of normalized embeddings.
+        ids: (n,) int64 vector ids.
+
+    Returns:
+        faiss.IndexIDMap2 ready to be written with faiss.write_index.
+    """
+
+    builder = IndexBuilder(cfg)
+    builder.add(mat, ids)
+    return builder.finish()
+
+def supports_remove(cfg=None) -> bool:
+
+    """
+    HNSW graphs cannot drop vectors; incremental updates must rebuild.
+    """
+
+    return _settings(cfg)['type'] != 'hnsw'
+
+def index_signature(cfg=None) -> dict:
+
+    """
+    Build-time settings recorded in the ingestion manifest; a change forces a
+    full rebuild instead of an incremental update.
+    """
+
+    s = _settings(cfg)
+    keys = {
+        'flat': (),
+        'ivf_flat': ('nlist',),
+        'ivf_pq': ('nlist', 'pq_m', 'pq_nbits'),
+        'hnsw': ('hnsw_m', 'ef_construction'),
+    }[s['type']]
+    return {'type': s['type'], **{k: s[k] for k in keys}}
@@ -0,0 +1,374 @@
+# lexical.py — BM25 over a precomputed, memory-mapped inverted index
+#
+# Layout of an index directory:
+#   terms.bin      sorted vocabulary, utf-8, concatenated (term t = position
+#                  t in the arrays below); term_starts.npy int64 byte offsets
+#   starts.npy     int64   posting list of term t is rows[starts[t]:starts[t+1]]
+#   rows.npy       int32   row of each posting
+#   weights.npy    float32 BM25 contribution of the term to that row
+#   maxw.npy       float32 largest weight in each posting list
+#   impact_rows.npy / impact_weights.npy
+#                  the same postings, each list sorted by weight (best first)
+#   ids.npy        int64   vector id per row (same ids as FAISS / MetaStore)
+#   params.json    k1, b, max_df, avgdl and row count used for the weights
+#
+# BM25 weights are computed at build time. A query reads the best `depth`
+# postings of each of its terms from the impact-ordered lists and scores
+# those candidate rows exactly (binary search in the row-sorted lists). Rows
+# not among the candidates score at most the sum of the terms' weights at
+# position `depth`; once the k-th candidate reaches that bound the top-k is
+# exact (threshold algorithm). Otherwise the depth grows up to `max_depth`:
+# queries made only of frequent words (long lists of near-equal weights)
+# stop there with an approximate top-k, which bounds latency. Queries with
+# at most `max_depth` postings in total, filtered queries that end up with
+# fewer than k hits, and indexes written before the impact lists are scored
+# over whole lists instead (MaxScore pruning).
+# Terms found in more than `max_df` of all rows ("the", "of", ...) carry
+# almost no BM25 weight and are dropped at build time, like stopwords.
+#
+# Everything, vocabulary included, is memory-mapped: query terms are found
+# by binary search in terms.bin, so processes serving the same index share
+# one copy. Indexes written before terms.bin (terms.json) still load.
+
+import os
+import re
+import json
+import mmap
+import shutil
+from array import array
+from collections import Counter
+import numpy as np
+
+# Words, plus identifiers joined by '.' or '-' ("13.709", "pol-sup-004").
+# '/' separates ("13.709/2018" -> "13.709", "2018").
+_TOKEN_RE = re.compile(r'\w+(?:[.\-]\w+)*')
+_JOINERS_RE = re.compile(r'[.\-]')
+
+
+def tokenize(text: str):
+
+    """
+    Casefolded terms of `text`. Compound identifiers are kept whole and also
+    emitted piecewise, so "POL-SUP-004" matches both itself and "SUP".
+    """
+
+    terms = []
+    for tok in _TOKEN_RE.findall(text.casefold()):
+        terms.append(tok)
+        if _JOINERS_RE.search(tok):
+            terms.extend(p for p in _JOINERS_RE.split(tok) if p)
+    return terms
+
+
+class LexicalIndexWriter:
+
+    """
+    Stream records (id, text) into a new inverted index directory.
+
+    Like MetaStoreWriter, files are written to `<path>.tmp` and swapped into
+    place by close().
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, max_df: float = 0.5):
+        self.path = path.rstrip('/')
+        self.tmp = self.path + '.tmp'
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.max_df = float(max_df)
+        self._ids = array('q')
+        self._lengths = array('i')
+        self._postings = {}   # term -> (rows array('i'), tfs array('i'))
+
+    def append(self, record: dict):
+        row = len(self._ids)
+        terms = tokenize(record['text'])
+        self._ids.append(record['id'])
+        self._lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            rows, tfs = self._postings.setdefault(term, (array('i'), array('i')))
+            rows.append(row)
+            tfs.append(tf)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+        return self
+
+    def abort(self):
+        # Nothing reaches disk before close()
+        self._postings.clear()
+
+    def close(self):
+        n = len(self._ids)
+        lengths = np.asarray(self._lengths, dtype='float32')
+        avgdl = float(lengths.mean()) if n else 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(avgdl, 1e-9))
+
+        # Small corpora keep every term (a 4-chunk test index has no stopwords)
+        limit = max(self.max_df * n, 50)
+        terms = sorted(t for t, (rows, _) in self._postings.items() if len(rows) <= limit)
+        starts = np.zeros(len(terms) + 1, dtype='int64')
+        maxw = np.zeros(len(terms), dtype='float32')
+        all_rows, all_weights = [], []
+        for t, term in enumerate(terms):
+            rows, tfs = self._postings[term]
+            rows = np.asarray(rows, dtype='int32')
+            tfs = np.asarray(tfs, dtype='float32')
+            df = len(rows)
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            all_rows.append(rows)
+            all_weights.append((idf * tfs * (self.k1 + 1) / (tfs + norm[rows])).astype('float32'))
+            maxw[t] = all_weights[-1].max()
+            starts[t + 1] = starts[t] + df
+
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        arrays = {
+            'starts': starts,
+            'maxw': maxw,
+            'rows': np.concatenate(all_rows) if all_rows else np.zeros(0, dtype='int32'),
+            'weights': np.concatenate(all_weights) if all_weights else np.zeros(0, dtype='float32'),
+            'ids': np.asarray(self._ids, dtype='int64'),
+        }
+        # Impact order: by term, then weight (best first), then row
+        term_of = np.repeat(np.arange(len(terms)), np.diff(starts))
+        order = np.lexsort((arrays['rows'], -arrays['weights'], term_of))
+        arrays['impact_rows'] = arrays['rows'][order]
+        arrays['impact_weights'] = arrays['weights'][order]
+        for name, arr in arrays.items():
+            np.save(os.path.join(self.tmp, f'{name}.npy'), arr)
+        # UTF-8 byte order is code point order, so the blob stays sorted
+        encoded = [t.encode('utf-8') for t in terms]
+        term_starts = np.zeros(len(encoded) + 1, dtype='int64')
+        np.cumsum([len(t) for t in encoded], out=term_starts[1:])
+        np.save(os.path.join(self.tmp, 'term_starts.npy'), term_starts)
+        with open(os.path.join(self.tmp, 'terms.bin'), 'wb') as f:
+            f.write(b''.join(encoded))
+        with open(os.path.join(self.tmp, 'params.json'), 'w', encoding='utf-8') as f:
+            json.dump({'k1': self.k1, 'b': self.b, 'max_df': self.max_df, 'avgdl': avgdl, 'rows': n}, f)
+
+        old = self.path + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old)
+        os.replace(self.tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        return n
+
+
+class LexicalIndex:
+
+    """
+    Read-only BM25 index (see module header for layout).
+
+    Args:
+        max_depth: postings per query term scored before giving up on an
+                   exact top-k (see module header).
+    """
+
+    # First depth tried per term (at least k)
+    MIN_DEPTH = 64
+
+    def __init__(self, path: str, max_depth: int = 512):
+        self.path = path
+        self.max_depth = int(max_depth)
+        self.terms = None
+        blob = os.path.join(path, 'terms.bin')
+        if os.path.exists(blob):
+            self.term_starts = _load(os.path.join(path, 'term_starts.npy'))
+            self._blob = b''
+            if os.path.getsize(blob):          # mmap cannot map an empty file
+                with open(blob, 'rb') as f:
+                    self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            with open(os.path.join(path, 'terms.json'), 'r', encoding='utf-8') as f:
+                self.terms = {t: i for i, t in enumerate(json.load(f))}
+        for name in ('starts', 'maxw', 'rows', 'weights', 'ids'):
+            setattr(self, name, _load(os.path.join(path, f'{name}.npy')))
+        impact = os.path.join(path, 'impact_rows.npy')
+        self.impact_rows = _load(impact) if os.path.exists(impact) else None
+        self.impact_weights = _load(os.path.join(path, 'impact_weights.npy')) if self.impact_rows is not None else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def term_id(self, term: str):
+
+        """
+        Position of `term` in the vocabulary, or None if it is not indexed.
+        """
+
+        if self.terms is not None:
+            return self.terms.get(term)
+        key = term.encode('utf-8')
+        lo, hi = 0, len(self.term_starts) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.term_starts) - 1 and self._term(lo) == key else None
+
+    def _term(self, t: int) -> bytes:
+        return self._blob[int(self.term_starts[t]):int(self.term_starts[t + 1])]
+
+    def search(self, query: str, k: int, allowed_ids=None):
+
+        """
+        Top-k rows by BM25 score.
+
+        Args:
+            allowed_ids: optional sorted int64 array; only rows with these
+                         vector ids are scored (filtered search).
+
+        Returns:
+            (scores, ids): float32 and int64 arrays, best first; fewer than k
+            entries when fewer rows contain any query term.
+        """
+
+        terms = {self.term_id(term) for term in tokenize(query)} - {None}
+        if not terms or k <= 0:
+            return np.zeros(0, dtype='float32'), np.zeros(0, dtype='int64')
+        postings = sum(int(self.starts[t + 1] - self.starts[t]) for t in terms)
+        if self.impact_rows is not None and postings > self.max_depth:
+            rows, scores, complete = self._search_impact(sorted(terms), k, allowed_ids)
+            if complete or allowed_ids is None or len(rows) >= k:
+                return self._top(rows, scores, k)
+        return self._search_exhaustive(terms, k, allowed_ids)
+
+    def _search_impact(self, terms, k: int, allowed_ids):
+
+        """
+        (rows, scores, complete) of the candidate rows from the impact-ordered
+        lists; complete = the top-k of these is the exact top-k.
+        """
+
+        segs = [(int(self.starts[t]), int(self.starts[t + 1])) for t in terms]
+        if len(segs) == 1 and allowed_ids is None:
+            s, e = segs[0]                     # the list's own head is the top-k
+            return self.impact_rows[s:min(s + k, e)], self.impact_weights[s:min(s + k, e)], True
+        depth = max(k, self.MIN_DEPTH)
+        while True:
+            rows = np.unique(np.concatenate([self.impact_rows[s:min(s + depth, e)] for s, e in segs]))
+            if allowed_ids is not None:
+                rows = rows[_isin_sorted(self.ids[rows], allowed_ids)]
+            scores = np.zeros(len(rows), dtype='float32')
+            for s, e in segs:
+                plist = self.rows[s:e]
+                pos = np.minimum(np.searchsorted(plist, rows), e - s - 1)
+                hit = plist[pos] == rows
+                scores[hit] += self.weights[s:e][pos[hit]]
+
+            # Best possible score of a row outside every prefix
+            bound = sum(float(self.impact_weights[s + depth]) for s, e in segs if s + depth < e)
+            if bound == 0.0:
+                return rows, scores, True
+            if len(scores) >= k and np.partition(scores, len(scores) - k)[len(scores) - k] >= bound:
+                return rows, scores, True
+            if depth >= self.max_depth:
+                return rows, scores, False
+            depth = self.max_depth
+
+    def _search_exhaustive(self, terms, k: int, allowed_ids):
+
+        # Rare terms first: short lists that carry most of the score
+        terms = sorted(terms, key=lambda t: (int(self.starts[t + 1] - self.starts[t]), t))
+        bounds = np.cumsum(np.asarray(self.maxw[terms], dtype='float64')[::-1])[::-1]
+
+        # Score rows of the first n terms; stop once the remaining terms'
+        # best-case total cannot lift an unseen row past the current k-th score
+        n = 1
+        while True:
+            rows, scores = self._accumulate(terms[:n])
+            if allowed_ids is not None:
+                keep = _isin_sorted(np.asarray(self.ids[rows]), allowed_ids)
+                rows, scores = rows[keep], scores[keep]
+            if n == len(terms):
+                break
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k] if len(scores) >= k else 0.0
+            if bounds[n] < kth:
+                break
+            n += 1
+
+        # Remaining (long) lists are only probed for the candidate rows
+        for t in terms[n:]:
+            s, e = int(self.starts[t]), int(self.starts[t + 1])
+            plist = self.rows[s:e]
+            pos = np.minimum(np.searchsorted(plist, rows), len(plist) - 1)
+            hit = plist[pos] == rows
+            scores[hit] += self.weights[s:e][pos[hit]]
+        return self._top(rows, scores, k)
+
+    def _top(self, rows, scores, k: int):
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        # Ties broken by row so results are deterministic
+        top = top[np.lexsort((rows[top], -scores[top]))]
+        return scores[top], np.asarray(self.ids[rows[top]])
+
+    def _accumulate(self, terms):
+        slices = [(int(self.starts[t]), int(self.starts[t + 1])) for t in terms]
+        if len(slices) == 1:
+            s, e = slices[0]
+            return np.asarray(self.rows[s:e]), np.array(self.weights[s:e], dtype='float32')
+        rows = np.concatenate([self.rows[s:e] for s, e in slices])
+        weights = np.concatenate([self.weights[s:e] for s, e in slices])
+        if len(rows) * 8 > len(self.ids):
+            # Long lists: a dense pass over all rows beats sorting postings
+            dense = np.bincount(rows, weights=weights, minlength=len(self.ids))
+            rows = np.flatnonzero(dense).astype('int32')
+            return rows, dense[rows].astype('float32')
+        rows, inverse = np.unique(rows, return_inverse=True)
+        return rows, np.bincount(inverse, weights=weights).astype('float32')
+
+
+def _load(path: str):
+    # Plain ndarray view of the mapping: slices skip np.memmap's per-object
+    # overhead, pages are still shared
+    return np.asarray(np.load(path, mmap_mode='r'))
+
+def _isin_sorted(values, sorted_ids):
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[pos] == values
+
+
+def write_lexical(path: str, records, k1: float = 1.2, b: float = 0.75, max_df: float = 0.5):
+
+    """
+    Build an inverted index at `path` from an iterable of metadata dicts.
+
+    Returns:
+        int: number of rows indexed.
+    """
+
+    return LexicalIndexWriter(path, k1=k1, b=b, max_df=max_df).extend(records).close()
+
+
+def rrf_fuse(rankings, k: int, rrf_k: int = 60):
+
+    """
+    Reciprocal rank fusion: score(id) = sum over rankings of 1 / (rrf_k + rank).
+
+    Args:
+        rankings: iterables of ids, each best first (-1 entries are ignored).
+        k:        number of fused results to return.
+
+    Returns:
+        List[(float, int)]: (fused score, id), best first.
+    """
+
+    fused = {}
+    for ranking in rankings:
+        rank = 0
+        for vid in ranking:
+            vid = int(vid)
+            if vid == -1:
+                continue
+            rank += 1
+            fused[vid] = fused.get(vid, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(((s, vid) for vid, s in fused.items()), key=lambda x: (-x[0], x[1]))[:k]
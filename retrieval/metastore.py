@@ -0,0 +1,256 @@
+# metastore.py — compact, memory-mapped chunk metadata store
+#
+# Layout of a store directory:
+#   paths.json     interned table of document paths
+#   sections.json  interned table of section titles ('' = none)
+#   articles.json  interned table of article ids ('' = none)
+#   ids.npy        int64   vector id per row (sorted ascending)
+#   path_idx.npy   int32   row -> index into paths.json
+#   section_idx.npy / article_idx.npy   int32   row -> interned string
+#   chunk_id.npy   int32   chunk number inside its document
+#   offsets.npy    int64   byte offset of the row's text in text.bin
+#   lengths.npy    int64   byte length of the row's text
+#   text.bin       utf-8 chunk texts, concatenated
+#
+# Arrays and text are opened with mmap, so loading a store costs O(#paths)
+# and pages of text are only touched for the rows a search returns.
+
+import os
+import sys
+import json
+import shutil
+from array import array
+import numpy as np
+
+_COLUMNS = {
+    'ids': 'int64',
+    'path_idx': 'int32',
+    'section_idx': 'int32',
+    'article_idx': 'int32',
+    'chunk_id': 'int32',
+    'offsets': 'int64',
+    'lengths': 'int64',
+}
+
+
+class MetaStoreWriter:
+
+    """
+    Stream records into a new store directory.
+
+    Records are written to `<path>.tmp` and moved into place by close(), so
+    readers never observe a half-written store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path.rstrip('/')
+        self.tmp = self.path + '.tmp'
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self._text = open(os.path.join(self.tmp, 'text.bin'), 'wb')
+        self._offset = 0
+        self._paths = {}
+        self._sections = {'': 0}
+        self._articles = {'': 0}
+        # Compact typed buffers (8/4 bytes per row) instead of Python int lists
+        self._cols = {name: array('q' if dtype == 'int64' else 'i') for name, dtype in _COLUMNS.items()}
+
+    def append(self, record: dict):
+        raw = record['text'].encode('utf-8')
+        self._text.write(raw)
+        path_idx = self._paths.setdefault(record['doc_path'], len(self._paths))
+        self._cols['ids'].append(record['id'])
+        self._cols['path_idx'].append(path_idx)
+        self._cols['section_idx'].append(
+            self._sections.setdefault(record.get('section') or '', len(self._sections)))
+        self._cols['article_idx'].append(
+            self._articles.setdefault(record.get('article') or '', len(self._articles)))
+        self._cols['chunk_id'].append(record['chunk_id'])
+        self._cols['offsets'].append(self._offset)
+        self._cols['lengths'].append(len(raw))
+        self._offset += len(raw)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+        return self
+
+    def abort(self):
+
+        """
+        Discard the partially written store.
+        """
+
+        self._text.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def close(self):
+        self._text.close()
+        cols = {name: np.asarray(vals, dtype=_COLUMNS[name]) for name, vals in self._cols.items()}
+        order = np.argsort(cols['ids'], kind='stable')
+        for name, arr in cols.items():
+            np.save(os.path.join(self.tmp, f'{name}.npy'), arr[order])
+        for name, table in (('paths', self._paths), ('sections', self._sections),
+                            ('articles', self._articles)):
+            with open(os.path.join(self.tmp, f'{name}.json'), 'w', encoding='utf-8') as f:
+                json.dump(list(table), f, ensure_ascii=False)
+
+        # Swap directories: old -> .old, tmp -> path, then drop .old
+        old = self.path + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old)
+        os.replace(self.tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        return len(order)
+
+
+def write_store(path: str, records):
+
+    """
+    Write an iterable of metadata dicts (id, doc_path, chunk_id, text and
+    optional section/article) to `path`.
+
+    Returns:
+        int: number of rows written.
+    """
+
+    return MetaStoreWriter(path).extend(records).close()
+
+
+class MetaStore:
+
+    """
+    Read-only view over a store directory (see module header for layout).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.paths = self._table('paths')
+        self.sections = self._table('sections')
+        self.articles = self._table('articles')
+        for name in _COLUMNS:
+            file = os.path.join(path, f'{name}.npy')
+            if os.path.exists(file):
+                setattr(self, name, np.load(file, mmap_mode='r'))
+            else:
+                # Stores written before section/article columns existed
+                setattr(self, name, np.zeros(len(self.ids), dtype=_COLUMNS[name]))
+        text_path = os.path.join(path, 'text.bin')
+        if os.path.getsize(text_path):
+            self._text = np.memmap(text_path, dtype='uint8', mode='r')
+        else:
+            self._text = np.zeros(0, dtype='uint8')
+
+    def _table(self, name):
+        file = os.path.join(self.path, f'{name}.json')
+        if not os.path.exists(file):
+            return ['']
+        with open(file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_of(self, vector_id: int):
+
+        """
+        Return the row holding `vector_id`, or None if absent (binary search).
+        """
+
+        row = int(np.searchsorted(self.ids, vector_id))
+        if row < len(self.ids) and self.ids[row] == vector_id:
+            return row
+        return None
+
+    def record(self, row: int) -> dict:
+        start = int(self.offsets[row])
+        end = start + int(self.lengths[row])
+        return {
+            'id': int(self.ids[row]),
+            'doc_path': self.paths[int(self.path_idx[row])],
+            'chunk_id': int(self.chunk_id[row]),
+            'text': self._text[start:end].tobytes().decode('utf-8'),
+            'section': self.sections[int(self.section_idx[row])] or None,
+            'article': self.articles[int(self.article_idx[row])] or None,
+        }
+
+    def get(self, vector_id: int, default=None):
+        row = self.row_of(vector_id)
+        return default if row is None else self.record(row)
+
+    def select_ids(self, doc_prefix=None, folder=None, article=None):
+
+        """
+        Sorted vector ids of rows matching every given filter.
+
+        Args:
+            doc_prefix: file-name prefix(es), case-insensitive ("LAW-BR", "POL-").
+            folder:     parent folder name(s) ("laws", "policies").
+            article:    article number(s); a row matches if any of its
+                        articles does ("12" matches "11,12").
+
+        Notes:
+            - Predicates are evaluated once per interned path/article string,
+              then broadcast over the int32 columns, so the cost is a few
+              vectorized passes over the rows.
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+        if doc_prefix or folder:
+            prefixes = tuple(p.lower() for p in _as_list(doc_prefix))
+            folders = {f.lower() for f in _as_list(folder)}
+            ok = np.array([
+                (not prefixes or os.path.basename(p).lower().startswith(prefixes))
+                and (not folders or os.path.basename(os.path.dirname(p)).lower() in folders)
+                for p in self.paths
+            ], dtype=bool)
+            mask &= ok[self.path_idx]
+        if article:
+            wanted = {str(a) for a in _as_list(article)}
+            ok = np.array([bool(wanted & set(a.split(','))) for a in self.articles], dtype=bool)
+            mask &= ok[self.article_idx]
+        return np.asarray(self.ids[mask], dtype='int64')
+
+    def records(self):
+
+        """
+        Iterate over all records in id order.
+        """
+
+        for row in range(len(self)):
+            yield self.record(row)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def migrate_json(json_path: str, store_path: str):
+
+    """
+    Convert a legacy meta.json (list of dicts) into a store directory.
+
+    Records without an 'id' field get their list position as id, matching
+    how the legacy flat index numbered its rows.
+    """
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    for i, md in enumerate(records):
+        md.setdefault('id', i)
+    return write_store(store_path, records)
+
+
+# ---------------------------------------------------------------------------
+# CLI: python -m retrieval.metastore <meta.json> <store_dir>
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m retrieval.metastore <meta.json> <store_dir>')
+    n = migrate_json(sys.argv[1], sys.argv[2])
+    print(f'Migrated {n} records -> {sys.argv[2]}')
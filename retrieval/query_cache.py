@@ -0,0 +1,66 @@
+# query_cache.py — bounded in-process TTL + LRU cache with hit counters
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+
+    """
+    Small thread-safe mapping with max-entry (LRU) and time-to-live eviction.
+
+    Args:
+        max_entries: entries kept before the least recently used is dropped.
+        ttl_s:       seconds an entry stays valid (<= 0 disables expiry).
+
+    Notes:
+        - Used by the retriever for query -> vector and (query, k) -> hits.
+        - `stats()` exposes hit/miss counters so the app can display them.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (self.ttl_s <= 0 or item[0] > now):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'entries': len(self._data),
+            }
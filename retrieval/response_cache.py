@@ -0,0 +1,160 @@
+# response_cache.py — semantic cache of generated compliance answers
+#
+# An answer is reused when a new question retrieved exactly the same chunks
+# (same prompt variant, same index version) AND its query embedding is close
+# enough to the cached question's (cosine >= similarity threshold).
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+import yaml
+
+# ---------------------------------------------------------------------------
+# Load cache configuration from YAML
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_RC_CFG = CFG['retrieval'].get('response_cache', {}) or {}
+
+CACHE_ENABLED = bool(_RC_CFG.get('enabled', True))
+CACHE_PATH    = _RC_CFG.get('path', 'retrieval/vectordb/response_cache.sqlite')
+CACHE_TTL_S   = float(_RC_CFG.get('ttl_s', 86400))
+CACHE_MAX_ENTRIES = int(_RC_CFG.get('max_entries', 5000))
+SIMILARITY    = float(_RC_CFG.get('similarity', 0.95))
+
+
+def chunk_key(hits, variant: str = '') -> str:
+
+    """
+    Order-independent key of the retrieved chunk set plus a prompt variant
+    (e.g. the system prompt), so different prompt templates never collide.
+    """
+
+    ids = sorted(f"{h['doc_path']}#{h['chunk_id']}" for h in hits)
+    raw = '\n'.join(ids) + '\n\n' + variant
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+
+    """
+    SQLite-backed answer cache with TTL and max-entry (LRU) eviction.
+
+    Args:
+        path:        SQLite file.
+        ttl_s:       seconds an answer stays valid.
+        max_entries: rows kept before least recently used ones are dropped.
+        similarity:  minimum cosine between normalized query vectors.
+
+    Notes:
+        - Entries are tagged with the index version they were produced
+          against; storing under a new version purges older ones, and
+          lookups never return answers from another version.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl_s: float = CACHE_TTL_S,
+                 max_entries: int = CACHE_MAX_ENTRIES, similarity: float = SIMILARITY):
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.similarity = float(similarity)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS answers ('
+            ' chunk_key TEXT NOT NULL, index_version TEXT NOT NULL, qvec BLOB NOT NULL,'
+            ' answer TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS answers_key ON answers(chunk_key, index_version)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS answers_lru ON answers(last_used)')
+        self._conn.commit()
+
+    def lookup(self, key: str, qvec, index_version):
+
+        """
+        Return a cached answer for (key, index_version) whose query vector is
+        within the similarity threshold of `qvec`, or None.
+        """
+
+        qvec = np.asarray(qvec, dtype='float32').ravel()
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT rowid, qvec, answer FROM answers'
+                ' WHERE chunk_key = ? AND index_version = ? AND created > ?',
+                (key, str(index_version), now - self.ttl_s),
+            ).fetchall()
+            best, best_sim = None, self.similarity
+            for rowid, blob, answer in rows:
+                sim = float(np.dot(np.frombuffer(blob, dtype='float32'), qvec))
+                if sim >= best_sim:
+                    best, best_sim = (rowid, answer), sim
+            if best is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE answers SET last_used = ? WHERE rowid = ?', (now, best[0]))
+            self._conn.commit()
+            self.hits += 1
+            return best[1]
+
+    def store(self, key: str, qvec, answer: str, index_version):
+
+        """
+        Save an answer; purges expired rows, rows from other index versions
+        and the least recently used rows beyond max_entries.
+        """
+
+        blob = np.asarray(qvec, dtype='float32').ravel().tobytes()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM answers WHERE index_version != ? OR created <= ?',
+                (str(index_version), now - self.ttl_s))
+            self._conn.execute(
+                'INSERT INTO answers (chunk_key, index_version, qvec, answer, created, last_used)'
+                ' VALUES (?, ?, ?, ?, ?, ?)', (key, str(index_version), blob, answer, now, now))
+            self._conn.execute(
+                'DELETE FROM answers WHERE rowid IN (SELECT rowid FROM answers'
+                ' ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'entries': entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_response_cache():
+
+    """
+    Return the process-wide response cache from config.yaml (None if disabled).
+    """
+
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(CACHE_PATH)
+        return _default_cache
@@ -1,78 +1,593 @@
-# retriever.py - vector retrieval module (FAISS + embeddings)
+# retriever.py - retrieval module (FAISS + embeddings, BM25, hybrid fusion)
+#
+# The loaded index version (FAISS, metadata, BM25) is one immutable state
+# object. Searches take a reference to it once, so a newer snapshot
+# published by ingestion (retrieval.snapshots) is loaded in a background
+# thread and swapped in between queries without blocking them.
+#
+# For several worker processes on one host, retrieval.shared_memory lets
+# them share memory: `mmap` maps the index files read-only (one page-cache
+# copy for all workers; metadata and BM25 arrays are always mapped), and
+# `embedding_server` sends query texts to models.embedding_server instead
+# of loading a model per process.
 
-import json
+import os
+import time
+import threading
 import numpy as np
-import faiss
 import yaml
-from models.embedding import get_embedding_model
+from models.embedding import get_embedding_model, with_embedding_cache
+from models.embedding_server import RemoteEncoder
+from models.reranker import get_reranker, rerank as rerank_texts
+from retrieval.metastore import MetaStore, migrate_json
+from retrieval.index_types import make_selector, partition_index, read_index, search_params, subset_vectors
+from retrieval.query_cache import TTLCache
+from retrieval.lexical import LexicalIndex, rrf_fuse
+from retrieval import snapshots
+from models.embedding_cache import cache_stats as embedding_cache_stats
+from telemetry.tracing import span, record
 
 
 # Load configuration parameters from config.yaml
 CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
-INDEX_PATH = CFG['retrieval']['index_path']
-META_PATH  = CFG['retrieval']['metadata_path']
 EMB_MODEL  = CFG['retrieval']['embedding_model']
+# Query encoder backend (torch | torch_int8 | onnx); ingestion always uses fp32 torch
+EMB_BACKEND = CFG['retrieval'].get('embedding_backend', 'torch')
+ONNX_DIR    = CFG['retrieval'].get('onnx_dir', 'retrieval/vectordb/onnx')
 TOP_K      = int(CFG['retrieval'].get('top_k', 4))
+QUERY_BATCH_SIZE = int(CFG['retrieval'].get('embed_batch_size', 64))
+
+# Ranking: dense vectors, BM25 over the inverted index, or both fused (RRF)
+SEARCH_MODES = ('vector', 'lexical', 'hybrid')
+SEARCH_MODE  = CFG['retrieval'].get('search_mode', 'vector')
+_LEX_CFG = CFG['retrieval'].get('lexical', {}) or {}
+RRF_K        = int(_LEX_CFG.get('rrf_k', 60))
+HYBRID_DEPTH = int(_LEX_CFG.get('depth', 50))
+LEX_MAX_DEPTH = int(_LEX_CFG.get('max_depth', 512))
+
+# Optional cross-encoder stage: widen to RERANK_CANDIDATES, keep the best k
+_RERANK_CFG = CFG['retrieval'].get('rerank', {}) or {}
+RERANK_ENABLED    = bool(_RERANK_CFG.get('enabled', False))
+RERANK_MODEL      = _RERANK_CFG.get('model', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+RERANK_CANDIDATES = int(_RERANK_CFG.get('candidates', 50))
+RERANK_BATCH_SIZE = int(_RERANK_CFG.get('batch_size', 16))
+RERANK_BUDGET_S   = float(_RERANK_CFG.get('budget_ms', 300)) / 1000
+
+_QCACHE_CFG = CFG['retrieval'].get('query_cache', {}) or {}
+QUERY_CACHE_ENTRIES = int(_QCACHE_CFG.get('max_entries', 1024))
+QUERY_CACHE_TTL_S   = float(_QCACHE_CFG.get('ttl_s', 600))
+
+# Memory shared between worker processes (see module header)
+_SHARED_CFG = CFG['retrieval'].get('shared_memory', {}) or {}
+MMAP_INDEX       = bool(_SHARED_CFG.get('mmap', False))
+EMBEDDING_SERVER = _SHARED_CFG.get('embedding_server') or None
+
+# Published index versions; how often searches look for a newer one
+SNAPSHOT_ROOT   = snapshots.SNAPSHOT_ROOT
+SNAPSHOT_POLL_S = snapshots.POLL_S
+# Pre-snapshot flat layout, served until a snapshot is published
+LEGACY_PATHS = snapshots.LEGACY_PATHS
+
+
+class IndexState:
+
+    """
+    One loaded index version: FAISS index, metadata store, BM25 index (None
+    for indexes built before it existed) and its per-version filter cache.
+    Never mutated after loading except for `filters`.
+    """
+
+    def __init__(self, version: str, index, meta, lexical):
+        self.version = version
+        self.index = index
+        self.meta = meta
+        self.lexical = lexical
+        self.filters = {}
 
 
 # Lazy-loaded global objects to avoid reloading FAISS/model on every query
-_index = None
-_meta  = None
+_state = None
 _model = None
+_reranker = None
+_load_lock = threading.RLock()
+_swap_lock = threading.Lock()
+_swap_thread = None
+_last_check = 0.0
+
+# Metadata filters accepted by search(); filter key -> (allowed ids, selector,
+# subset vectors, partition index). Filters matching at most FILTER_EXACT_MAX
+# chunks are scored exactly: HNSW/IVF pruning rarely reaches k hits in tiny
+# subsets. Larger fixed scopes (PARTITION_KEYS only) of a flat index get
+# their own flat sub-index when FILTER_PARTITIONS is on.
+FILTER_KEYS = ('doc_prefix', 'folder', 'article')
+PARTITION_KEYS = ('doc_prefix', 'folder')
+FILTER_EXACT_MAX = int(CFG['retrieval'].get('filter_exact_max', 4096))
+FILTER_PARTITIONS = bool(CFG['retrieval'].get('filter_partitions', True))
+
+# Cumulative per-stage timings (see stage_stats)
+_stage_totals = {'searches': 0, 'retrieve_s': 0.0, 'rerank_s': 0.0, 'reranked': 0, 'rerank_fallbacks': 0}
+_stage_lock = threading.Lock()
+
+# Normalized query -> vector, and (normalized query, k, ..., index version) -> hits
+_vec_cache  = TTLCache(QUERY_CACHE_ENTRIES, QUERY_CACHE_TTL_S)
+_hits_cache = TTLCache(QUERY_CACHE_ENTRIES, QUERY_CACHE_TTL_S)
+
+
+def index_version():
 
+    """
+    Version of the index serving searches (snapshot name), or of the one
+    that will be loaded first; None if no index exists.
+    """
+
+    state = _state
+    if state is not None:
+        return state.version
+    return snapshots.resolve(SNAPSHOT_ROOT, LEGACY_PATHS)[0]
+
+def _read_state(version: str, paths) -> IndexState:
 
+    """
+    Load one index version from disk (no globals touched).
+    """
 
-def _load():
+    index = read_index(paths['index'], mmap=MMAP_INDEX)
+    # One-time migration for legacy indexes built before the binary store
+    legacy_json = os.path.join(os.path.dirname(paths['meta']), 'meta.json')
+    if not os.path.isdir(paths['meta']) and os.path.exists(legacy_json):
+        migrate_json(legacy_json, paths['meta'])
+    # Indexes built before the BM25 index existed only support 'vector'
+    lexical = LexicalIndex(paths['lexical'], max_depth=LEX_MAX_DEPTH) if os.path.isdir(paths['lexical']) else None
+    return IndexState(version, index, MetaStore(paths['meta']), lexical)
+
+def _load(model: bool = True) -> IndexState:
 
     """
     Lazy-load the FAISS index, metadata, and embedding model.
     Called implicitly by search() to ensure dependencies are ready.
+
+    The first call loads synchronously (serialized by a lock, so a
+    background warm-up and the first query never load twice). Later calls
+    look for a newer published snapshot every SNAPSHOT_POLL_S seconds and
+    hand it to a background loader; they keep using the current state.
+
+    Returns:
+        IndexState: the state the caller should search.
     """
 
-    global _index, _meta, _model
-    if _index is None:
-        _index = faiss.read_index(INDEX_PATH)
-    if _meta is None:
-        _meta = json.load(open(META_PATH, 'r', encoding='utf-8'))
-    if _model is None:
-        _model = get_embedding_model(EMB_MODEL)
+    global _state, _model
+    state = _state
+    if state is None:
+        with _load_lock:
+            if _state is None:
+                version, paths = snapshots.resolve(SNAPSHOT_ROOT, LEGACY_PATHS)
+                if version is None:
+                    raise FileNotFoundError(f'No index found in {SNAPSHOT_ROOT}; '
+                                            'run `python -m ingestion.ingest` first.')
+                _state = _read_state(version, paths)
+            state = _state
+    else:
+        _poll_for_update()
+    if _model is None and model:
+        with _load_lock:
+            if _model is None and EMBEDDING_SERVER:
+                # The server process holds the model and the embedding cache
+                _model = RemoteEncoder(EMBEDDING_SERVER)
+            elif _model is None:
+                _model = with_embedding_cache(get_embedding_model(EMB_MODEL, backend=EMB_BACKEND,
+                                                                  onnx_dir=ONNX_DIR),
+                                              EMB_MODEL, backend=EMB_BACKEND)
+    return state
 
-def search(query: str, k: int = TOP_K):
+def _poll_for_update():
+    global _last_check
+    now = time.monotonic()
+    if now - _last_check < SNAPSHOT_POLL_S:
+        return
+    _last_check = now
+    check_for_update(wait=False)
+
+def check_for_update(wait: bool = False):
 
     """
-    Run a semantic search over the local FAISS index.
+    Load a newer published snapshot, if any, and swap it in.
 
     Args:
-        query: user text to retrieve relevant policy excerpts for.
-        k:     number of nearest chunks to return (defaults to config TOP_K).
+        wait: load in the calling thread and return once swapped;
+              otherwise start a background loader (at most one at a time)
+              and return immediately.
 
     Returns:
-        List[dict]: each hit has score, doc_path, chunk_id, and text.
+        str|None: the version being (or, with wait, already) swapped in;
+                  None when the loaded version is current or nothing is
+                  loaded yet (the first search loads it).
     """
 
+    global _swap_thread
+    state = _state
+    if state is None:
+        return None
+    version, paths = snapshots.resolve(SNAPSHOT_ROOT, LEGACY_PATHS)
+    if version is None or version == state.version:
+        return None
+    if wait:
+        start = time.perf_counter()
+        _swap_in(_read_state(version, paths), start)
+        return version
+    with _swap_lock:
+        if _swap_thread is not None and _swap_thread.is_alive():
+            return version
+        _swap_thread = threading.Thread(target=_load_and_swap, args=(version, paths),
+                                        name='index-swap', daemon=True)
+        _swap_thread.start()
+    return version
+
+def _load_and_swap(version: str, paths):
+    start = time.perf_counter()
+    try:
+        new = _read_state(version, paths)
+    except Exception as e:
+        # Snapshot deleted or unreadable: keep serving, retry on a later poll
+        record('retrieval.swap', time.perf_counter() - start, version=version, error=type(e).__name__)
+        return
+    _swap_in(new, start)
+
+def _swap_in(new: IndexState, start: float):
+    global _state
+    version = new.version
+    with _load_lock:
+        old = _state
+        if old is not None and old.version == version:
+            return
+        _state = new
+        # Keys carry the version, so this only frees memory
+        _hits_cache.clear()
+    record('retrieval.swap', time.perf_counter() - start, version=version,
+           previous=old.version if old is not None else None, chunks=int(new.index.ntotal))
+
+def warm_up(progress=None):
+
+    """
+    Load everything search() needs ahead of the first query: index and
+    metadata, the embedding model (torch import + weights), then one
+    throwaway encode so first-call kernel setup is paid here too.
+
+    Args:
+        progress: optional callable receiving each stage name
+                  ('index', 'model', 'encode') before it starts.
+    """
+
+    report = progress or (lambda stage: None)
+    report('index')
+    _load(model=False)
+    report('model')
     _load()
-    qvec = _model.encode([query], normalize_embeddings=True).astype('float32')
-    scores, idxs = _index.search(qvec, k)
+    report('encode')
+    _model.encode(['warm-up'], normalize_embeddings=True)
+
+def _to_hits(state: IndexState, scores, idxs):
+
+    """
+    Convert one row of FAISS results into hit dicts (skips padding/unknown ids).
+    """
+
     hits = []
-    for score, idx in zip(scores[0], idxs[0]):
-        if idx == -1: 
+    for score, idx in zip(scores, idxs):
+        if idx == -1:
+            continue
+        md = state.meta.get(int(idx))
+        if md is None:
             continue
-        md = _meta[int(idx)]
         md_out = {
             'score': float(score),
             'doc_path': md['doc_path'],
             'chunk_id': md['chunk_id'],
             'text': md['text'],
+            'section': md.get('section'),
+            'article': md.get('article'),
         }
         hits.append(md_out)
     return hits
 
+def search(query: str, k: int = TOP_K, mode: str = None, rerank: bool = None, timings: dict = None,
+           filters: dict = None):
+
+    """
+    Run a semantic, lexical or hybrid search over the local indexes.
+
+    Args:
+        query: user text to retrieve relevant policy excerpts for.
+        k:     number of nearest chunks to return (defaults to config TOP_K).
+        mode:  'vector' (FAISS), 'lexical' (BM25, best for exact terms such as
+               "FCPA" or "13.709") or 'hybrid' (reciprocal rank fusion of
+               both); defaults to retrieval.search_mode.
+        rerank:  rescore RERANK_CANDIDATES first-stage hits with the
+                 cross-encoder and keep the best k; falls back to
+                 first-stage order when retrieval.rerank.budget_ms runs out.
+                 Defaults to retrieval.rerank.enabled.
+        timings: optional dict filled with this call's stage timings
+                 (retrieve_s, rerank_s, reranked, rerank_fallbacks).
+        filters: optional dict restricting results by metadata, e.g.
+                 {'doc_prefix': 'LAW-BR'}, {'folder': 'policies'} or
+                 {'article': 12}; values may be lists (any of). Applied
+                 inside FAISS / BM25, so up to k matching hits are returned.
+
+    Returns:
+        List[dict]: each hit has score, doc_path, chunk_id, text, and the
+                    section/article recorded by the structured splitter.
+                    Scores are cosine (vector), BM25 (lexical) or RRF (hybrid),
+                    or cross-encoder logits when reranked.
+    """
+
+    return search_many([query], k, mode=mode, rerank=rerank, timings=timings, filters=filters)[0]
+
+def search_many(queries, k: int = TOP_K, batch_size: int = QUERY_BATCH_SIZE, mode: str = None,
+                rerank: bool = None, timings: dict = None, filters: dict = None):
+
+    """
+    Run search for many queries with batched encoding and a single FAISS
+    search over the stacked query matrix.
+
+    Args:
+        queries:    list of query strings.
+        k:          number of nearest chunks per query.
+        batch_size: queries per embedding forward pass.
+        mode, rerank, timings, filters: see search().
+
+    Returns:
+        List[List[dict]]: hits per query, same format and order as search().
+    """
+
+    mode = mode or SEARCH_MODE
+    rerank = RERANK_ENABLED if rerank is None else bool(rerank)
+    fkey = _filter_key(filters)
+    if mode not in SEARCH_MODES:
+        raise ValueError(f'Unknown search mode {mode!r}; expected one of {SEARCH_MODES}')
+    queries = list(queries)
+    if not queries:
+        return []
+    state = _load()
+    if state.lexical is None and mode != 'vector':
+        if mode == 'lexical':
+            raise RuntimeError('No lexical index found; re-run `python -m ingestion.ingest`.')
+        mode = 'vector'
+
+    keys = [normalize_query(q) for q in queries]
+    # Keys only index the caches; models and BM25 get the query as written
+    texts = {}
+    for query, key in zip(queries, keys):
+        texts.setdefault(key, _collapse(query))
+    found = {}
+    for key in set(keys):
+        hits = _hits_cache.get((key, k, mode, rerank, fkey, state.version))
+        if hits is not None:
+            found[key] = hits
+
+    stats = {'retrieve_s': 0.0, 'rerank_s': 0.0, 'reranked': 0, 'rerank_fallbacks': 0}
+    todo = [key for key in dict.fromkeys(keys) if key not in found]
+    if todo:
+        with span('retrieval.search', mode=mode, k=k, queries=len(todo), filtered=fkey is not None):
+            start = time.perf_counter()
+            ranked = _rank(state, todo, [texts[key] for key in todo],
+                           max(k, RERANK_CANDIDATES) if rerank else k, mode, batch_size, _filter(state, fkey))
+            stats['retrieve_s'] = time.perf_counter() - start
+            for key, hits in zip(todo, ranked):
+                if rerank:
+                    hits = _rerank(texts[key], hits, k, stats)
+                found[key] = hits
+                _hits_cache.set((key, k, mode, rerank, fkey, state.version), hits)
+        _record_stages(stats)
+    if timings is not None:
+        timings.update(stats)
+
+    # Copies, so callers can annotate hits without touching the cache
+    return [[dict(h) for h in found[key]] for key in keys]
+
+def _filter_key(filters):
+
+    """
+    Hashable, order-independent form of a filters dict (None if empty).
+    """
+
+    if not filters:
+        return None
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f'Unknown search filters {sorted(unknown)}; expected {FILTER_KEYS}')
+    key = []
+    for name in FILTER_KEYS:
+        value = filters.get(name)
+        if value is None or value == [] or value == '':
+            continue
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        key.append((name, tuple(sorted(str(v) for v in values))))
+    return tuple(key) or None
+
+def _filter(state: IndexState, fkey):
+
+    """
+    (allowed ids, FAISS selector, subset vectors or None, partition index
+    or None) for a filter key, or None when unfiltered. Computed once per
+    index version.
+    """
+
+    if fkey is None:
+        return None
+    cached = state.filters.get(fkey)
+    if cached is None:
+        allowed = state.meta.select_ids(**{name: list(values) for name, values in fkey})
+        sel = make_selector(state.index, allowed) if len(allowed) else None
+        sub = subset_vectors(state.index, allowed) if 0 < len(allowed) <= FILTER_EXACT_MAX else None
+        part = None
+        if sub is None and len(allowed) and FILTER_PARTITIONS and all(name in PARTITION_KEYS for name, _ in fkey):
+            part = partition_index(state.index, allowed)
+        cached = (allowed, sel, sub, part)
+        state.filters[fkey] = cached
+    return cached
+
+def _exact_search(qmat, sub, allowed, depth: int):
+
+    """
+    FAISS-style (scores, ids) of the best `depth` rows of `sub` per query.
+    """
+
+    sims = qmat @ sub.T
+    n = min(depth, len(allowed))
+    top = np.argpartition(-sims, n - 1, axis=1)[:, :n]
+    top_sims = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_sims, axis=1, kind='stable')
+    scores = np.full((len(qmat), depth), -np.inf, dtype='float32')
+    ids = np.full((len(qmat), depth), -1, dtype='int64')
+    scores[:, :n] = np.take_along_axis(top_sims, order, axis=1)
+    ids[:, :n] = allowed[np.take_along_axis(top, order, axis=1)]
+    return scores, ids
+
+def _rank(state: IndexState, keys, texts, k: int, mode: str, batch_size: int, id_filter=None):
+
+    """
+    Hits for each query in `texts` (cache misses only; `keys` are their
+    normalized cache keys), restricted to the ids of `id_filter` (see
+    _filter) when given.
+    """
+
+    allowed, params, sub, part = None, None, None, None
+    if id_filter is not None:
+        allowed, sel, sub, part = id_filter
+        if sel is None:
+            return [[] for _ in keys]
+        # Fresh params per call: IndexIDMap swaps params.sel during search
+        params = search_params(state.index, sel)
+
+    if mode == 'lexical':
+        with span('retrieval.bm25', queries=len(keys)):
+            return [_to_hits(state, *state.lexical.search(text, k, allowed_ids=allowed)) for text in texts]
+
+    depth = k if mode == 'vector' else max(k, HYBRID_DEPTH)
+    qmat = _query_vectors(keys, texts, batch_size)
+    with span('retrieval.faiss', queries=len(keys), depth=depth, exact=sub is not None,
+              partition=part is not None):
+        if sub is not None:
+            scores, idxs = _exact_search(qmat, sub, allowed, depth)
+        elif part is not None:
+            scores, idxs = part.search(qmat, depth)
+        else:
+            scores, idxs = state.index.search(qmat, depth, params=params)
+    if mode == 'vector':
+        return [_to_hits(state, s_row, i_row) for s_row, i_row in zip(scores, idxs)]
+
+    results = []
+    with span('retrieval.bm25', queries=len(keys)):
+        for text, i_row in zip(texts, idxs):
+            _, lex_ids = state.lexical.search(text, depth, allowed_ids=allowed)
+            fused = rrf_fuse([i_row, lex_ids], k, rrf_k=RRF_K)
+            results.append(_to_hits(state, [s for s, _ in fused], [i for _, i in fused]))
+    return results
+
+def _rerank(query: str, hits, k: int, stats: dict):
+
+    """
+    Reorder first-stage `hits` with the cross-encoder and keep the best k;
+    returns the first k in first-stage order when the time budget runs out.
+    """
+
+    global _reranker
+    if _reranker is None:
+        with _load_lock:
+            if _reranker is None:
+                _reranker = get_reranker(RERANK_MODEL)
+    start = time.perf_counter()
+    with span('retrieval.rerank', candidates=len(hits)) as s:
+        result = rerank_texts(_reranker, query, [h['text'] for h in hits],
+                              batch_size=RERANK_BATCH_SIZE, budget_s=RERANK_BUDGET_S)
+        s.set(fallback=result is None)
+    stats['rerank_s'] += time.perf_counter() - start
+    if result is None:
+        stats['rerank_fallbacks'] += 1
+        return hits[:k]
+    stats['reranked'] += 1
+    order, scores = result
+    return [{**hits[i], 'score': float(scores[i])} for i in order[:k]]
+
+def _record_stages(stats: dict):
+    with _stage_lock:
+        _stage_totals['searches'] += 1
+        for name, value in stats.items():
+            _stage_totals[name] += value
+
+def stage_stats():
+
+    """
+    Cumulative retrieve/rerank timings over uncached searches, with means
+    per search (retrieve) and per reranked query (rerank).
+    """
+
+    with _stage_lock:
+        totals = dict(_stage_totals)
+    attempts = totals['reranked'] + totals['rerank_fallbacks']
+    totals['retrieve_mean_s'] = totals['retrieve_s'] / totals['searches'] if totals['searches'] else 0.0
+    totals['rerank_mean_s'] = totals['rerank_s'] / attempts if attempts else 0.0
+    return totals
+
+def normalize_query(query: str) -> str:
+
+    """
+    Cache key for a query: trimmed, whitespace-collapsed and lowercased.
+    Only used to look up the caches; encoders, BM25 and the reranker get
+    the query with its casing (see _collapse).
+    """
+
+    return _collapse(query).lower()
+
+def _collapse(query: str) -> str:
+    return ' '.join(query.split())
+
+def embed_query(query: str):
+
+    """
+    Return the normalized float32 embedding of `query` (shared with search()
+    through the query-vector cache, so calling both encodes only once).
+    """
+
+    _load()
+    return _query_vectors([normalize_query(query)], [_collapse(query)])[0]
+
+def _query_vectors(keys, texts, batch_size: int = QUERY_BATCH_SIZE):
+
+    """
+    Return a float32 matrix of vectors of `texts`, cached under `keys` and
+    encoding only cache misses.
+    """
+
+    vecs = [_vec_cache.get(key) for key in keys]
+    missing = [i for i, v in enumerate(vecs) if v is None]
+    if missing:
+        with span('retrieval.embed', queries=len(missing), cache_hits=len(keys) - len(missing)):
+            new = np.asarray(_model.encode([texts[i] for i in missing], batch_size=batch_size,
+                                           normalize_embeddings=True), dtype='float32')
+        for i, vec in zip(missing, new):
+            _vec_cache.set(keys[i], vec)
+            vecs[i] = vec
+    return np.vstack(vecs).astype('float32', copy=False)
+
+def cache_stats():
+
+    """
+    Hit/miss counters of the query-vector, result and on-disk embedding caches.
+    """
+
+    return {
+        'query_vectors': _vec_cache.stats(),
+        'results': _hits_cache.stats(),
+        'embeddings': embedding_cache_stats(),
+    }
+
 def format_citations(hits):
 
     """
     Extract lightweight citation info from retrieved chunks.
 
-    - Attempts to detect an 'Art. X' pattern in the chunk text.
+    - Uses the article ids recorded at ingestion when available, otherwise
+      attempts to detect an 'Art. X' pattern in the chunk text.
     - Returns a compact structure to render inline or in a citations block.
 
     Args:
@@ -90,9 +605,12 @@ def format_citations(hits):
     for h in hits:
         # Try to capture "Art. 12" style markers to improve citation quality
         article = None
-        m = re.search(r'Art\.\s*(\d+)', h['text'])
-        if m:
-            article = m.group(1)
+        if h.get('article'):
+            article = h['article'].replace(',', ', ')
+        else:
+            m = re.search(r'Art\.\s*(\d+)', h['text'])
+            if m:
+                article = m.group(1)
         results.append({
             'source': h['doc_path'].split('/')[-1],
             'article': article,
@@ -0,0 +1,194 @@
+# snapshots.py — versioned index directories behind an atomic CURRENT pointer
+#
+# Layout under retrieval.snapshots.root:
+#   CURRENT                    name of the live version (one line)
+#   <version>/faiss_index      FAISS index
+#   <version>/vectors.npy      flat index vectors for mmap serving (+ vector_ids.npy;
+#                              only with retrieval.shared_memory.mmap)
+#   <version>/meta/            chunk metadata (retrieval.metastore)
+#   <version>/lexical/         BM25 index (retrieval.lexical)
+#   <version>/manifest.json    ingestion manifest
+#
+# ingestion.ingest writes every build into a new version directory and only
+# then publishes it by replacing CURRENT (os.replace is atomic), so readers
+# see the old or the new version, never a half-written one. Running
+# retrievers notice the new name and swap the version in between queries
+# (see retrieval.retriever). collect_garbage() deletes versions older than
+# the newest `keep` up to the live one; the live one and anything newer
+# (builds in progress, versions rolled back from) are never deleted.
+#
+# Indexes built before snapshots (flat files under retrieval/vectordb/, the
+# index_path / metadata_path / lexical.path settings) are still served until
+# the first version is published.
+#
+# Usage:
+#   python -m retrieval.snapshots          list versions (* = live)
+#   python -m retrieval.snapshots --gc     delete old versions
+
+import os
+import time
+import shutil
+import argparse
+import yaml
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_SNAP_CFG = CFG['retrieval'].get('snapshots', {}) or {}
+
+SNAPSHOT_ROOT = _SNAP_CFG.get('root', 'retrieval/vectordb/snapshots')
+KEEP          = int(_SNAP_CFG.get('keep', 2))
+POLL_S        = float(_SNAP_CFG.get('poll_s', 2))
+POINTER = 'CURRENT'
+
+# Pre-snapshot single-version layout
+_META_PATH = CFG['retrieval']['metadata_path']
+LEGACY_PATHS = {
+    'index': CFG['retrieval']['index_path'],
+    'meta': _META_PATH,
+    'lexical': (CFG['retrieval'].get('lexical', {}) or {}).get('path', 'retrieval/vectordb/lexical'),
+    'manifest': os.path.join(os.path.dirname(_META_PATH), 'manifest.json'),
+}
+# File names inside a version directory
+FILES = {name: os.path.basename(path) for name, path in LEGACY_PATHS.items()}
+
+
+def snapshot_paths(directory: str):
+
+    """
+    {'index', 'meta', 'lexical', 'manifest'} paths inside a version directory.
+    """
+
+    return {name: os.path.join(directory, file) for name, file in FILES.items()}
+
+def list_versions(root: str = SNAPSHOT_ROOT):
+
+    """
+    Version names under `root`, oldest first (names sort by creation time).
+    """
+
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if os.path.isdir(os.path.join(root, n)))
+
+def current(root: str = SNAPSHOT_ROOT):
+
+    """
+    Name of the published version, or None if nothing was published yet.
+    """
+
+    try:
+        with open(os.path.join(root, POINTER), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return name if name and os.path.isdir(os.path.join(root, name)) else None
+
+def resolve(root: str = SNAPSHOT_ROOT, legacy: dict = LEGACY_PATHS):
+
+    """
+    (version, paths) of the index to serve: the published version, else the
+    legacy flat layout (version 'legacy-<mtime>-<size>'), else (None, None).
+    """
+
+    name = current(root)
+    if name is not None:
+        return name, snapshot_paths(os.path.join(root, name))
+    if legacy is not None:
+        try:
+            st = os.stat(legacy['index'])
+        except OSError:
+            return None, None
+        return f'legacy-{st.st_mtime_ns}-{st.st_size}', dict(legacy)
+    return None, None
+
+def create(root: str = SNAPSHOT_ROOT):
+
+    """
+    Make an empty, unpublished version directory; returns (version, path).
+    """
+
+    os.makedirs(root, exist_ok=True)
+    while True:
+        now = time.time_ns()
+        name = time.strftime('%Y%m%d-%H%M%S', time.gmtime(now // 10**9)) + f'.{now % 10**9:09d}'
+        path = os.path.join(root, name)
+        try:
+            os.mkdir(path)
+            return name, path
+        except FileExistsError:
+            continue
+
+def publish(version: str, root: str = SNAPSHOT_ROOT):
+
+    """
+    Atomically make `version` the live one.
+    """
+
+    if not os.path.isdir(os.path.join(root, version)):
+        raise FileNotFoundError(f'No snapshot {version!r} under {root}')
+    tmp = os.path.join(root, f'{POINTER}.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, POINTER))
+
+def discard(version: str, root: str = SNAPSHOT_ROOT):
+
+    """
+    Delete an unpublished (e.g. failed) version.
+    """
+
+    if version != current(root):
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+def collect_garbage(root: str = SNAPSHOT_ROOT, keep: int = KEEP):
+
+    """
+    Delete versions older than the live one, except the newest `keep`
+    counting the live one. Nothing is deleted before a first publish.
+
+    Notes:
+        - Processes still serving a deleted version keep working on POSIX
+          (open and memory-mapped files outlive their directory entry);
+          keep >= 2 leaves the previous version for processes that have
+          not swapped yet.
+        - Directories newer than the live version are never deleted: they
+          are builds in progress (or versions rolled back from). A build
+          started before the live version was published and still running
+          can be deleted; it then fails instead of publishing, so run one
+          ingestion at a time.
+
+    Returns:
+        List[str]: deleted version names.
+    """
+
+    live = current(root)
+    if live is None:
+        return []
+    older = [name for name in list_versions(root) if name <= live]
+    kept = set(older[-max(1, keep):]) | {live}
+    removed = []
+    for name in older:
+        if name not in kept:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed.append(name)
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description='List or garbage-collect index snapshots.')
+    parser.add_argument('--root', default=SNAPSHOT_ROOT)
+    parser.add_argument('--gc', action='store_true', help='delete old versions')
+    parser.add_argument('--keep', type=int, default=KEEP)
+    args = parser.parse_args()
+
+    if args.gc:
+        for name in collect_garbage(args.root, args.keep):
+            print(f'deleted {name}')
+    live = current(args.root)
+    for name in list_versions(args.root):
+        print(f"{'*' if name == live else ' '} {name}")
+
+if __name__ == '__main__':
+    main()
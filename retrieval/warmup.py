@@ -0,0 +1,85 @@
+# warmup.py — background loading of the retrieval stack at app start
+#
+# Without it the first question pays for the torch import, model load and
+# index read all at once. WarmUp runs retriever.warm_up() in a daemon thread
+# as soon as the app starts and exposes its progress for the sidebar; a
+# query arriving earlier simply waits on the retriever's load lock.
+
+import time
+import threading
+
+from retrieval import retriever
+
+STAGES = ('index', 'model', 'encode')
+
+
+class WarmUp:
+
+    """
+    One background warm-up of the retriever (index, model, first encode).
+
+    Notes:
+        - Keep a single instance per process (the app holds it in
+          st.cache_resource); start() is idempotent.
+        - A failure (e.g. no index built yet) is recorded in status() and
+          does not stop the app; search() retries the load on first use.
+    """
+
+    def __init__(self):
+        self.stage = None
+        self.error = None
+        self._started = None
+        self._finished = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._started = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name='retrieval-warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            retriever.warm_up(progress=self._set_stage)
+            self.stage = 'ready'
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished = time.perf_counter()
+
+    def _set_stage(self, stage):
+        self.stage = stage
+
+    def wait(self, timeout: float = None) -> bool:
+
+        """
+        Block until the warm-up finished (or timeout); True if ready.
+        """
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == 'ready'
+
+    def status(self):
+
+        """
+        Snapshot for display: stage, progress in [0, 1], elapsed seconds,
+        ready flag and error message (None if fine).
+        """
+
+        done = STAGES.index(self.stage) if self.stage in STAGES else (len(STAGES) if self.ready else 0)
+        end = self._finished or time.perf_counter()
+        return {
+            'stage': self.stage,
+            'progress': done / len(STAGES),
+            'elapsed_s': (end - self._started) if self._started else 0.0,
+            'ready': self.ready,
+            'error': None if self.error is None else str(self.error),
+        }
@@ -0,0 +1,333 @@
+# app.py — headless HTTP service for search, answers and news (ASGI)
+#
+# Usage:
+#   python -m service.app [--host 127.0.0.1] [--port 8008]
+#   uvicorn service.app:app --port 8008        (equivalent; needs `uvicorn`)
+#
+# Endpoints (JSON bodies):
+#   POST /search  {"query", "k"?, "mode"?, "rerank"?, "filters"?}  -> {"hits": [...]}
+#   POST /answer  {"question", "k"?, "filters"?, "temperature"?}   -> NDJSON stream:
+#                 {"type": "sources", ...}, {"type": "token", "text"}..., {"type": "done", ...}
+#   POST /news    {"company", "timespan"?, "max_articles"?, "score"?} -> {"articles": [...]}
+#   GET  /health  warm-up state, index version, batcher and LLM client counters
+#
+# One process holds one retriever (index, metadata, embedding model) for all
+# connections: searches go through service.batcher, which embeds concurrent
+# queries together, and blocking work (search, LLM stream, GDELT) runs in a
+# bounded thread pool so the event loop only shuffles bytes. Run it with a
+# single worker process; every extra worker would load its own copy.
+#
+# Written against the bare ASGI interface, so no web framework is needed.
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import yaml
+from requests.exceptions import HTTPError, RequestException
+
+from retrieval import retriever
+from retrieval.context import SYSTEM_COMPLIANCE, build_rag_prompt
+from retrieval.response_cache import get_response_cache, chunk_key
+from retrieval.warmup import WarmUp
+from models import llm_client
+from news.gdelt_search import MAX_ARTS, TIMESPAN, search_company_news
+from news.risk import score_articles
+from service.batcher import QueryBatcher
+from telemetry.tracing import trace, span
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_SVC_CFG = CFG.get('service', {}) or {}
+
+HOST    = _SVC_CFG.get('host', '127.0.0.1')
+PORT    = int(_SVC_CFG.get('port', 8008))
+THREADS = int(_SVC_CFG.get('threads', 8))
+MAX_K   = 50
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+def _text(body: dict, name: str) -> str:
+    value = body.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise BadRequest(f'"{name}" must be a non-empty string')
+    return value
+
+def _k(body: dict) -> int:
+    k = body.get('k', retriever.TOP_K)
+    if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= MAX_K:
+        raise BadRequest(f'"k" must be an integer between 1 and {MAX_K}')
+    return k
+
+def _temperature(body: dict) -> float:
+    value = body.get('temperature', 0.2)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 2:
+        raise BadRequest('"temperature" must be a number between 0 and 2')
+    return float(value)
+
+def _filters(body: dict):
+    value = body.get('filters')
+    if value is not None and not isinstance(value, dict):
+        raise BadRequest('"filters" must be an object')
+    return value
+
+
+class ComplianceService:
+
+    """
+    ASGI application serving the retrieval + LLM stack.
+
+    Args:
+        batcher: QueryBatcher for /search and /answer retrieval (default:
+                 one built from the service config).
+        threads: worker threads for blocking calls (search batches, LLM
+                 streams, GDELT, risk scoring).
+        warm_up: load index and embedding model in the background at
+                 startup (retrieval.warmup.WarmUp).
+
+    Notes:
+        - The ASGI lifespan protocol starts the batcher and the warm-up;
+          servers without lifespan support get them on the first request.
+        - An /answer stream stops generating (and frees its LLM slot) when
+          the client goes away.
+    """
+
+    def __init__(self, batcher: QueryBatcher = None, threads: int = THREADS, warm_up: bool = True):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='service')
+        self.batcher = batcher or QueryBatcher(executor=self.executor)
+        self.warmup = WarmUp() if warm_up else None
+        self._routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/search'): self.search,
+            ('POST', '/answer'): self.answer,
+            ('POST', '/news'): self.news,
+        }
+
+    # -- ASGI plumbing -------------------------------------------------------
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        await self.startup()
+
+        handler = self._routes.get((scope['method'], scope['path']))
+        if handler is None:
+            allowed = any(path == scope['path'] for _, path in self._routes)
+            return await self._send_json(send, 405 if allowed else 404,
+                                         {'error': 'method not allowed' if allowed else 'not found'})
+        try:
+            body = await self._read_json(receive) if scope['method'] == 'POST' else {}
+            await handler(body, send)
+        except BadRequest as e:
+            await self._send_json(send, 400, {'error': str(e)})
+        except llm_client.QueueTimeout as e:
+            await self._send_json(send, 503, {'error': str(e)})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        await self.batcher.start()
+        if self.warmup is not None:
+            self.warmup.start()
+
+    async def shutdown(self):
+        await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    @staticmethod
+    async def _read_json(receive) -> dict:
+        chunks, more = [], True
+        while more:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise BadRequest('client disconnected')
+            chunks.append(message.get('body', b''))
+            more = message.get('more_body', False)
+        raw = b''.join(chunks)
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            raise BadRequest('body must be JSON')
+        if not isinstance(body, dict):
+            raise BadRequest('body must be a JSON object')
+        return body
+
+    @staticmethod
+    async def _send_json(send, status: int, obj):
+        data = _dumps(obj)
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(data)).encode())]})
+        await send({'type': 'http.response.body', 'body': data})
+
+    async def _run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    # -- endpoints -----------------------------------------------------------
+
+    async def health(self, body, send):
+        await self._send_json(send, 200, {
+            'status': 'ok',
+            'warmup': self.warmup.status() if self.warmup is not None else None,
+            'index_version': retriever.index_version(),
+            'batcher': self.batcher.stats(),
+            'llm': llm_client.get_client().metrics(),
+        })
+
+    async def search(self, body, send):
+        query, k = _text(body, 'query'), _k(body)
+        t0 = time.perf_counter()
+        try:
+            hits = await self.batcher.search(query, k=k, mode=body.get('mode'), rerank=body.get('rerank'),
+                                             filters=_filters(body))
+        except ValueError as e:
+            raise BadRequest(str(e))
+        await self._send_json(send, 200, {'hits': hits, 'ms': round((time.perf_counter() - t0) * 1000, 2)})
+
+    async def answer(self, body, send):
+        question, k, temperature = _text(body, 'question'), _k(body), _temperature(body)
+        try:
+            hits = await self.batcher.search(question, k=k, filters=_filters(body))
+        except ValueError as e:
+            raise BadRequest(str(e))
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')]})
+
+        async def emit(obj):
+            await send({'type': 'http.response.body', 'body': _dumps(obj) + b'\n', 'more_body': True})
+
+        with trace('service.answer', chunks=len(hits)):
+            if not hits:
+                await emit({'type': 'sources', 'citations': [], 'context_tokens': 0})
+                await emit({'type': 'done', 'no_context': True})
+                return await send({'type': 'http.response.body', 'body': b''})
+
+            with span('prompt.build', chunks=len(hits)) as s_prompt:
+                prompt, packed, cits = build_rag_prompt(question, hits)
+                s_prompt.set(chars=len(prompt), context_tokens=packed['tokens'],
+                             saved_tokens=packed['saved_tokens'])
+            await emit({'type': 'sources', 'citations': cits, 'context_tokens': packed['tokens'],
+                        'blocks': packed['blocks']})
+
+            # Same reuse of near-identical questions over the same chunks as the app
+            resp_cache = get_response_cache()
+            cached, qvec, rkey = None, None, None
+            if resp_cache is not None:
+                qvec = await self._run(retriever.embed_query, question)
+                rkey = chunk_key(hits, variant=SYSTEM_COMPLIANCE)
+                cached = await self._run(resp_cache.lookup, rkey, qvec, retriever.index_version())
+            if cached is not None:
+                await emit({'type': 'token', 'text': cached})
+                await emit({'type': 'done', 'cached': True})
+                return await send({'type': 'http.response.body', 'body': b''})
+
+            stats, parts = {}, []
+            async with aclosing(self._stream(prompt, temperature, stats)) as tokens:
+                async for token in tokens:
+                    parts.append(token)
+                    await emit({'type': 'token', 'text': token})
+            if resp_cache is not None and parts:
+                await self._run(resp_cache.store, rkey, qvec, ''.join(parts), retriever.index_version())
+            await emit({'type': 'done', 'cached': False,
+                        **{key: stats[key] for key in ('ttft_s', 'total_s', 'prompt_eval_count', 'eval_count',
+                                                       'error') if key in stats}})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _stream(self, prompt: str, temperature: float, stats: dict):
+
+        """
+        Async iterator over llm_client.generate_stream() run in a worker
+        thread. Errors end the stream and are reported in stats['error'].
+        """
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            gen = llm_client.generate_stream(prompt, temperature=temperature, system=SYSTEM_COMPLIANCE,
+                                             stats=stats)
+            try:
+                for token in gen:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            except Exception as e:
+                stats['error'] = str(e)
+            finally:
+                gen.close()
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        worker = loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                token = await queue.get()
+                if token is None:
+                    break
+                yield token
+        finally:
+            # Client gone or stream finished: let the thread release its LLM slot
+            stop.set()
+            await asyncio.shield(worker)
+
+    async def news(self, body, send):
+        company = _text(body, 'company')
+        timespan = str(body.get('timespan', TIMESPAN))
+        max_articles = body.get('max_articles', MAX_ARTS)
+        if isinstance(max_articles, bool) or not isinstance(max_articles, int) or not 1 <= max_articles <= 250:
+            raise BadRequest('"max_articles" must be an integer between 1 and 250')
+        try:
+            articles = await self._run(search_company_news, company, max_articles=max_articles,
+                                       timespan=timespan)
+        except (HTTPError, RequestException) as e:
+            return await self._send_json(send, 502, {'error': f'GDELT request failed: {e}'})
+        articles = [dict(a, company=company) for a in articles]
+        out = {'articles': articles}
+        if body.get('score') and articles:
+            out['scored'], out['stats'] = await self._run(score_articles, articles)
+        await self._send_json(send, 200, out)
+
+
+app = ComplianceService()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve search, answers and news over HTTP.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit('The HTTP service needs an ASGI server: pip install uvicorn')
+    # One worker process: the index and embedding model are loaded once and shared
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# batcher.py — asyncio micro-batching of concurrent search requests
+#
+# Requests arriving within `max_wait_ms` of each other (up to `max_batch`)
+# are answered by one retriever.search_many() call, so N concurrent users
+# cost one embedding forward pass and one FAISS search over the stacked
+# query matrix instead of N. A single consumer runs the batches in a worker
+# thread; while one batch is being searched the next one accumulates, so
+# batches grow with the load instead of queueing one request at a time.
+#
+#   batcher = QueryBatcher()
+#   await batcher.start()
+#   hits = await batcher.search('gift limit for public officials', k=4)
+
+import json
+import time
+import asyncio
+import yaml
+
+from retrieval import retriever
+from telemetry.tracing import record
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_SVC_CFG = CFG.get('service', {}) or {}
+
+MAX_BATCH   = int(_SVC_CFG.get('max_batch', 32))
+MAX_WAIT_MS = float(_SVC_CFG.get('max_wait_ms', 5))
+
+
+def _group_key(k, mode, rerank, filters):
+    return (k, mode, rerank, json.dumps(filters, sort_keys=True) if filters else None)
+
+
+class QueryBatcher:
+
+    """
+    Queue of pending searches drained in micro-batches.
+
+    Args:
+        search_many: batched search function (default retriever.search_many,
+                     looked up at call time).
+        max_batch:   queries per search_many() call.
+        max_wait_ms: how long the first request of a batch waits for others.
+        executor:    concurrent.futures executor for the blocking search
+                     (default: the event loop's).
+
+    Notes:
+        - Requests with different (k, mode, rerank, filters) can share a
+          batch window; they are split into one search_many() call per
+          combination.
+        - `stats()` reports requests, batches and the mean/max batch size.
+    """
+
+    def __init__(self, search_many=None, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS,
+                 executor=None):
+        self._search_many = search_many
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000
+        self._executor = executor
+        self._queue = None
+        self._task = None
+        self._counts = {'requests': 0, 'batches': 0, 'max_batch': 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait()[3].cancel()
+
+    async def search(self, query: str, k: int = retriever.TOP_K, mode: str = None, rerank: bool = None,
+                     filters: dict = None):
+
+        """
+        Queue one search and wait for its hits (same format as search()).
+        Errors raised by search_many (e.g. an unknown mode) are re-raised
+        here for every request of the failed group.
+        """
+
+        if not self.running:
+            await self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, _group_key(k, mode, rerank, filters), filters, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(loop, batch)
+
+    async def _dispatch(self, loop, batch):
+        self._counts['requests'] += len(batch)
+        self._counts['batches'] += 1
+        self._counts['max_batch'] = max(self._counts['max_batch'], len(batch))
+
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[1], []).append(item)
+        for (k, mode, rerank, _), items in groups.items():
+            search_many = self._search_many or retriever.search_many
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, lambda: search_many([q for q, _, _, _ in items], k, mode=mode,
+                                                        rerank=rerank, filters=items[0][2]))
+            except Exception as e:
+                for _, _, _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            record('service.search_batch', time.perf_counter() - start, queries=len(items), k=k)
+            for (_, _, _, fut), hits in zip(items, results):
+                if not fut.done():
+                    fut.set_result(hits)
+
+    def stats(self):
+        c = dict(self._counts)
+        c['mean_batch'] = round(c['requests'] / c['batches'], 2) if c['batches'] else 0.0
+        c['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return c
@@ -0,0 +1,74 @@
+# client.py — small Python client for the HTTP service (service.app)
+#
+#   client = ServiceClient('http://127.0.0.1:8008')
+#   hits = client.search('gift limit for public officials', k=4)
+#   for event in client.answer('Can I accept a gift from a supplier?'):
+#       ...   # {'type': 'sources'|'token'|'done', ...}
+
+import json
+import requests
+import yaml
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+SERVICE_URL = (CFG.get('service', {}) or {}).get('url', 'http://127.0.0.1:8008')
+REQUEST_TIMEOUT_S = 120
+
+
+class ServiceError(RuntimeError):
+    pass
+
+
+class ServiceClient:
+
+    """
+    Pooled requests-based client; one instance can be shared by threads.
+
+    Args:
+        url:     service base URL (default: service.url from config.yaml).
+        timeout: seconds between received bytes before giving up.
+    """
+
+    def __init__(self, url: str = None, timeout: float = REQUEST_TIMEOUT_S):
+        self.url = (url or SERVICE_URL).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, path: str, body: dict, stream: bool = False):
+        r = self.session.post(f'{self.url}{path}', json=body, timeout=self.timeout, stream=stream)
+        if r.status_code != 200:
+            try:
+                message = r.json().get('error')
+            except ValueError:
+                message = r.text
+            r.close()
+            raise ServiceError(f'{path}: HTTP {r.status_code}: {message}')
+        return r
+
+    def health(self) -> dict:
+        r = self.session.get(f'{self.url}/health', timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def search(self, query: str, k: int = None, mode: str = None, filters: dict = None):
+        body = {'query': query, 'k': k, 'mode': mode, 'filters': filters}
+        return self._post('/search', {key: v for key, v in body.items() if v is not None}).json()['hits']
+
+    def answer(self, question: str, k: int = None, filters: dict = None, temperature: float = None):
+
+        """
+        Yield the /answer events as dicts: one 'sources' event, 'token'
+        events with text fragments, then a 'done' event.
+        """
+
+        body = {'question': question, 'k': k, 'filters': filters, 'temperature': temperature}
+        with self._post('/answer', {key: v for key, v in body.items() if v is not None}, stream=True) as r:
+            for line in r.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def news(self, company: str, timespan: str = None, max_articles: int = None, score: bool = False):
+        body = {'company': company, 'timespan': timespan, 'max_articles': max_articles, 'score': score}
+        return self._post('/news', {key: v for key, v in body.items() if v is not None}).json()
+
+    def close(self):
+        self.session.close()
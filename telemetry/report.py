@@ -0,0 +1,128 @@
+# report.py — per-stage latency percentiles from the trace JSONL files
+#
+# Usage:
+#   python -m telemetry.report [logs/traces.jsonl] [--since 24h] [--name llm.] [--json out.json]
+#
+# Reads the file and its rotated backups (.1, .2, ...). For every span name
+# prints count, p50/p95/p99/max in ms and, for LLM spans, mean prompt and
+# completion tokens and decode rate (eval_count / eval_duration_s); for
+# prompt.pack, mean context tokens and tokens saved by packing.
+
+import os
+import re
+import sys
+import json
+import glob
+import time
+import argparse
+import numpy as np
+
+from telemetry.tracing import TRACE_PATH
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_since(value: str) -> float:
+
+    """
+    '90m' / '24h' / '7d' -> seconds.
+    """
+
+    m = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value.strip())
+    if not m:
+        raise argparse.ArgumentTypeError(f'bad duration {value!r}; use e.g. 30m, 24h, 7d')
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+def iter_spans(path: str = TRACE_PATH, since_s: float = None):
+
+    """
+    Yield span dicts from `path` and its rotated backups, oldest file first.
+    Malformed lines (e.g. a partially written last line) are skipped.
+    """
+
+    backups = [p for p in glob.glob(path + '.*') if p.rsplit('.', 1)[1].isdigit()]
+    files = sorted(backups, key=lambda p: -int(p.rsplit('.', 1)[1]))
+    if os.path.exists(path):
+        files.append(path)
+    cutoff = time.time() - since_s if since_s else None
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if cutoff is None or event.get('ts', 0) >= cutoff:
+                    yield event
+
+def summarize(spans, prefix: str = None):
+
+    """
+    Per-name latency percentiles (ms) and token statistics.
+
+    Returns:
+        List[dict] sorted by name.
+    """
+
+    by_name = {}
+    for s in spans:
+        if prefix and not s['name'].startswith(prefix):
+            continue
+        by_name.setdefault(s['name'], []).append(s)
+
+    rows = []
+    for name in sorted(by_name):
+        group = by_name[name]
+        ms = np.array([s['ms'] for s in group], dtype='float64')
+        row = {
+            'name': name,
+            'count': len(group),
+            'errors': sum(1 for s in group if s.get('error')),
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(ms, 99)), 2),
+            'max_ms': round(float(ms.max()), 2),
+        }
+        prompt = [s['prompt_eval_count'] for s in group if s.get('prompt_eval_count') is not None]
+        completion = [s['eval_count'] for s in group if s.get('eval_count') is not None]
+        rates = [s['eval_count'] / s['eval_duration_s'] for s in group
+                 if s.get('eval_count') and s.get('eval_duration_s')]
+        if prompt:
+            row['prompt_tokens'] = round(float(np.mean(prompt)), 1)
+        if completion:
+            row['completion_tokens'] = round(float(np.mean(completion)), 1)
+        if rates:
+            row['tokens_per_s'] = round(float(np.mean(rates)), 1)
+        saved = [s['saved_tokens'] for s in group if s.get('saved_tokens') is not None]
+        if saved:
+            row['context_tokens'] = round(float(np.mean([s.get('tokens', 0) for s in group])), 1)
+            row['saved_tokens'] = round(float(np.mean(saved)), 1)
+        rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency percentiles per traced stage.')
+    parser.add_argument('path', nargs='?', default=TRACE_PATH)
+    parser.add_argument('--since', type=parse_since, help='only spans newer than e.g. 30m, 24h, 7d')
+    parser.add_argument('--name', help='only span names starting with this prefix')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    rows = summarize(iter_spans(args.path, args.since), args.name)
+    if not rows:
+        sys.exit(f'No spans found in {args.path}')
+
+    cols = ['name', 'count', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+            'prompt_tokens', 'completion_tokens', 'tokens_per_s', 'context_tokens', 'saved_tokens']
+    cols = [c for c in cols if any(c in r for r in rows)]
+    width = max(len(r['name']) for r in rows)
+    print(f"{'name':<{width}}  " + '  '.join(f'{c:>17}' for c in cols[1:]))
+    for r in rows:
+        print(f"{r['name']:<{width}}  " + '  '.join(f"{r.get(c, '')!s:>17}" for c in cols[1:]))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# tracing.py — lightweight spans written to a rotating local JSONL file
+#
+# Usage:
+#   with trace('chat_turn', mode='rag'):          # root: new trace id
+#       with span('retrieval.embed', n=1) as s:   # child of the active span
+#           ...
+#           s.set(cache_hits=3)
+#   record('llm.ttft', 0.42, eval_count=120)      # span measured elsewhere
+#
+# One JSON object per finished span:
+#   {"ts": start epoch s, "name", "ms": duration, "trace", "span", "parent",
+#    ...attributes, "error": exception type if the block raised}
+#
+# Callers only time the block and put a dict on a queue; a daemon thread
+# serializes and writes through a RotatingFileHandler (max_mb x backups).
+# With telemetry.enabled: false spans are no-ops.
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+import yaml
+
+# ---------------------------------------------------------------------------
+# Load telemetry configuration from YAML
+# ---------------------------------------------------------------------------
+
+CFG = yaml.safe_load(open('configs/config.yaml', 'r'))
+_TEL_CFG = CFG.get('telemetry', {}) or {}
+
+TRACE_ENABLED = bool(_TEL_CFG.get('enabled', True))
+TRACE_PATH    = _TEL_CFG.get('path', 'logs/traces.jsonl')
+TRACE_MAX_MB  = float(_TEL_CFG.get('max_mb', 10))
+TRACE_BACKUPS = int(_TEL_CFG.get('backups', 3))
+
+# (trace id, span id) of the innermost active span in this thread/task
+_current = contextvars.ContextVar('trace_span', default=(None, None))
+
+
+class Span:
+
+    """
+    Attributes of one timed block; `set()` adds attributes before it ends.
+    """
+
+    __slots__ = ('name', 'attrs')
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _Writer:
+
+    """
+    Background JSONL writer: queue -> json.dumps -> rotating file.
+    """
+
+    def __init__(self, path: str, max_mb: float, backups: int):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._handler = RotatingFileHandler(path, maxBytes=int(max_mb * 2**20),
+                                            backupCount=backups, encoding='utf-8', delay=True)
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='trace-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, event: dict):
+        self._queue.put(event)
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                msg = json.dumps(event, ensure_ascii=False, default=str)
+                self._handler.emit(logging.makeLogRecord({'msg': msg, 'levelno': logging.INFO}))
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+        self._handler.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._handler.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_ids = iter(range(1, 2**63))
+_pid = os.getpid()
+
+def configure(path: str = None, enabled: bool = None, max_mb: float = None, backups: int = None):
+
+    """
+    (Re)configure the trace sink; finishes writing pending spans first.
+    Defaults come from the `telemetry` section of config.yaml.
+    """
+
+    global _writer, TRACE_ENABLED, TRACE_PATH, TRACE_MAX_MB, TRACE_BACKUPS
+    with _writer_lock:
+        if _writer is not None:
+            _writer.flush()
+            _writer.close()
+            _writer = None
+        TRACE_ENABLED = TRACE_ENABLED if enabled is None else bool(enabled)
+        TRACE_PATH = path or TRACE_PATH
+        TRACE_MAX_MB = TRACE_MAX_MB if max_mb is None else float(max_mb)
+        TRACE_BACKUPS = TRACE_BACKUPS if backups is None else int(backups)
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _Writer(TRACE_PATH, TRACE_MAX_MB, TRACE_BACKUPS)
+    return _writer
+
+def flush():
+
+    """
+    Block until all queued spans are written (tests, CLI shutdown).
+    """
+
+    if _writer is not None:
+        _writer.flush()
+
+atexit.register(flush)
+
+def _new_id() -> str:
+    return f'{_pid:x}-{next(_ids):x}'
+
+def _emit(name: str, start: float, duration_s: float, trace_id, span_id, parent, attrs: dict):
+    event = {'ts': round(start, 6), 'name': name, 'ms': round(duration_s * 1000, 3),
+             'trace': trace_id, 'span': span_id, 'parent': parent}
+    event.update(attrs)
+    _get_writer().put(event)
+
+@contextmanager
+def span(name: str, **attrs):
+
+    """
+    Time the enclosed block as a child of the active span (or as a span
+    without a trace when none is active). Yields a Span for extra attributes.
+    """
+
+    if not TRACE_ENABLED:
+        yield Span(name, attrs)
+        return
+    trace_id, parent = _current.get()
+    span_id = _new_id()
+    token = _current.set((trace_id, span_id))
+    s = Span(name, attrs)
+    start, t0 = time.time(), time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs['error'] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        _emit(name, start, time.perf_counter() - t0, trace_id, span_id, parent, s.attrs)
+
+@contextmanager
+def trace(name: str, **attrs):
+
+    """
+    Start a new trace (e.g. one chat turn) whose root span is `name`.
+    """
+
+    if not TRACE_ENABLED:
+        yield Span(name, attrs)
+        return
+    token = _current.set((_new_id(), None))
+    try:
+        with span(name, **attrs) as s:
+            yield s
+    finally:
+        _current.reset(token)
+
+def record(name: str, duration_s: float, **attrs):
+
+    """
+    Record a span timed by the caller (e.g. time-to-first-token measured
+    inside a streaming generator), attached to the active trace.
+    """
+
+    if not TRACE_ENABLED or duration_s is None:
+        return
+    trace_id, parent = _current.get()
+    _emit(name, time.time() - duration_s, duration_s, trace_id, _new_id(), parent, attrs)
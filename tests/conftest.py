@@ -0,0 +1,171 @@
+import json
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+
+from models import embedding_cache
+from retrieval.query_cache import TTLCache
+
+
+class FakeEncoder:
+
+    """
+    Deterministic stand-in for SentenceTransformer (no model download).
+    Each text maps to a fixed pseudo-random vector seeded by its sha256.
+    """
+
+    dim = 16
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        self.calls += 1
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        rows = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode('utf-8')).digest()[:4], 'little')
+            v = np.random.default_rng(seed).standard_normal(self.dim).astype('float32')
+            if normalize_embeddings:
+                v /= np.linalg.norm(v)
+            rows.append(v)
+        mat = np.vstack(rows) if rows else np.zeros((0, self.dim), dtype='float32')
+        return mat[0] if single else mat
+
+
+@pytest.fixture
+def fake_encoder():
+    return FakeEncoder()
+
+
+@pytest.fixture(autouse=True)
+def tmp_embedding_cache(monkeypatch, tmp_path):
+    # Keep tests from reading/writing the configured on-disk cache
+    cache = embedding_cache.EmbeddingCache(str(tmp_path / 'embedding_cache.sqlite'))
+    monkeypatch.setattr(embedding_cache, '_default_cache', cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def tmp_news_cache(monkeypatch, tmp_path):
+    # Created lazily under tmp_path on first use instead of news/cache/
+    from news import news_cache
+    monkeypatch.setattr(news_cache, 'CACHE_PATH', str(tmp_path / 'news_cache.sqlite'))
+    monkeypatch.setattr(news_cache, '_default_cache', None)
+    yield
+    if news_cache._default_cache is not None:
+        news_cache._default_cache.close()
+
+
+@pytest.fixture(autouse=True)
+def tmp_risk_store(monkeypatch, tmp_path):
+    # Created lazily under tmp_path on first use instead of news/cache/
+    from news import risk
+    monkeypatch.setattr(risk, 'STORE_PATH', str(tmp_path / 'risk.sqlite'))
+    monkeypatch.setattr(risk, '_default_store', None)
+    yield
+    if risk._default_store is not None:
+        risk._default_store.close()
+
+
+@pytest.fixture(autouse=True)
+def tmp_traces(tmp_path):
+    # Spans go to a per-test file instead of logs/traces.jsonl
+    from telemetry import tracing
+    path = str(tmp_path / 'traces.jsonl')
+    tracing.configure(path=path, enabled=True)
+    yield path
+    tracing.configure(path=tracing._TEL_CFG.get('path', 'logs/traces.jsonl'))
+
+
+@pytest.fixture
+def tmp_ingest(monkeypatch, tmp_path, fake_encoder):
+    # ingestion.ingest writing snapshots under tmp_path with the fake encoder
+    from ingestion import ingest
+    monkeypatch.setattr(ingest, 'SNAPSHOT_ROOT', str(tmp_path / 'snapshots'))
+    monkeypatch.setattr(ingest, 'LEGACY_PATHS', None)
+    monkeypatch.setattr(ingest, 'get_embedding_model', lambda name: fake_encoder)
+    return ingest
+
+
+@pytest.fixture
+def built_index(monkeypatch, tmp_ingest, fake_encoder):
+    # Index over data/ built with the fake encoder; retriever pointed at it
+    from retrieval import retriever
+    tmp_ingest.build_index()
+    monkeypatch.setattr(retriever, 'SNAPSHOT_ROOT', tmp_ingest.SNAPSHOT_ROOT)
+    monkeypatch.setattr(retriever, 'LEGACY_PATHS', None)
+    monkeypatch.setattr(retriever, 'get_embedding_model', lambda name, **kw: fake_encoder)
+    for name in ('_state', '_model'):
+        monkeypatch.setattr(retriever, name, None)
+    monkeypatch.setattr(retriever, '_vec_cache', TTLCache())
+    monkeypatch.setattr(retriever, '_hits_cache', TTLCache())
+    return retriever
+
+
+class OllamaStub(BaseHTTPRequestHandler):
+
+    """
+    Minimal imitation of Ollama's POST /api/generate (JSON or NDJSON stream).
+    The reply echoes the prompt split into words; `delay_s` is slept before
+    every streamed line (or once for non-streamed replies) so tests can
+    observe incremental delivery and concurrency.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    delay_s = 0.0
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).requests_seen.append(body)
+        words = [w + ' ' for w in body['prompt'].split()]
+        done = {'done': True, 'prompt_eval_count': len(words), 'eval_count': len(words),
+                'eval_duration': 1_000_000 * len(words)}
+        if not body.get('stream', True):
+            time.sleep(self.delay_s)
+            return self._send('application/json', json.dumps({'response': ''.join(words), **done}).encode())
+
+        # Like Ollama: chunked transfer encoding, one NDJSON object per chunk
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for w in words:
+            time.sleep(self.delay_s)
+            self._chunk(json.dumps({'response': w, 'done': False}).encode() + b'\n')
+        self._chunk(json.dumps({'response': '', **done}).encode() + b'\n')
+        self._chunk(b'')
+
+    def _chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send(self, ctype, data):
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_stub(monkeypatch):
+    from models import llm_client
+    handler = type('Stub', (OllamaStub,), {'delay_s': 0.0, 'requests_seen': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(llm_client, 'OLLAMA_HOST', f'http://127.0.0.1:{server.server_port}')
+    monkeypatch.setattr(llm_client, '_client', None)
+    handler.url = llm_client.OLLAMA_HOST
+    yield handler
+    server.shutdown()
+    server.server_close()
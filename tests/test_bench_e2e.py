@@ -0,0 +1,48 @@
+import os
+import argparse
+
+from benchmarks import bench_e2e
+from benchmarks.stubs import HashEncoder, serve, ollama_handler, gdelt_handler
+from models.llm_client import OllamaClient
+from news import gdelt_search
+from retrieval import retriever
+
+
+def test_make_corpus_yields_one_chunk_per_section(tmp_path):
+    from ingestion.splitters import split_document
+
+    n_files = bench_e2e.make_corpus(str(tmp_path), 250, sections_per_file=100)
+    assert n_files == 3
+    paths = sorted(str(p) for p in tmp_path.glob('*/*.md'))
+    chunks = [c for p in paths for c in split_document(open(p, encoding='utf-8').read(),
+                                                        {'mode': 'structured', 'max_tokens': 200})]
+    assert len(chunks) == 250 and all(c['article'] for c in chunks)
+    assert {os.path.basename(os.path.dirname(p)) for p in paths} == {'policies', 'laws'}
+
+
+def test_run_scale_against_stubs(monkeypatch):
+    monkeypatch.setattr(retriever, 'SEARCH_MODE', 'hybrid')
+    args = argparse.Namespace(encoder='hash', k=4, queries=20, answers=3, news=2,
+                              sections_per_file=50, workers=0)
+    with serve(ollama_handler(ttft_s=0.02, token_s=0.001, tokens=8)) as ollama_url, \
+            serve(gdelt_handler(latency_s=0.0)) as gdelt_url:
+        monkeypatch.setattr(gdelt_search, 'GDELT_ENDPOINT', gdelt_url + '/api/v2/doc/doc')
+        client = OllamaClient(host=ollama_url)
+        row = bench_e2e.run_scale(200, HashEncoder(dim=32), client, args)
+
+    assert row['chunks'] == 200 and row['ingest_chunks_per_s'] > 0
+    assert 0 < row['search_p50_ms'] <= row['search_p99_ms']
+    assert row['answer_ttft_p50_ms'] >= 20 and row['answer_total_p50_ms'] > row['answer_ttft_p50_ms']
+    # configured paths are restored afterwards
+    assert retriever.SNAPSHOT_ROOT == retriever.snapshots.SNAPSHOT_ROOT
+    assert retriever._state is None
+
+
+def test_compare_flags_regressions_by_direction():
+    base = [{'scale': 1000, 'encoder': 'hash', 'chunks': 1000, 'search_p50_ms': 2.0, 'search_qps': 500.0}]
+    cur = [{'scale': 1000, 'encoder': 'hash', 'chunks': 1000, 'search_p50_ms': 3.0, 'search_qps': 600.0},
+           {'scale': 10000, 'encoder': 'hash', 'chunks': 10000, 'search_p50_ms': 9.0, 'search_qps': 1.0}]
+    rows = {r['metric']: r for r in bench_e2e.compare(cur, base, tolerance=0.25)}
+    assert set(rows) == {'search_p50_ms', 'search_qps'}
+    assert rows['search_p50_ms']['regression'] and rows['search_p50_ms']['change'] < 0
+    assert not rows['search_qps']['regression'] and rows['search_qps']['change'] == 0.2
@@ -0,0 +1,68 @@
+import json
+
+from ingestion.splitters import split_text, approx_tokens
+from retrieval.context import pack_context, overlap_len
+from telemetry import tracing, report
+
+TEXT = ' '.join(f'Clause {i}: suppliers must log every gift above the threshold.' for i in range(40))
+
+
+def _hits(chunks, doc='data/policies/POL-ABAC-002.md', scores=None):
+    scores = scores or [1.0 - 0.01 * i for i in range(len(chunks))]
+    return [{'score': s, 'doc_path': doc, 'chunk_id': i, 'text': t, 'section': None, 'article': None}
+            for i, (t, s) in enumerate(zip(chunks, scores))]
+
+
+def test_adjacent_chunks_merge_without_repeated_overlap():
+    chunks = split_text(TEXT, max_chars=300, overlap=150)
+    assert overlap_len(chunks[0], chunks[1]) == 150
+    packed = pack_context(_hits(chunks), max_tokens=None, chunk_overlap=150)
+    assert packed['text'] == TEXT
+    assert packed['blocks'] == 1 and packed['dropped'] == 0
+    assert packed['saved_tokens'] > 0 and packed['tokens'] == approx_tokens(TEXT)
+
+
+def test_coincidental_boundary_matches_are_not_cut():
+    chunks = ['Report it to the Compliance Officer', 'rules apply to every gift.']
+    amounts = ['The hospitality limit is BRL 100', '0 per year per official.']
+    for overlap in (0, 150):                        # structured splitter, chars splitter
+        assert pack_context(_hits(chunks), max_tokens=None, chunk_overlap=overlap)['text'] == \
+            'Report it to the Compliance Officer\nrules apply to every gift.'
+        assert pack_context(_hits(amounts), max_tokens=None, chunk_overlap=overlap)['text'] == \
+            'The hospitality limit is BRL 100\n0 per year per official.'
+    assert overlap_len('Compliance Officer', 'rules apply') == 0
+
+
+def test_duplicates_dropped_and_blocks_ordered_by_score():
+    a = _hits(['Art. 12 gifts above USD 50 must be refused.', 'Art. 13 procurement staff decline gifts.'])
+    b = _hits(['Art. 6 facilitation payments are prohibited.'], doc='data/policies/POL-COC-001.md', scores=[0.99])
+    dup = dict(a[0], doc_path='data/laws/copy.md', score=0.5)
+    inner = dict(a[1], doc_path='data/laws/other.md', chunk_id=7, score=0.4, text='procurement staff decline')
+    packed = pack_context(a + b + [dup, inner], max_tokens=None)
+
+    assert packed['blocks'] == 2 and packed['dropped'] == 2
+    assert packed['text'].startswith(a[0]['text'])            # best block first
+    assert [h['doc_path'] for h in packed['hits']] == [a[0]['doc_path']] * 2 + [b[0]['doc_path']]
+
+
+def test_budget_filled_best_first_and_top_hit_truncated():
+    chunks = [f'Topic {i} ' + 'word ' * 30 for i in range(6)]
+    hits = [dict(h, chunk_id=10 * i) for i, h in enumerate(_hits(chunks))]   # no adjacency
+    packed = pack_context(hits, max_tokens=90)
+    assert packed['tokens'] <= 90
+    assert [h['chunk_id'] for h in packed['hits']] == [0, 10]
+    assert packed['dropped'] == 4
+
+    tiny = pack_context(hits, max_tokens=10)
+    assert 0 < tiny['tokens'] <= 10 and tiny['text'].startswith('Topic 0')
+
+
+def test_pack_span_reports_saved_tokens(tmp_traces):
+    pack_context(_hits(split_text(TEXT, max_chars=300, overlap=150)), max_tokens=200, chunk_overlap=150)
+    tracing.flush()
+    [event] = [json.loads(l) for l in open(tmp_traces, encoding='utf-8') if '"prompt.pack"' in l]
+    assert event['saved_tokens'] == event['raw_tokens'] - event['tokens'] > 0
+    assert event['tokens'] <= 200
+
+    [row] = report.summarize([event])
+    assert row['saved_tokens'] == event['saved_tokens']
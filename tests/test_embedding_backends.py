@@ -0,0 +1,52 @@
+import pytest
+
+from models.embedding import with_embedding_cache
+from models.embedding_backends import load_backend, load_sentence_transformer, export_onnx, parity, OnnxEncoder
+
+TEXTS = ['can i accept a gift card from a supplier', 'bribery law', 'data policy of the supplier', 'the']
+
+
+@pytest.fixture(scope='module')
+def tiny_model(tmp_path_factory):
+    # Two-layer random BERT saved locally (no model download)
+    torch = pytest.importorskip('torch')
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    root = tmp_path_factory.mktemp('tiny')
+    words = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + sorted({w for t in TEXTS for w in t.split()})
+    (root / 'vocab.txt').write_text('\n'.join(words), encoding='utf-8')
+    torch.manual_seed(0)
+    model = BertModel(BertConfig(vocab_size=len(words), hidden_size=32, num_hidden_layers=2,
+                                 num_attention_heads=2, intermediate_size=64, max_position_embeddings=64))
+    model.save_pretrained(root / 'model')
+    BertTokenizerFast(str(root / 'vocab.txt')).save_pretrained(root / 'model')
+    return str(root / 'model')
+
+
+def test_int8_backend_matches_fp32(tiny_model):
+    reference = load_sentence_transformer(tiny_model)
+    quantized = load_backend(tiny_model, 'torch_int8')
+
+    assert any('Quantized' in type(m).__name__ or 'quantized' in type(m).__module__ for m in quantized.modules())
+    assert quantized.encode(TEXTS, normalize_embeddings=True).shape == (len(TEXTS), 32)
+    assert parity(reference, quantized, TEXTS)['min_cosine'] > 0.99
+
+
+def test_onnx_backend_matches_fp32(tiny_model, tmp_path):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    reference = load_sentence_transformer(tiny_model)
+    encoder = OnnxEncoder(export_onnx(tiny_model, str(tmp_path / 'onnx')))
+
+    assert encoder.encode('bribery law').shape == (32,)
+    assert parity(reference, encoder, TEXTS, batch_size=2)['min_cosine'] > 0.999
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        load_backend('any', 'tensorrt')
+
+
+def test_backends_get_separate_cache_entries(fake_encoder):
+    assert with_embedding_cache(fake_encoder, 'm').model_name == 'm'
+    assert with_embedding_cache(fake_encoder, 'm', backend='onnx').model_name == 'm@onnx'
@@ -0,0 +1,50 @@
+import numpy as np
+
+from models.embedding_cache import EmbeddingCache, CachedEmbeddingModel
+
+
+def test_cached_model_only_encodes_misses(tmp_path, fake_encoder):
+    cache = EmbeddingCache(str(tmp_path / 'c.sqlite'))
+    model = CachedEmbeddingModel(fake_encoder, 'fake', cache)
+
+    first = model.encode(['a', 'b', 'a'], normalize_embeddings=True)
+    assert fake_encoder.calls == 1
+    assert cache.stats()['misses'] == 3 and cache.stats()['entries'] == 2
+
+    second = model.encode(['a', 'b'], normalize_embeddings=True)
+    assert fake_encoder.calls == 1
+    np.testing.assert_array_equal(first[:2], second)
+    assert cache.stats()['hits'] == 2
+
+    # normalize flag and model name are part of the key
+    model.encode(['a'], normalize_embeddings=False)
+    CachedEmbeddingModel(fake_encoder, 'other', cache).encode('a', normalize_embeddings=True)
+    assert fake_encoder.calls == 3
+
+
+def test_cache_persists_and_evicts_lru(tmp_path):
+    path = str(tmp_path / 'c.sqlite')
+    vec = np.ones(16, dtype='float32')          # 64 bytes per entry
+    cache = EmbeddingCache(path, max_bytes=64 * 4)
+    for t in ('t1', 't2', 't3', 't4'):
+        cache.put_many('m', True, [t], [vec])
+    cache.get_many('m', True, ['t1'])            # t1 becomes most recently used
+    cache.put_many('m', True, ['t5'], [vec])
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_bytes=64 * 4)
+    got = dict(zip(['t1', 't2', 't3', 't4', 't5'],
+                   reopened.get_many('m', True, ['t1', 't2', 't3', 't4', 't5'])))
+    assert got['t2'] is None and got['t3'] is None
+    assert all(got[t] is not None for t in ('t1', 't4', 't5'))
+    assert reopened.stats()['bytes'] <= 64 * 4
+
+
+def test_lookups_defer_lru_writes(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'c.sqlite'))
+    cache.put_many('m', True, ['t1'], [np.ones(16, dtype='float32')])
+    before = cache._conn.total_changes
+    for _ in range(50):
+        assert cache.get_many('m', True, ['t1'])[0] is not None
+    assert cache._conn.total_changes == before          # hits wrote nothing yet
+    cache.close()                                       # ...until the batch is flushed
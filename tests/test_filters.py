@@ -0,0 +1,73 @@
+import faiss
+import numpy as np
+import pytest
+
+from retrieval.index_types import build_faiss_index, partition_index, search_params, INDEX_TYPES
+from retrieval.metastore import MetaStore, write_store
+
+
+def test_select_ids_matches_prefix_folder_and_article(tmp_path):
+    records = [
+        {'id': 1, 'doc_path': 'data/laws/LAW-BR-13709.md', 'chunk_id': 0, 'text': 'a', 'article': '1,2'},
+        {'id': 2, 'doc_path': 'data/laws/LAW-US-FCPA.md', 'chunk_id': 0, 'text': 'b', 'article': '2'},
+        {'id': 3, 'doc_path': 'data/policies/POL-COC-001.md', 'chunk_id': 0, 'text': 'c', 'article': '12'},
+        {'id': 4, 'doc_path': 'data/policies/POL-SUP-004.md', 'chunk_id': 0, 'text': 'd'},
+    ]
+    write_store(str(tmp_path / 'meta'), records)
+    store = MetaStore(str(tmp_path / 'meta'))
+
+    assert list(store.select_ids(doc_prefix='law-br')) == [1]
+    assert list(store.select_ids(folder='policies')) == [3, 4]
+    assert list(store.select_ids(article=2)) == [1, 2]
+    assert list(store.select_ids(folder='laws', article=['1', '12'])) == [1]
+    assert list(store.select_ids(doc_prefix=['POL-SUP', 'LAW-US'])) == [2, 4]
+
+
+@pytest.mark.parametrize('kind', INDEX_TYPES)
+def test_selector_returns_k_filtered_hits_for_each_index_type(kind):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((2000, 32)).astype('float32')
+    faiss.normalize_L2(mat)
+    ids = np.arange(2000, dtype='int64')
+    index = build_faiss_index(mat, ids, {'type': kind, 'nlist': 16, 'nprobe': 16, 'pq_m': 8})
+
+    allowed = ids[ids % 7 == 0]
+    _, found = index.search(mat[:5], 10, params=search_params(index, faiss.IDSelectorBatch(allowed)))
+    assert (found != -1).all()
+    assert set(found.ravel()) <= set(allowed)
+
+
+def test_partition_index_matches_flat_selector():
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((2000, 32)).astype('float32')
+    faiss.normalize_L2(mat)
+    ids = np.arange(0, 6000, 3, dtype='int64')
+    index = build_faiss_index(mat, ids, {'type': 'flat'})
+
+    allowed = ids[ids % 2 == 0]
+    expected = index.search(mat[:5], 10, params=search_params(index, faiss.IDSelectorBatch(allowed)))
+    got = partition_index(index, allowed).search(mat[:5], 10)
+    assert (got[1] == expected[1]).all() and np.allclose(got[0], expected[0])
+    assert partition_index(build_faiss_index(mat, ids, {'type': 'hnsw'}), allowed) is None
+
+
+@pytest.mark.parametrize('exact_max,partitions', [(0, False), (0, True), (4096, True)])
+@pytest.mark.parametrize('mode', ['vector', 'lexical', 'hybrid'])
+def test_filtered_search_returns_only_matching_documents(built_index, monkeypatch, mode, exact_max, partitions):
+    # exact_max=0 forces the FAISS selector (or flat partition) path, 4096 the exact subset path
+    monkeypatch.setattr(built_index, 'FILTER_EXACT_MAX', exact_max)
+    monkeypatch.setattr(built_index, 'FILTER_PARTITIONS', partitions)
+    # One term per Brazilian law, so BM25 also has two matching documents
+    hits = built_index.search('personal data company', k=2, mode=mode, filters={'doc_prefix': 'LAW-BR'})
+    assert len(hits) == 2
+    assert all(h['doc_path'].split('/')[-1].startswith('LAW-BR') for h in hits)
+
+    hits = built_index.search('gifts', k=3, mode=mode, filters={'folder': 'policies'})
+    assert hits and all('/policies/' in h['doc_path'] for h in hits)
+
+    assert built_index.search('gifts', mode=mode, filters={'doc_prefix': 'NOPE'}) == []
+
+
+def test_unknown_filter_is_rejected(built_index):
+    with pytest.raises(ValueError):
+        built_index.search('gifts', filters={'country': 'BR'})
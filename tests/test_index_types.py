@@ -0,0 +1,61 @@
+import faiss
+import numpy as np
+import pytest
+
+from retrieval.index_types import build_faiss_index, index_signature, INDEX_TYPES
+
+
+def _vectors(n, dim=32, seed=0):
+    mat = np.random.default_rng(seed).standard_normal((n, dim)).astype('float32')
+    faiss.normalize_L2(mat)
+    return mat
+
+
+@pytest.mark.parametrize('kind', INDEX_TYPES)
+@pytest.mark.parametrize('n', [12, 2000])
+def test_each_type_trains_and_returns_stable_ids(kind, n):
+    mat = _vectors(n)
+    ids = np.arange(n, dtype='int64') * 10 + 5
+    cfg = {'type': kind, 'nlist': 64, 'nprobe': 64, 'pq_m': 8, 'hnsw_m': 16, 'ef_search': 128}
+    index = build_faiss_index(mat, ids, cfg)
+
+    assert index.ntotal == n
+    _, found = index.search(mat[:5], 1)
+    assert set(found[:, 0]) <= set(ids)
+    if kind != 'ivf_pq':
+        # exact vectors must find themselves
+        assert list(found[:, 0]) == list(ids[:5])
+
+
+def test_search_params_applied_through_id_map():
+    cfg = {'type': 'ivf_flat', 'nlist': 16, 'nprobe': 4}
+    ivf = faiss.extract_index_ivf(build_faiss_index(_vectors(1000), np.arange(1000), cfg))
+    assert ivf.nprobe == 4
+
+    index = build_faiss_index(_vectors(100), np.arange(100), {'type': 'hnsw', 'ef_search': 77})
+    assert faiss.downcast_index(index.index).hnsw.efSearch == 77
+
+
+def test_signature_ignores_query_time_knobs():
+    assert index_signature({'type': 'ivf_flat', 'nprobe': 1}) == index_signature({'type': 'ivf_flat', 'nprobe': 99})
+    assert index_signature({'type': 'hnsw'}) != index_signature({'type': 'flat'})
+    with pytest.raises(ValueError):
+        index_signature({'type': 'lsh'})
+
+
+def test_builder_streams_ivf_batches_after_training():
+    from retrieval.index_types import IndexBuilder
+
+    mat = _vectors(3000)
+    ids = np.arange(3000, dtype='int64')
+    cfg = {'type': 'ivf_flat', 'nlist': 16, 'nprobe': 16, 'train_size': 1000}
+    builder = IndexBuilder(cfg)
+    for start in range(0, 3000, 250):
+        builder.add(mat[start:start + 250], ids[start:start + 250])
+        if start + 250 >= 1000:
+            assert builder.index is not None  # trained on the first sample
+    index = builder.finish()
+
+    assert index.ntotal == 3000
+    _, found = index.search(mat[-5:], 1)
+    assert list(found[:, 0]) == list(ids[-5:])
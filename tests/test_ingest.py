@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import faiss
+
+from ingestion import ingest
+from retrieval import snapshots
+from retrieval.metastore import MetaStore
+
+
+def test_embed_chunks_matches_per_chunk_encoding(fake_encoder):
+    texts = ['short', 'a much longer chunk of policy text', 'mid length text', 'x']
+    expected = np.vstack([fake_encoder.encode(t, normalize_embeddings=True) for t in texts])
+    for bs in (1, 2, 64):
+        got = ingest.embed_chunks(fake_encoder, texts, batch_size=bs, sort_by_length=True)
+        assert got.dtype == np.float32
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_build_index_batched_equals_unbatched(tmp_ingest):
+
+    ingest.build_index(batch_size=1, sort_by_length=False)
+    unbatched = faiss.read_index(ingest.current_paths()['index'])
+    meta_unbatched = list(MetaStore(ingest.current_paths()['meta']).records())
+
+    ingest.build_index(batch_size=8, sort_by_length=True)
+    batched = faiss.read_index(ingest.current_paths()['index'])
+    meta_batched = list(MetaStore(ingest.current_paths()['meta']).records())
+
+    assert batched.ntotal == unbatched.ntotal > 0
+    np.testing.assert_array_equal(batched.reconstruct_n(0, batched.ntotal),
+                                  unbatched.reconstruct_n(0, unbatched.ntotal))
+    assert meta_batched == meta_unbatched
+
+
+def _index_contents():
+    paths = ingest.current_paths()
+    index = faiss.read_index(paths['index'])
+    ids = faiss.vector_to_array(index.id_map)
+    meta = {m['id']: m for m in MetaStore(paths['meta']).records()}
+    vecs = {int(i): index.reconstruct(int(i)) for i in ids}
+    return {(meta[i]['doc_path'], meta[i]['chunk_id']): (meta[i]['text'], vecs[i]) for i in ids}
+
+
+def test_incremental_update_only_embeds_changed_files(monkeypatch, tmp_path, tmp_ingest, fake_encoder):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    for name in ('a', 'b', 'c'):
+        (docs / f'{name}.md').write_text(f'# {name}\n' + name * 2000, encoding='utf-8')
+    monkeypatch.setattr(ingest, 'DOC_GLOBS', [str(docs / '*.md')])
+
+    ingest.build_index(batch_size=4)
+
+    (docs / 'b.md').write_text('# b edited\n' + 'B' * 500, encoding='utf-8')
+    (docs / 'c.md').unlink()
+    (docs / 'd.md').write_text('# d\nnew policy', encoding='utf-8')
+    os.utime(docs / 'a.md')  # touched but identical content
+
+    # Counted before the embedding cache, which would hide re-embedded chunks
+    seen = []
+    embed = ingest.embed_chunks
+    monkeypatch.setattr(ingest, 'embed_chunks', lambda model, texts, **kw: (seen.extend(texts),
+                                                                            embed(model, texts, **kw))[1])
+    stats = ingest.build_index(batch_size=4, incremental=True)
+    monkeypatch.setattr(ingest, 'embed_chunks', embed)
+
+    assert stats == {'added': 1, 'changed': 1, 'deleted': 1, 'unchanged': 1}
+    assert seen and all(t.startswith(('# b', '# d', 'B')) for t in seen)
+    incremental = _index_contents()
+
+    ingest.build_index(batch_size=4)
+    full = _index_contents()
+
+    assert incremental.keys() == full.keys()
+
+    # Touch-only runs publish nothing and leave the live snapshot untouched
+    live = ingest.current_paths()
+    before = (snapshots.current(ingest.SNAPSHOT_ROOT), os.stat(live['manifest']).st_mtime_ns)
+    os.utime(docs / 'a.md')
+    assert ingest.build_index(batch_size=4, incremental=True)['unchanged'] == 3
+    assert (snapshots.current(ingest.SNAPSHOT_ROOT), os.stat(live['manifest']).st_mtime_ns) == before
+    for key, (text, vec) in full.items():
+        assert incremental[key][0] == text
+        np.testing.assert_array_equal(incremental[key][1], vec)
+
+
+def test_pool_and_streaming_build_match_serial(monkeypatch, tmp_ingest):
+    from ingestion.pipeline import iter_split_documents
+
+    paths = ingest.list_document_paths()
+    serial = list(iter_split_documents(paths, ingest.SPLITTER, workers=0))
+    pooled = list(iter_split_documents(paths, ingest.SPLITTER, workers=2, max_pending=2))
+    assert pooled == serial
+
+    ingest.build_index(batch_size=8)
+    expected = list(MetaStore(ingest.current_paths()['meta']).records())
+
+    # tiny chunk batches force many embed/add/append steps
+    monkeypatch.setattr(ingest, 'CHUNK_BATCH', 3)
+    ingest.build_index(batch_size=8)
+    assert list(MetaStore(ingest.current_paths()['meta']).records()) == expected
+
+
+def test_incremental_build_passes_workers(monkeypatch, tmp_ingest):
+    ingest.build_index()
+    seen = {}
+    monkeypatch.setattr(ingest, 'update_index', lambda manifest, **kw: seen.update(kw))
+    ingest.build_index(incremental=True, workers=3)
+    assert seen['workers'] == 3
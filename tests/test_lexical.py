@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+
+from retrieval.lexical import LexicalIndex, write_lexical, tokenize, rrf_fuse
+
+
+def test_tokenize_keeps_identifiers_whole_and_piecewise():
+    assert tokenize('Lei 13.709/2018, see POL-SUP-004.') == [
+        'lei', '13.709', '13', '709', '2018', 'see', 'pol-sup-004', 'pol', 'sup', '004']
+
+
+def test_bm25_ranks_exact_terms(tmp_path):
+    records = [
+        {'id': 10, 'text': 'Gifts and hospitality must be recorded.'},
+        {'id': 20, 'text': 'The FCPA prohibits bribery of foreign officials. FCPA fines apply.'},
+        {'id': 30, 'text': 'Bribery of officials is prohibited under local law.'},
+    ]
+    write_lexical(str(tmp_path / 'lex'), records)
+    index = LexicalIndex(str(tmp_path / 'lex'))
+
+    scores, ids = index.search('FCPA bribery', k=3)
+    assert list(ids) == [20, 30]
+    assert scores[0] > scores[1] > 0
+    assert len(index.search('unknown term', k=3)[1]) == 0
+
+
+def test_lexical_vocabulary_is_mapped(tmp_path):
+    records = [{'id': i, 'text': text} for i, text in enumerate(['Gifts and hospitality', 'Lei 13.709/2018 ação'])]
+    write_lexical(str(tmp_path / 'lex'), records)
+    index = LexicalIndex(str(tmp_path / 'lex'))
+    assert index.terms is None
+    vocab = ['13', '13.709', '2018', 'and', 'ação', 'gifts', 'hospitality', 'lei', '709']
+    assert [index.term_id(t) for t in sorted(vocab)] == list(range(len(vocab)))
+    assert index.term_id('acao') is None and index.term_id('zzz') is None
+    assert list(index.search('ação', k=2)[1]) == [1]
+
+
+def test_lexical_lookup_stays_fast(tmp_path):
+    # Full 100k-row numbers: python -m benchmarks.bench_lexical
+    rng = np.random.default_rng(0)
+    words = np.array([f'w{i}' for i in range(5000)])[rng.integers(0, 5000, (20_000, 40))]
+    records = ({'id': i, 'text': ' '.join(row)} for i, row in enumerate(words))
+    write_lexical(str(tmp_path / 'lex'), records)
+    index = LexicalIndex(str(tmp_path / 'lex'))
+
+    index.search('w1 w2 w3', k=10)
+    runs = 50
+    start = time.perf_counter()
+    for i in range(runs):
+        index.search(f'w{i} w{i + 100} policy', k=10)
+    assert (time.perf_counter() - start) / runs < 0.005
+
+
+def test_rrf_rewards_agreement():
+    fused = rrf_fuse([[1, 2, 3, -1], [3, 4]], k=3, rrf_k=60)
+    assert [vid for _, vid in fused] == [3, 1, 2]
+
+
+def test_retriever_modes(built_index):
+    lexical = built_index.search('FCPA', k=3, mode='lexical')
+    assert lexical and all('FCPA' in h['text'] for h in lexical)
+
+    hybrid = built_index.search('FCPA', k=3, mode='hybrid')
+    assert len(hybrid) == 3
+    assert any(h['doc_path'].endswith('LAW-US-FCPA.md') for h in hybrid)
+    assert built_index.search('FCPA', k=3, mode='vector') != hybrid
+
+
+def test_impact_search_matches_exhaustive(tmp_path):
+    rng = np.random.default_rng(1)
+    # Zipf-like vocabulary: w5..w12 are in a third or more of the rows
+    words = np.array([f'w{i}' for i in range(300)])[np.minimum(rng.zipf(1.3, (3000, 30)) - 1, 299)]
+    write_lexical(str(tmp_path / 'lex'), ({'id': 5 * i, 'text': ' '.join(r)} for i, r in enumerate(words)))
+    exact = LexicalIndex(str(tmp_path / 'lex'), max_depth=10 ** 9)
+    capped = LexicalIndex(str(tmp_path / 'lex'), max_depth=64)
+    allowed = np.arange(0, 15000, 35, dtype='int64')
+
+    for query in ('w6', 'w6 w8', 'w5 w6 w9', 'w7 w40 w250', 'w12 w12 w120'):
+        terms = {exact.term_id(t) for t in tokenize(query)} - {None}
+        expected = exact._search_exhaustive(terms, 20, None)
+        scores, ids = exact.search(query, k=20)
+        assert np.allclose(scores, expected[0])                    # exact, ties may differ in id
+        approx = capped.search(query, k=20)[0]
+        assert len(approx) == 20 and approx.sum() <= expected[0].sum() + 1e-4
+
+        # Filtered: only allowed ids, still k of them when enough rows match
+        expected = exact._search_exhaustive(terms, 20, allowed)
+        scores, ids = capped.search(query, k=20, allowed_ids=allowed)
+        assert np.isin(ids, allowed).all() and len(ids) == len(expected[1])
@@ -0,0 +1,105 @@
+import time
+
+from models import llm_client
+
+
+def test_generate_non_streaming(ollama_stub):
+    assert llm_client.generate('hello there', system='be brief') == 'hello there '
+    body = ollama_stub.requests_seen[-1]
+    assert body['stream'] is False and body['system'] == 'be brief'
+
+
+def test_generate_stream_yields_tokens_incrementally(ollama_stub):
+    ollama_stub.delay_s = 0.05
+    stats = {}
+    t0 = time.perf_counter()
+    stream = llm_client.generate_stream('one two three four', stats=stats)
+
+    first = next(stream)
+    first_at = time.perf_counter() - t0
+    rest = list(stream)
+
+    assert [first] + rest == ['one ', 'two ', 'three ', 'four ']
+    # first token arrives well before the full answer is done
+    assert first_at < stats['total_s'] - 0.1
+    assert 0 < stats['ttft_s'] <= first_at
+    assert stats['eval_count'] == 4 and stats['eval_duration_s'] == 0.004
+    assert ollama_stub.requests_seen[-1]['stream'] is True
+
+
+def test_client_sends_keep_alive_and_reuses_connection(ollama_stub):
+    client = llm_client.OllamaClient(host=ollama_stub.url, keep_alive='1h')
+    assert client.generate('a b') == 'a b '
+    assert client.generate('c') == 'c '
+    assert ollama_stub.requests_seen[-1]['keep_alive'] == '1h'
+    m = client.metrics()
+    assert m['requests'] == 2 and m['errors'] == 0 and m['in_flight'] == 0
+    assert m['latency_p50_s'] is not None
+
+
+def test_max_in_flight_queues_then_times_out(ollama_stub):
+    import threading
+
+    ollama_stub.delay_s = 0.3
+    client = llm_client.OllamaClient(host=ollama_stub.url, max_in_flight=1, queue_timeout_s=0.05)
+    busy = threading.Thread(target=lambda: list(client.generate_stream('slow')))
+    busy.start()
+    time.sleep(0.1)
+    try:
+        client.generate('rejected')
+        assert False, 'expected QueueTimeout'
+    except llm_client.QueueTimeout:
+        pass
+    busy.join()
+    assert client.metrics()['rejected'] == 1
+    assert client.generate('now free') == 'now free '
+
+
+def test_agenerate_respects_concurrency_limit(ollama_stub):
+    import asyncio
+
+    ollama_stub.delay_s = 0.2
+    client = llm_client.OllamaClient(host=ollama_stub.url, max_in_flight=2, queue_timeout_s=5)
+
+    async def run():
+        return await asyncio.gather(*(client.agenerate(f'q{i}') for i in range(4)))
+
+    t0 = time.perf_counter()
+    answers = asyncio.run(run())
+    elapsed = time.perf_counter() - t0
+    assert answers == ['q0 ', 'q1 ', 'q2 ', 'q3 ']
+    # 4 requests of 0.2s through 2 slots -> two waves, not one or four
+    assert 0.4 <= elapsed < 0.75
+    assert client.metrics()['requests'] == 4
+
+
+def test_agenerate_queues_without_holding_executor_threads(ollama_stub):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    ollama_stub.delay_s = 0.2
+    client = llm_client.OllamaClient(host=ollama_stub.url, max_in_flight=1, queue_timeout_s=5)
+
+    async def run():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        queued = [asyncio.create_task(client.agenerate(f'q{i}')) for i in range(4)]
+        await asyncio.sleep(0.05)
+        # Only the admitted request holds a thread; other to_thread work still runs
+        t0 = time.perf_counter()
+        await asyncio.to_thread(lambda: None)
+        other_s = time.perf_counter() - t0
+        slow = llm_client.OllamaClient(host=ollama_stub.url, max_in_flight=1, queue_timeout_s=0.05)
+        busy = asyncio.create_task(slow.agenerate('busy'))
+        await asyncio.sleep(0.01)
+        try:
+            await slow.agenerate('rejected')
+            rejected = False
+        except llm_client.QueueTimeout:
+            rejected = True
+        await busy
+        return await asyncio.gather(*queued), other_s, rejected, slow.metrics()['rejected']
+
+    answers, other_s, rejected, count = asyncio.run(run())
+    assert answers == ['q0 ', 'q1 ', 'q2 ', 'q3 ']
+    assert other_s < 0.1
+    assert rejected and count == 1
@@ -0,0 +1,45 @@
+import json
+
+from retrieval.metastore import MetaStore, write_store, migrate_json
+
+
+RECORDS = [
+    {'id': 7, 'doc_path': 'data/laws/LAW-US-FCPA.md', 'chunk_id': 0, 'text': 'FCPA overview',
+     'section': 'U.S. FCPA', 'article': None},
+    {'id': 2, 'doc_path': 'data/policies/POL-ABAC-002.md', 'chunk_id': 0, 'text': 'Art. 12 — Gifts',
+     'section': 'Anti-Bribery Policy', 'article': '12'},
+    {'id': 3, 'doc_path': 'data/policies/POL-ABAC-002.md', 'chunk_id': 1, 'text': '',
+     'section': 'Anti-Bribery Policy', 'article': '13,14'},
+]
+
+
+def test_store_roundtrip_and_lookup(tmp_path):
+    path = str(tmp_path / 'meta')
+    assert write_store(path, RECORDS) == 3
+
+    store = MetaStore(path)
+    assert len(store) == 3
+    assert store.paths == ['data/laws/LAW-US-FCPA.md', 'data/policies/POL-ABAC-002.md']
+    for md in RECORDS:
+        assert store.get(md['id']) == md
+    assert store.get(5) is None and store.get(99) is None
+    assert [r['id'] for r in store.records()] == [2, 3, 7]
+
+
+def test_rewrite_replaces_existing_store(tmp_path):
+    path = str(tmp_path / 'meta')
+    write_store(path, RECORDS)
+    write_store(path, RECORDS[:1])
+    assert [r['id'] for r in MetaStore(path).records()] == [7]
+
+
+def test_migrate_legacy_json_uses_row_order_ids(tmp_path):
+    legacy = [{k: md[k] for k in ('doc_path', 'chunk_id', 'text')} for md in RECORDS]
+    json_path = tmp_path / 'meta.json'
+    json_path.write_text(json.dumps(legacy, indent=2), encoding='utf-8')
+
+    migrate_json(str(json_path), str(tmp_path / 'meta'))
+    store = MetaStore(str(tmp_path / 'meta'))
+    assert [r['text'] for r in store.records()] == [md['text'] for md in RECORDS]
+    assert store.get(1)['doc_path'] == 'data/policies/POL-ABAC-002.md'
+    assert store.get(1)['article'] is None
@@ -0,0 +1,96 @@
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from benchmarks.stubs import serve, gdelt_handler
+from news import gdelt_search
+from news.monitor import monitor_companies
+from news.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def gdelt_stub(monkeypatch):
+    with ExitStack() as stack:
+        def start(**kwargs):
+            handler = gdelt_handler(**kwargs)
+            url = stack.enter_context(serve(handler))
+            monkeypatch.setattr(gdelt_search, 'GDELT_ENDPOINT', url + '/api/v2/doc/doc')
+            return handler
+        yield start
+
+
+def test_token_bucket_limits_rate_and_pauses_on_penalty():
+    bucket = TokenBucket(rate_per_s=50, burst=2)
+    t0 = time.perf_counter()
+    for _ in range(7):
+        bucket.acquire()
+    assert time.perf_counter() - t0 >= 0.09          # 2 immediate, then 5 at 50/s
+
+    bucket.penalize(0.2)
+    t0 = time.perf_counter()
+    assert not bucket.acquire(timeout=0.05)
+    assert bucket.acquire()
+    assert time.perf_counter() - t0 >= 0.15
+    assert bucket.penalties == 1
+
+
+def test_monitor_dedupes_fetches_concurrently_and_caches(gdelt_stub):
+    stub = gdelt_stub(latency_s=0.1)
+    companies = ['Acme Brewing SA', ' acme  brewing sa', 'ACME BREWING SA'] + [f'Counterparty {i}' for i in range(7)]
+    unlimited = TokenBucket(1000, 1000)
+
+    t0 = time.perf_counter()
+    results, stats = monitor_companies(companies, max_articles=3, workers=8, limiter=unlimited)
+    elapsed = time.perf_counter() - t0
+
+    assert stats['queries'] == 8 and stats['fetched'] == 8 and stats['errors'] == 0
+    assert len(stub.queries) == 8
+    assert elapsed < 0.5                                  # 8 x 100 ms, overlapped
+    assert results['ACME BREWING SA'] == results['Acme Brewing SA']
+    assert len(results['Counterparty 3']['articles']) == 3
+
+    # Repeat check is served from the disk cache without any request
+    results, stats = monitor_companies(companies, max_articles=3, limiter=unlimited)
+    assert stats['cache_hits'] == 8 and stats['fetched'] == 0
+    assert len(stub.queries) == 8
+    assert all(r['cached'] for r in results.values())
+    # ...but a larger article limit refetches
+    _, stats = monitor_companies(['Counterparty 1'], max_articles=5, limiter=unlimited)
+    assert stats['fetched'] == 1
+
+
+def test_monitor_shares_backoff_on_429(gdelt_stub):
+    stub = gdelt_stub(latency_s=0.0, rate_limit=1.0, retry_after_s=0.05)
+    bucket = TokenBucket(1000, 1000)
+    results, stats = monitor_companies(['A', 'B'], workers=2, limiter=bucket)
+
+    assert stats['errors'] == 2
+    assert {r['error'] for r in results.values()} == {'rate_limited'}
+    assert bucket.penalties >= 4 and len(stub.queries) == 8   # 4 attempts each
+    # failures are not cached
+    _, stats = monitor_companies(['A'], limiter=bucket)
+    assert stats['fetched'] == 1
+
+
+def test_5xx_backoff_goes_through_the_shared_bucket(gdelt_stub):
+    class RecordingBucket(TokenBucket):
+        def penalize(self, seconds):
+            self.pauses.append(seconds)              # recorded, not slept
+
+    stub = gdelt_stub(latency_s=0.0, unavailable=1.0)
+    bucket = RecordingBucket(1000, 1000)
+    bucket.pauses = []
+    with pytest.raises(gdelt_search.HTTPError, match='503'):
+        gdelt_search._gdelt_get({'query': 'Acme'}, retries=3, backoff=2.0, limiter=bucket)
+    assert len(stub.queries) == 3
+    assert bucket.pauses == [1.5, 2.5, 4.5]
+
+
+def test_search_company_news_uses_cache(gdelt_stub, monkeypatch):
+    stub = gdelt_stub(latency_s=0.0)
+    monkeypatch.setattr(gdelt_search, '_limiter', TokenBucket(1000, 1000))
+    first = gdelt_search.search_company_news('Acme Brewing SA', max_articles=2)
+    second = gdelt_search.search_company_news('Acme Brewing SA', max_articles=2)
+    assert first == second and len(first) == 2
+    assert len(stub.queries) == 1
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models.reranker import rerank
+
+
+class FakeCrossEncoder:
+
+    """
+    Scores a (query, passage) pair by the number of shared words.
+    """
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size=16, **kwargs):
+        time.sleep(self.delay_s)
+        self.pairs += len(pairs)
+        return [len(set(q.lower().split()) & set(p.lower().split())) for q, p in pairs]
+
+
+def test_rerank_orders_by_score_and_keeps_ties_stable():
+    order, scores = rerank(FakeCrossEncoder(), 'gift card supplier',
+                           ['nothing here', 'a gift', 'supplier gift card', 'gift again'], batch_size=2)
+    assert list(order) == [2, 1, 3, 0]
+    assert list(scores) == [0, 1, 3, 1]
+
+
+def test_rerank_budget_returns_none():
+    model = FakeCrossEncoder(delay_s=0.02)
+    assert rerank(model, 'q', ['a'] * 10, batch_size=2, budget_s=0.01) is None
+    assert model.pairs < 10
+
+
+def test_search_reranks_wider_candidate_set(built_index, monkeypatch):
+    monkeypatch.setattr(built_index, '_reranker', FakeCrossEncoder())
+    timings = {}
+    hits = built_index.search('gift card from a supplier', k=3, mode='vector', rerank=True, timings=timings)
+
+    assert len(hits) == 3
+    assert timings['reranked'] == 1 and timings['rerank_fallbacks'] == 0
+    assert timings['rerank_s'] > 0 and timings['retrieve_s'] > 0
+    wide = built_index.search('gift card from a supplier', k=built_index.RERANK_CANDIDATES,
+                              mode='vector', rerank=False)
+    overlap = lambda h: len({'gift', 'card', 'from', 'a', 'supplier'} & set(h['text'].lower().split()))
+    assert [overlap(h) for h in hits] == sorted((overlap(h) for h in wide), reverse=True)[:3]
+
+
+def test_search_falls_back_to_first_stage_order_over_budget(built_index, monkeypatch):
+    monkeypatch.setattr(built_index, '_reranker', FakeCrossEncoder(delay_s=0.05))
+    monkeypatch.setattr(built_index, 'RERANK_BUDGET_S', 0.01)
+    monkeypatch.setattr(built_index, 'RERANK_BATCH_SIZE', 2)
+    timings = {}
+    hits = built_index.search('hospitality limit', k=3, mode='vector', rerank=True, timings=timings)
+
+    assert hits == built_index.search('hospitality limit', k=3, mode='vector', rerank=False)
+    assert timings['rerank_fallbacks'] == 1
+    assert built_index.stage_stats()['rerank_fallbacks'] >= 1
+
+
+def test_reranker_loads_once_under_concurrency(built_index, monkeypatch):
+    loads = []
+
+    def slow_load(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeCrossEncoder()
+
+    monkeypatch.setattr(built_index, '_reranker', None)
+    monkeypatch.setattr(built_index, 'get_reranker', slow_load)
+    with ThreadPoolExecutor(4) as pool:
+        runs = list(pool.map(lambda q: built_index.search(q, k=2, mode='vector', rerank=True),
+                             ['gift card', 'supplier', 'hospitality', 'FCPA']))
+    assert len(loads) == 1 and all(len(hits) == 2 for hits in runs)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from retrieval.response_cache import ResponseCache, chunk_key
+
+
+HITS = [{'doc_path': 'data/policies/POL-ABAC-002.md', 'chunk_id': 0},
+        {'doc_path': 'data/policies/POL-SUP-004.md', 'chunk_id': 1}]
+
+
+def _unit(v):
+    v = np.asarray(v, dtype='float32')
+    return v / np.linalg.norm(v)
+
+
+def test_chunk_key_is_order_independent_and_variant_aware():
+    assert chunk_key(HITS) == chunk_key(HITS[::-1])
+    assert chunk_key(HITS, 'a') != chunk_key(HITS, 'b')
+    assert chunk_key(HITS) != chunk_key(HITS[:1])
+
+
+def test_similar_question_same_chunks_hits(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'r.sqlite'), similarity=0.95)
+    key = chunk_key(HITS)
+    cache.store(key, _unit([1, 0, 0]), 'Gifts above USD 50 must be refused.', 'v1')
+
+    assert cache.lookup(key, _unit([1, 0.05, 0]), 'v1') == 'Gifts above USD 50 must be refused.'
+    assert cache.lookup(key, _unit([1, 1, 0]), 'v1') is None          # different question
+    assert cache.lookup(chunk_key(HITS[:1]), _unit([1, 0, 0]), 'v1') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_index_version_ttl_and_size_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'r.sqlite'), max_entries=2)
+    q = _unit([0, 1, 0])
+    cache.store('k1', q, 'a1', 'v1')
+    assert cache.lookup('k1', q, 'v2') is None           # rebuilt index
+
+    cache.store('k2', q, 'a2', 'v2')                      # purges v1 rows
+    cache.store('k3', q, 'a3', 'v2')
+    cache.store('k4', q, 'a4', 'v2')                      # evicts LRU k2
+    assert cache.stats()['entries'] == 2
+    assert cache.lookup('k2', q, 'v2') is None
+    assert cache.lookup('k4', q, 'v2') == 'a4'
+
+    expired = ResponseCache(str(tmp_path / 'e.sqlite'), ttl_s=0)
+    expired.store('k', q, 'a', 'v')
+    assert expired.lookup('k', q, 'v') is None
@@ -0,0 +1,92 @@
+import time
+
+from benchmarks.stubs import serve, ollama_handler, risk_reply
+from models.llm_client import OllamaClient
+from news import risk
+
+
+def _articles(n, company='Acme'):
+    topics = ['opens fraud investigation', 'wins sustainability award', 'faces bribery probe', 'expands plant']
+    return [{'title': f'{company} {topics[i % 4]} #{i}', 'url': f'https://www.news.example/{company}/{i}',
+             'domain': 'news.example', 'company': company} for i in range(n)]
+
+
+def test_dedupe_by_normalized_url_and_title():
+    arts = [
+        {'title': 'Acme fined by regulator', 'url': 'https://www.news.example/a/?utm_source=x'},
+        {'title': 'ACME fined by regulator!', 'url': 'https://other.example/copy'},       # same title
+        {'title': 'Different headline', 'url': 'http://news.example/a#top'},              # same URL
+        {'title': 'Acme expands', 'url': 'https://news.example/b'},
+    ]
+    assert [a['url'] for a in risk.dedupe_articles(arts)] == [arts[0]['url'], arts[3]['url']]
+    assert risk.article_key(arts[0]) == risk.article_key(arts[2])
+
+
+def test_normalize_url_keeps_identifying_query():
+    assert risk.normalize_url('https://www.news.example/story.php?id=17&utm_medium=x&fbclid=abc') == \
+        'news.example/story.php?id=17'
+    assert risk.normalize_url('https://news.example/story.php?id=17') != \
+        risk.normalize_url('https://news.example/story.php?id=18')
+
+
+def test_pack_batches_respects_token_budget_and_size():
+    arts = _articles(40)
+    batches = risk.pack_batches(arts, max_tokens=60, max_items=8)
+    assert [a for b in batches for a in b] == arts
+    for b in batches:
+        assert len(b) <= 8
+        assert sum(risk.approx_tokens(risk._line(i, a)) for i, a in enumerate(b, 1)) <= 60
+
+
+def test_parse_scores_tolerates_noise():
+    text = 'Sure! {"scores": [{"id": 1, "score": 140}, {"id": "2", "score": "35", "category": "labor"},' \
+           ' {"id": 9, "score": 5}, {"score": 1}]}'
+    out = risk.parse_scores(text, 3)
+    assert out == {1: {'score': 100, 'category': '', 'reason': ''},
+                   2: {'score': 35, 'category': 'labor', 'reason': ''}}
+    assert risk.parse_scores('not json', 3) == {}
+
+
+def test_score_articles_batches_concurrently_and_never_rescores(tmp_path):
+    store = risk.RiskStore(str(tmp_path / 'risk.sqlite'))
+    arts = _articles(60) + _articles(10)          # second copy is all duplicates
+    with serve(ollama_handler(ttft_s=0.1, token_s=0.0, respond=risk_reply)) as url:
+        client = OllamaClient(host=url, max_in_flight=3)
+        t0 = time.perf_counter()
+        scored, stats = risk.score_articles(arts, client=client, store=store, max_items=10, workers=3)
+        elapsed = time.perf_counter() - t0
+
+        assert stats['unique'] == 60 and stats['batches'] == 6 and stats['scored'] == 60
+        assert elapsed < 0.45                        # 6 calls x 100 ms, 3 at a time
+        assert scored[0]['score'] == 80 and scored[-1]['score'] == 10
+        assert {a['score'] for a in scored if 'fraud' in a['title']} == {80}
+
+        more = _articles(65)                         # 5 new articles
+        scored, stats = risk.score_articles(more, client=client, store=store, max_items=10)
+        assert stats['cached'] == 60 and stats['sent'] == 5 and stats['batches'] == 1
+        assert len(scored) == 65
+        assert client.metrics()['requests'] == 7
+
+
+def test_generate_passes_json_format(ollama_stub):
+    from models import llm_client
+    llm_client.generate('x', format='json')
+    assert ollama_stub.requests_seen[-1]['format'] == 'json'
+    llm_client.generate('x')
+    assert 'format' not in ollama_stub.requests_seen[-1]
+
+
+def test_score_articles_reuses_one_default_store(monkeypatch):
+    class FakeStore:
+        def get_many(self, keys):
+            return {key: {'score': 1, 'category': '', 'reason': ''} for key in keys}
+
+        def close(self):
+            pass
+
+    opened = []
+    monkeypatch.setattr(risk, 'RiskStore', lambda path: opened.append(path) or FakeStore())
+    for _ in range(3):
+        scored, _ = risk.score_articles(_articles(2), client=object())
+        assert len(scored) == 2
+    assert opened == [risk.STORE_PATH]
@@ -0,0 +1,161 @@
+import json
+import time
+import asyncio
+import functools
+
+import pytest
+
+from benchmarks.stubs import serve, gdelt_handler, ollama_handler, risk_reply
+from models import llm_client
+from news import gdelt_search, risk
+from news.rate_limit import TokenBucket
+from retrieval import response_cache
+from retrieval.context import SYSTEM_COMPLIANCE
+from service import app as service_app
+from service.app import ComplianceService
+from service.batcher import QueryBatcher
+
+
+async def _call(app, method, path, body=None):
+    # Minimal ASGI driver: one request, returns (status, body bytes, body messages)
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({'type': 'http', 'method': method, 'path': path, 'headers': []}, receive, send)
+    chunks = [m.get('body', b'') for m in sent[1:]]
+    return sent[0]['status'], b''.join(chunks), chunks
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def service(built_index, monkeypatch, tmp_path):
+    monkeypatch.setattr(response_cache, '_default_cache',
+                        response_cache.ResponseCache(str(tmp_path / 'responses.sqlite')))
+    return ComplianceService(warm_up=False)
+
+
+def test_search_endpoint_matches_retriever_and_validates(service, built_index):
+    async def scenario():
+        out = await _call(service, 'POST', '/search', {'query': 'gifts to public officials', 'k': 3})
+        errors = [
+            await _call(service, 'POST', '/search', {'k': 3}),
+            await _call(service, 'POST', '/search', {'query': 'x', 'k': 0}),
+            await _call(service, 'POST', '/search', {'query': 'x', 'mode': 'fuzzy'}),
+            await _call(service, 'GET', '/search'),
+            await _call(service, 'POST', '/nope', {}),
+            await _call(service, 'POST', '/search', {'query': 'x', 'filters': ['policies']}),
+            await _call(service, 'POST', '/answer', {'question': 'x', 'temperature': 'hot'}),
+            await _call(service, 'POST', '/answer', {'question': 'x', 'filters': 'policies'}),
+        ]
+        await service.shutdown()
+        return out, errors
+
+    (status, body, _), errors = _run(scenario())
+    assert status == 200
+    hits = json.loads(body)['hits']
+    assert hits == built_index.search('gifts to public officials', k=3)
+    assert [e[0] for e in errors] == [400, 400, 400, 405, 404, 400, 400, 400]
+    assert 'query' in json.loads(errors[0][1])['error']
+
+
+def test_concurrent_searches_share_embedding_batches(service, built_index, fake_encoder):
+    built_index.warm_up()
+    queries = [f'supplier due diligence question {i}' for i in range(64)]
+
+    async def scenario():
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*[_call(service, 'POST', '/search', {'query': q, 'k': 4})
+                                         for q in queries])
+        elapsed = time.perf_counter() - t0
+        stats = service.batcher.stats()
+        await service.shutdown()
+        return results, elapsed, stats
+
+    calls = fake_encoder.calls
+    results, elapsed, stats = _run(scenario())
+
+    assert all(status == 200 for status, _, _ in results)
+    assert fake_encoder.calls - calls <= 4                 # 64 requests, a handful of forward passes
+    assert stats['requests'] == 64 and stats['mean_batch'] >= 8
+    assert len(queries) / elapsed > 50                     # requests per second under load
+    assert [json.loads(body)['hits'] for _, body, _ in results] == \
+        [built_index.search(q, k=4) for q in queries]
+
+
+def test_batcher_reports_errors_per_group():
+    def search_many(queries, k, mode=None, rerank=None, filters=None):
+        if mode == 'bad':
+            raise ValueError('unknown mode')
+        return [[{'q': q, 'k': k}] for q in queries]
+
+    async def scenario():
+        batcher = QueryBatcher(search_many=search_many, max_batch=8, max_wait_ms=20)
+        out = await asyncio.gather(batcher.search('a', k=1), batcher.search('b', k=2),
+                                   batcher.search('c', k=1, mode='bad'), return_exceptions=True)
+        stats = batcher.stats()
+        await batcher.stop()
+        return out, stats
+
+    out, stats = _run(scenario())
+    assert out[0] == [{'q': 'a', 'k': 1}] and out[1] == [{'q': 'b', 'k': 2}]
+    assert isinstance(out[2], ValueError)
+    assert stats['batches'] == 1 and stats['requests'] == 3
+
+
+def test_answer_streams_sources_tokens_then_done(service, ollama_stub):
+    question = {'question': 'Can I accept a gift from a supplier?'}
+
+    async def scenario():
+        first = await _call(service, 'POST', '/answer', question)
+        again = await _call(service, 'POST', '/answer', question)
+        await service.shutdown()
+        return first, again
+
+    first, again = _run(scenario())
+    events = [json.loads(chunk) for chunk in first[2] if chunk]
+    assert first[0] == 200
+    assert events[0]['type'] == 'sources' and events[0]['citations']
+    assert events[-1]['type'] == 'done' and not events[-1]['cached']
+    tokens = [e['text'] for e in events if e['type'] == 'token']
+    assert len(tokens) > 10                                # streamed word by word
+    assert ''.join(tokens).startswith('CONTEXT')           # the stub echoes the prompt
+    assert ollama_stub.requests_seen[0]['system'] == SYSTEM_COMPLIANCE
+
+    # Same question over the same chunks comes from the response cache
+    events = [json.loads(chunk) for chunk in again[2] if chunk]
+    assert events[-1] == {'type': 'done', 'cached': True}
+    assert len(ollama_stub.requests_seen) == 1
+
+
+def test_news_endpoint_fetches_and_scores(service, monkeypatch, tmp_path):
+    store = risk.RiskStore(str(tmp_path / 'risk.sqlite'))
+    monkeypatch.setattr(service_app, 'score_articles', functools.partial(risk.score_articles, store=store))
+    monkeypatch.setattr(gdelt_search, '_limiter', TokenBucket(1000, 1000))
+
+    with serve(gdelt_handler(latency_s=0.0)) as gdelt_url, \
+            serve(ollama_handler(ttft_s=0.0, token_s=0.0, respond=risk_reply)) as ollama_url:
+        monkeypatch.setattr(gdelt_search, 'GDELT_ENDPOINT', gdelt_url + '/api/v2/doc/doc')
+        monkeypatch.setattr(llm_client, 'OLLAMA_HOST', ollama_url)
+        monkeypatch.setattr(llm_client, '_client', None)
+
+        async def scenario():
+            out = await _call(service, 'POST', '/news', {'company': 'Acme', 'max_articles': 3, 'score': True})
+            bad = await _call(service, 'POST', '/news', {'company': 'Acme', 'max_articles': 'many'})
+            await service.shutdown()
+            return out, bad
+
+        (status, body, _), bad = _run(scenario())
+
+    out = json.loads(body)
+    assert status == 200 and bad[0] == 400
+    assert len(out['articles']) == 3 and out['articles'][0]['company'] == 'Acme'
+    assert out['stats']['scored'] == 3
+    assert {a['score'] for a in out['scored']} == {80}
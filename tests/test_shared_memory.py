@@ -0,0 +1,107 @@
+import argparse
+import threading
+
+import faiss
+import numpy as np
+import pytest
+
+from benchmarks import bench_memory
+from models.embedding_server import RemoteEncoder, make_server
+from retrieval import index_types
+from retrieval.index_types import MappedFlatIndex, make_selector, read_index, search_params
+
+
+def test_mapped_flat_index_matches_faiss(monkeypatch, tmp_path):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((500, 16)).astype('float32')
+    mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+    ids = rng.permutation(5000)[:500].astype('int64')
+    index = index_types.build_faiss_index(mat, ids)
+    path = str(tmp_path / 'faiss_index')
+    faiss.write_index(index, path)
+    assert index_types.write_flat_vectors(index, path)
+
+    mapped = read_index(path, mmap=True)
+    assert isinstance(mapped, MappedFlatIndex) and isinstance(mapped.vectors, np.memmap)
+    monkeypatch.setattr(MappedFlatIndex, 'BLOCK', 64)                 # several blocks per search
+    queries = mat[:8] + 0.05
+
+    for k in (5, 600):                                                 # k > ntotal pads with -1
+        expected, got = index.search(queries, k), mapped.search(queries, k)
+        assert (expected[1] == got[1]).all() and np.allclose(expected[0][expected[1] >= 0],
+                                                             got[0][got[1] >= 0], atol=1e-5)
+    allowed = np.sort(ids[::9])
+    expected = index.search(queries, 5, params=search_params(index, make_selector(index, allowed)))
+    got = mapped.search(queries, 5, params=search_params(mapped, make_selector(mapped, allowed)))
+    assert (expected[1] == got[1]).all()
+    assert np.allclose(mapped.reconstruct_batch(allowed[:3]), index.reconstruct_batch(allowed[:3]))
+
+
+@pytest.fixture
+def embedding_server(tmp_path, fake_encoder):
+    server = make_server(fake_encoder, str(tmp_path / 'embed.sock'))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retriever_serves_mmap_index_and_remote_vectors(monkeypatch, built_index, tmp_ingest, fake_encoder,
+                                                        embedding_server):
+    queries = ['gifts to public officials', 'supplier due diligence', 'FCPA']
+    filters = [None, {'folder': 'policies'}]
+    expected = [built_index.search_many(queries, k=3, mode=mode, filters=f)
+                for mode in ('vector', 'hybrid') for f in filters]
+
+    # Same corpus republished with the sidecar, served mapped
+    monkeypatch.setattr(tmp_ingest, 'MMAP_INDEX', True)
+    tmp_ingest.build_index()
+    monkeypatch.setattr(built_index, 'MMAP_INDEX', True)
+    monkeypatch.setattr(built_index, 'EMBEDDING_SERVER', embedding_server.server_address)
+    for name in ('_state', '_model'):
+        monkeypatch.setattr(built_index, name, None)
+    built_index._vec_cache.clear()
+
+    got = [built_index.search_many(queries, k=3, mode=mode, filters=f)
+           for mode in ('vector', 'hybrid') for f in filters]
+    assert isinstance(built_index._state.index, MappedFlatIndex)
+    assert isinstance(built_index._model, RemoteEncoder)
+    assert embedding_server.stats['texts'] == len(queries)
+    strip = lambda runs: [[[(h['doc_path'], h['chunk_id']) for h in hits] for hits in run] for run in runs]
+    assert strip(got) == strip(expected)
+
+
+def test_remote_encoder_round_trip_and_errors(tmp_path, fake_encoder, embedding_server):
+    client = RemoteEncoder(embedding_server.server_address)
+    texts = ['gift policy', 'conflict of interest', 'gift policy']
+    assert np.allclose(client.encode(texts, normalize_embeddings=True),
+                       fake_encoder.encode(texts, normalize_embeddings=True))
+    assert client.encode('one').shape == (16,)
+    client.close()
+
+    class Broken:
+        def encode(self, *a, **kw):
+            raise ValueError('model crashed')
+
+    server = make_server(Broken(), str(tmp_path / 'broken.sock'))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(RuntimeError, match='model crashed'):
+            RemoteEncoder(server.server_address).encode(['x'])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_bench_memory_measures_each_mode(tmp_path):
+    # Children write spans to tmp_path, not to logs/ of the working tree
+    traces = tmp_path / 'child_traces.jsonl'
+    args = argparse.Namespace(encoder='hash', chunks=300, modes=['private', 'mmap', 'mmap+server'],
+                              workers=[2], queries=5, traces=str(traces))
+    rows = bench_memory.run(str(tmp_path), args)
+    assert traces.exists()
+    assert [(r['mode'], r['workers']) for r in rows] == [('private', 2), ('mmap', 2), ('mmap+server', 2)]
+    for r in rows:
+        assert r['search_ms'] > 0
+        assert r.get('pss_mb', r.get('peak_rss_mb', 0)) > 0
+    assert rows[2].get('server_pss_mb', 1) > 0
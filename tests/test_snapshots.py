@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+from retrieval import snapshots
+
+
+def _docs(tmp_path, name, body):
+    docs = tmp_path / 'docs'
+    docs.mkdir(exist_ok=True)
+    (docs / f'{name}.md').write_text(f'# {name}\n{body}', encoding='utf-8')
+    return str(docs / '*.md')
+
+
+def test_builds_publish_new_versions_and_collect_old_ones(monkeypatch, tmp_path, tmp_ingest):
+    monkeypatch.setattr(tmp_ingest, 'DOC_GLOBS', [_docs(tmp_path, 'a', 'gifts and hospitality')])
+    monkeypatch.setattr(tmp_ingest, 'KEEP_SNAPSHOTS', 2)
+    root = tmp_ingest.SNAPSHOT_ROOT
+
+    published = []
+    for _ in range(3):
+        tmp_ingest.build_index()
+        published.append(snapshots.current(root))
+    assert len(set(published)) == 3 and published == sorted(published)
+    assert snapshots.list_versions(root) == published[1:]          # oldest one collected
+    assert os.path.exists(snapshots.snapshot_paths(os.path.join(root, published[-1]))['manifest'])
+
+    # A failed build leaves no directory behind and the live version untouched
+    monkeypatch.setattr(tmp_ingest, 'DOC_GLOBS', [str(tmp_path / 'none' / '*.md')])
+    with pytest.raises(RuntimeError):
+        tmp_ingest.build_index()
+    assert snapshots.current(root) == published[-1]
+    assert snapshots.list_versions(root) == published[1:]
+
+    # Rolling back is publishing an older version
+    snapshots.publish(published[1], root)
+    assert snapshots.current(root) == published[1]
+    assert snapshots.collect_garbage(root, keep=1) == []          # live version is never deleted
+
+
+def test_garbage_collection_keeps_unpublished_builds(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    names = [snapshots.create(root)[0] for _ in range(4)]
+    assert snapshots.collect_garbage(root, keep=1) == []           # nothing published yet
+    snapshots.publish(names[2], root)
+    building, _ = snapshots.create(root)                            # e.g. a second ingestion run
+
+    assert snapshots.collect_garbage(root, keep=1) == names[:2]
+    assert snapshots.list_versions(root) == [names[2], names[3], building]
+
+
+def test_new_snapshot_is_swapped_in_without_blocking_searches(monkeypatch, tmp_path, built_index, tmp_ingest):
+    monkeypatch.setattr(built_index, 'SNAPSHOT_POLL_S', 0.0)
+    old_version = built_index.index_version()
+    assert built_index.search('FCPA', k=2, mode='lexical')
+
+    # Rebuild from a corpus without FCPA; loading the new version is slow
+    monkeypatch.setattr(tmp_ingest, 'DOC_GLOBS', [_docs(tmp_path, 'new', 'Supplier onboarding checklist.')])
+    tmp_ingest.build_index()
+    read_state = built_index._read_state
+    monkeypatch.setattr(built_index, '_read_state', lambda *a: (time.sleep(0.3), read_state(*a))[1])
+
+    t0 = time.perf_counter()
+    hits = built_index.search('FCPA', k=3, mode='lexical')          # not cached
+    assert time.perf_counter() - t0 < 0.2                          # served by the old version
+    assert hits and built_index.index_version() == old_version
+
+    deadline = time.time() + 10
+    while built_index.index_version() == old_version and time.time() < deadline:
+        time.sleep(0.02)
+    assert built_index.index_version() == snapshots.current(tmp_ingest.SNAPSHOT_ROOT)
+    assert built_index.search('FCPA', k=2, mode='lexical') == []
+    assert built_index.search('supplier onboarding', k=2, mode='lexical')[0]['doc_path'].endswith('new.md')
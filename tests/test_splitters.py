@@ -0,0 +1,56 @@
+from ingestion.splitters import split_text, split_structured, split_document, approx_tokens
+
+
+DOC = """# Anti-Bribery Policy
+
+**Document ID:** POL-ABAC-002
+
+## Art. 10 — Zero Tolerance
+Offering anything of value to improperly influence a decision is prohibited.
+
+## Art. 11 — Public Officials
+Heightened restrictions apply.
+
+## Art. 12 — Gifts & Hospitality Thresholds
+(a) Cash is prohibited. (b) Gifts up to USD 50 may be accepted. (c) Anything above USD 50 must be refused.
+"""
+
+
+def test_split_text_unchanged_defaults():
+    text = 'x' * 2500
+    chunks = split_text(text)
+    assert [len(c) for c in chunks] == [1200, 1350, 250]
+
+
+def test_structured_packs_whole_articles_under_budget():
+    chunks = split_structured(DOC, max_tokens=40)
+    for c in chunks:
+        assert approx_tokens(c['text']) <= 40
+        assert c['section'] == 'Anti-Bribery Policy'
+    assert chunks[-1]['article'] == '12'
+    assert chunks[-1]['text'].startswith('## Art. 12')
+    # every clause heading starts a chunk or follows a blank line inside one
+    joined = '\n\n'.join(c['text'] for c in chunks)
+    for art in ('Art. 10', 'Art. 11', 'Art. 12'):
+        assert joined.count(art) == 1
+
+
+def test_structured_packs_small_articles_together():
+    chunks = split_structured(DOC, max_tokens=500)
+    assert len(chunks) == 1
+    assert chunks[0]['article'] == '10,11,12'
+
+
+def test_oversized_article_is_split_on_sentences():
+    chunks = split_structured(DOC, max_tokens=12)
+    art12 = [c for c in chunks if c['article'] == '12']
+    assert len(art12) > 1
+    assert all(approx_tokens(c['text']) <= 12 for c in art12)
+    assert ' '.join(c['text'] for c in art12).count('USD 50') == 2
+
+
+def test_split_document_modes():
+    chars = split_document(DOC, {'mode': 'chars', 'max_chars': 100, 'overlap': 10})
+    assert chars[0] == {'text': DOC[:100], 'section': None, 'article': None}
+    structured = split_document(DOC, {'mode': 'structured', 'max_tokens': 500})
+    assert structured == split_structured(DOC, max_tokens=500)
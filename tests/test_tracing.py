@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from telemetry import tracing, report
+
+
+def _spans(path):
+    tracing.flush()
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_under_trace_and_record_errors(tmp_traces):
+    with tracing.trace('chat_turn', mode='rag') as root:
+        with tracing.span('retrieval.embed', queries=1) as s:
+            s.set(cache_hits=0)
+        with pytest.raises(ValueError):
+            with tracing.span('llm.generate'):
+                raise ValueError('boom')
+        tracing.record('llm.ttft', 0.25, eval_count=3)
+        root.set(answered=True)
+
+    spans = {s['name']: s for s in _spans(tmp_traces)}
+    turn = spans['chat_turn']
+    assert turn['parent'] is None and turn['mode'] == 'rag' and turn['answered'] is True
+    for name in ('retrieval.embed', 'llm.generate', 'llm.ttft'):
+        assert spans[name]['trace'] == turn['trace']
+        assert spans[name]['parent'] == turn['span']
+    assert spans['retrieval.embed']['cache_hits'] == 0
+    assert spans['llm.generate']['error'] == 'ValueError'
+    assert spans['llm.ttft']['ms'] == 250.0
+
+
+def test_disabled_tracing_writes_nothing(tmp_path):
+    path = str(tmp_path / 'off.jsonl')
+    tracing.configure(path=path, enabled=False)
+    with tracing.trace('chat_turn') as s:
+        s.set(x=1)
+        tracing.record('llm.total', 1.0)
+    tracing.flush()
+    assert not (tmp_path / 'off.jsonl').exists()
+
+
+def test_file_rotates_and_report_reads_backups(tmp_path):
+    path = str(tmp_path / 'rot.jsonl')
+    tracing.configure(path=path, max_mb=0.005, backups=5)
+    for i in range(100):
+        tracing.record('retrieval.faiss', (i + 1) / 1000, queries=1)
+    tracing.flush()
+
+    assert (tmp_path / 'rot.jsonl.1').exists()
+    spans = list(report.iter_spans(path))
+    assert len(spans) == 100
+    assert [s['ms'] for s in spans] == sorted(s['ms'] for s in spans)   # oldest file first
+
+    [row] = report.summarize(spans)
+    assert row['count'] == 100 and row['max_ms'] == 100.0
+    assert row['p50_ms'] == pytest.approx(50.5) and row['p99_ms'] == pytest.approx(99.01)
+
+
+def test_llm_and_retrieval_spans_carry_stage_details(tmp_traces, ollama_stub, built_index):
+    from models import llm_client
+
+    with tracing.trace('chat_turn'):
+        built_index.search('personal data', k=2, mode='hybrid')
+        llm_client.generate('one two three')
+        list(llm_client.generate_stream('one two three four'))
+
+    spans = _spans(tmp_traces)
+    names = {s['name'] for s in spans}
+    assert {'retrieval.search', 'retrieval.embed', 'retrieval.faiss', 'retrieval.bm25',
+            'llm.generate', 'llm.ttft', 'llm.total'} <= names
+    by_name = {s['name']: s for s in spans}
+    assert by_name['llm.generate']['eval_count'] == 3
+    assert by_name['llm.total']['eval_count'] == 4 and by_name['llm.total']['eval_duration_s'] == 0.004
+    assert by_name['retrieval.faiss']['parent'] == by_name['retrieval.search']['span']
+
+    rows = {r['name']: r for r in report.summarize(spans, prefix='llm.')}
+    assert set(rows) == {'llm.generate', 'llm.ttft', 'llm.total'}
+    assert rows['llm.total']['tokens_per_s'] == pytest.approx(1000.0)
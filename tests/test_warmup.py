@@ -0,0 +1,39 @@
+import sys
+import subprocess
+
+from retrieval.warmup import WarmUp
+
+
+def test_app_modules_import_without_torch():
+    code = ('import sys, retrieval.retriever, retrieval.warmup, news.gdelt_search, models.llm_client; '
+            'print("torch" in sys.modules, "sentence_transformers" in sys.modules)')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ['False', 'False']
+
+
+def test_warmup_loads_index_and_model_in_background(built_index, fake_encoder):
+    stages = []
+    warmup = WarmUp()
+    warmup._set_stage = lambda stage: (stages.append(stage), setattr(warmup, 'stage', stage))
+    assert warmup.start() is warmup.start()            # idempotent
+    assert warmup.wait(timeout=30)
+
+    status = warmup.status()
+    assert status['ready'] and status['progress'] == 1.0 and status['error'] is None
+    assert stages == ['index', 'model', 'encode']
+    assert built_index._state is not None and built_index._model is not None
+
+    calls = fake_encoder.calls
+    built_index.search('gift from supplier', k=2)      # nothing left to load
+    assert built_index._model is not None
+    assert fake_encoder.calls == calls + 1
+
+
+def test_warmup_records_failure(monkeypatch, tmp_path):
+    from retrieval import retriever
+    monkeypatch.setattr(retriever, 'SNAPSHOT_ROOT', str(tmp_path / 'missing'))
+    monkeypatch.setattr(retriever, 'LEGACY_PATHS', None)
+    monkeypatch.setattr(retriever, '_state', None)
+    warmup = WarmUp().start()
+    assert not warmup.wait(timeout=30)
+    assert warmup.status()['error']